@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Entry point of the benchmark suite: python -m benchmarks --help
+"""
+
+import sys
+
+from benchmarks.suite import main
+
+sys.exit(main())
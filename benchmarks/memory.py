@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+memory
+----------------------------------
+
+Memory footprint benchmark for the primitives: the shallow size of one instance of each primitive type, the resident
+memory each instance costs once its libraries are accounted for, and the peak resident memory of a model built out of
+100,000 primitives.
+
+Every resident memory figure is measured in a fresh interpreter, so that one measurement does not pollute the next.
+
+Run from the repository root with: python -m benchmarks.memory [--count N]
+"""
+
+import optparse
+import resource
+import subprocess
+import sys
+
+from sulley.primitives.bit_field import bit_field
+from sulley.primitives.byte import byte
+from sulley.primitives.delim import delim
+from sulley.primitives.group import group
+from sulley.primitives.qword import qword
+from sulley.primitives.random_data import random_data
+from sulley.primitives.static import static
+from sulley.primitives.string import string
+from sulley.primitives.word import word
+
+factories = [
+    ("bit_field",   lambda: bit_field(0, 32)),
+    ("byte",        lambda: byte(0)),
+    ("word",        lambda: word(0)),
+    ("qword",       lambda: qword(0)),
+    ("delim",       lambda: delim(":")),
+    ("group",       lambda: group("opcodes", ["\x01", "\x02"])),
+    ("random_data", lambda: random_data("x", 1, 10)),
+    ("static",      lambda: static("\x00")),
+    ("string",      lambda: string("sulley")),
+]
+
+
+def shallow_size (primitive):
+    """
+    Bytes held by the instance itself, including its __dict__ when it has one, excluding what its attributes refer to.
+    """
+
+    size = sys.getsizeof(primitive)
+
+    if hasattr(primitive, "__dict__"):
+        size += sys.getsizeof(primitive.__dict__)
+
+    return size
+
+
+def peak_rss ():
+    """
+    Peak resident memory of this process, in bytes.
+    """
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in kilobytes on Linux, bytes on OS X.
+    if sys.platform != "darwin":
+        peak *= 1024
+
+    return peak
+
+
+def build (names, count):
+    """
+    Build count primitives, cycling through the named types, after warming up each type once so that shared libraries
+    are not charged to the model.
+
+    :rtype:  Tuple
+    :returns: (peak resident bytes before, peak resident bytes after)
+    """
+
+    selected = [factory for name, factory in factories if name in names]
+
+    for factory in selected:
+        factory()
+
+    before = peak_rss()
+    model  = [selected[i % len(selected)]() for i in range(count)]
+    after  = peak_rss()
+
+    del model
+    return before, after
+
+
+def measure (names, count):
+    """
+    Build count primitives in a fresh interpreter.
+
+    :rtype:  Tuple
+    :returns: (peak resident bytes before, peak resident bytes after)
+    """
+
+    output = subprocess.check_output([sys.executable, "-m", "benchmarks.memory", "--child", ",".join(names),
+                                      "--count", str(count)])
+
+    return tuple([int(value) for value in output.split()])
+
+
+def main (argv=None):
+    parser = optparse.OptionParser(usage="%prog [--count N]")
+    parser.add_option("--count", type="int", default=100000, help="number of primitives in the model")
+    parser.add_option("--child", help=optparse.SUPPRESS_HELP)
+
+    options, args = parser.parse_args(argv)
+
+    if options.child:
+        sys.stdout.write("%d %d\n" % build(options.child.split(","), options.count))
+        return 0
+
+    print("%-12s %14s %18s" % ("primitive", "shallow bytes", "resident bytes"))
+
+    for name, factory in factories:
+        before, after = measure([name], options.count)
+        print("%-12s %14d %18d" % (name, shallow_size(factory()), (after - before) / options.count))
+
+    before, after = measure([name for name, factory in factories], options.count)
+
+    print("")
+    print("%d primitive model: %.1f MB peak resident, %.1f MB for the primitives themselves" % \
+        (options.count, after / 1048576.0, (after - before) / 1048576.0))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+string_mutate
+----------------------------------
+
+Micro-benchmark comparing string.mutate() through the chained library view against the former mutate(), which
+concatenated the global and instance libraries on every call, both in mutations per second and in bare lookups.
+
+Run from the repository root with: python -m benchmarks.string_mutate
+"""
+
+import time
+
+from sulley.primitives.string import string
+
+
+def concatenated_lookup (primitive, index):
+    """
+    The lookup string.mutate() used to do, copying both libraries on every call.
+    """
+
+    return (primitive.fuzz_library + primitive.this_library)[index]
+
+
+def chained_lookup (primitive, index):
+    """
+    The lookup string.mutate() does now, through the chained view.
+    """
+
+    return primitive.mutation_library[index]
+
+
+def lookups_per_second (lookup, primitive, passes):
+    """
+    Time full passes of lookups over every mutation index of the primitive, skipping the entries which would be
+    materialized into long strings so that only the cost of reaching the entry is measured.
+    """
+
+    indexes = [i for i in range(primitive.num_mutations()) if len(primitive.mutation_library[i]) < 1024]
+    start   = time.time()
+
+    for _ in range(passes):
+        for index in indexes:
+            lookup(primitive, index)
+
+    return len(indexes) * passes / (time.time() - start)
+
+
+def concatenating_mutations_per_second (primitive, passes):
+    """
+    Time full passes of the former mutate(), over the global library materialized into a list of strings as it used to
+    be held, the library being concatenated with the instance library for every mutation.
+    """
+
+    library = list(primitive.fuzz_library)
+    count   = 0
+    start   = time.time()
+
+    for _ in range(passes):
+        mutant_index = 0
+
+        while mutant_index != len(library) + len(primitive.this_library):
+            primitive.value = (library + primitive.this_library)[mutant_index]
+            mutant_index   += 1
+            count          += 1
+
+    elapsed = time.time() - start
+    primitive.reset()
+
+    return count / elapsed
+
+
+def mutations_per_second (primitive, passes):
+    """
+    Time full mutate() passes over the primitive.
+    """
+
+    count = 0
+    start = time.time()
+
+    for _ in range(passes):
+        primitive.reset()
+
+        while primitive.mutate():
+            count += 1
+
+    return count / (time.time() - start)
+
+
+def main ():
+    primitive = string("sulley")
+    passes    = 20
+
+    before = concatenating_mutations_per_second(primitive, passes)
+    after  = mutations_per_second(primitive, passes)
+
+    print("library size:                 %d entries" % primitive.num_mutations())
+    print("concatenating mutate()/sec:   %d" % before)
+    print("chained view mutate()/sec:    %d (%.1fx)" % (after, after / before))
+
+    before = lookups_per_second(concatenated_lookup, primitive, passes)
+    after  = lookups_per_second(chained_lookup, primitive, passes)
+
+    print("concatenated lookups/sec:     %d" % before)
+    print("chained view lookups/sec:     %d (%.1fx)" % (after, after / before))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+suite
+----------------------------------
+
+Throughput benchmark suite for the primitives. For each primitive type and configuration it measures:
+
+    first_construction_seconds  the first construction in a fresh interpreter followed by a num_mutations() call,
+                                which builds the lazily built fuzz libraries, shared ones such as the global string
+                                library included
+    constructions_per_second    constructions once the shared libraries exist
+    mutations_per_second        mutate() calls over full mutation passes
+    renders_per_second          render() calls on mutated values
+    full_pass_seconds           one reset() and mutate()/render() pass through every mutation
+    peak_rss_bytes              peak resident memory of the interpreter the configuration was measured in
+
+Every configuration is measured in a fresh interpreter and the results are written out as JSON, which can be saved and
+later given back as a baseline to compare against:
+
+    python -m benchmarks [--only NAME,...] [--output FILE] [--baseline FILE] [--threshold PERCENT]
+
+When comparing, a metric which got worse by more than the threshold is reported as a regression and the exit status is
+1, so that the suite can guard performance work.
+"""
+
+import json
+import optparse
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.memory import peak_rss
+from sulley.blocks import request
+from sulley.primitives.bit_field import bit_field
+from sulley.primitives.byte import byte
+from sulley.primitives.delim import delim
+from sulley.primitives.group import group
+from sulley.primitives.qword import qword
+from sulley.primitives.random_data import random_data
+from sulley.primitives.static import static
+from sulley.primitives.string import string
+from sulley.primitives.word import word
+
+# timer with the best resolution the interpreter offers.
+try:
+    timer = time.perf_counter
+except AttributeError:
+    timer = time.clock if sys.platform == "win32" else time.time
+
+
+def message (fields):
+    """
+    A request made of fields primitives, cycling through integer, delimiter and string fields like a protocol model.
+    """
+
+    model = request("message")
+
+    for i in range(fields):
+        model.push([word(i), delim(":"), string("field%d" % i, max_len=64)][i % 3])
+
+    return model
+
+
+# configurations measured by the suite, in report order.
+configurations = [
+    ("bit_field",             lambda: bit_field(0, 32)),
+    ("bit_field_ascii",       lambda: bit_field(0, 32, format="ascii", signed=True)),
+    ("byte",                  lambda: byte(0)),
+    ("word",                  lambda: word(0)),
+    ("word_full_range",       lambda: word(0, full_range=True)),
+    ("qword",                 lambda: qword(0)),
+    ("delim",                 lambda: delim(":")),
+    ("group",                 lambda: group("opcodes", ["\x01", "\x02", "\x03", "\x04"])),
+    ("random_data",           lambda: random_data("x", 1, 100, max_mutations=1000)),
+    ("random_data_seeded",    lambda: random_data("x", 1, 100, max_mutations=1000, seed=1)),
+    ("static",                lambda: static("\x00")),
+    ("string",                lambda: string("sulley")),
+    ("string_sized",          lambda: string("sulley", size=16)),
+    ("string_max_len",        lambda: string("sulley", max_len=64)),
+    ("string_utf_16_le",      lambda: string("sulley", encoding="utf_16_le")),
+    ("request_300_fields",    lambda: message(300)),
+]
+
+# whether a larger value of each metric is an improvement.
+higher_is_better = {
+    "first_construction_seconds": False,
+    "constructions_per_second":   True,
+    "mutations_per_second":       True,
+    "renders_per_second":         True,
+    "full_pass_seconds":          False,
+    "peak_rss_bytes":             False,
+}
+
+# render() calls timed per mutated value, so that the timer overhead is spread over several renders.
+RENDERS = 10
+
+
+def constructions_per_second (factory, duration):
+    """
+    Construct primitives in a loop for at least duration seconds.
+    """
+
+    count = 0
+    start = timer()
+
+    while timer() - start < duration:
+        for _ in range(100):
+            factory()
+
+        count += 100
+
+    return count / (timer() - start)
+
+
+def mutations_per_second (primitive, duration):
+    """
+    Run full mutate() passes for at least duration seconds.
+    """
+
+    count = 0
+    start = timer()
+
+    while not count or timer() - start < duration:
+        primitive.reset()
+
+        while primitive.mutate():
+            count += 1
+
+    return count / (timer() - start)
+
+
+def renders_per_second (primitive, duration):
+    """
+    Time render() on every mutated value, pass after pass, for at least duration seconds of rendering.
+    """
+
+    count   = 0
+    elapsed = 0.0
+
+    while not count or elapsed < duration:
+        primitive.reset()
+
+        while primitive.mutate():
+            start = timer()
+
+            for _ in range(RENDERS):
+                primitive.render()
+
+            elapsed += timer() - start
+            count   += RENDERS
+
+    return count / elapsed
+
+
+def full_pass_seconds (primitive):
+    """
+    Time a single pass through every mutation, rendering each one like a fuzzing session would.
+    """
+
+    start = timer()
+    primitive.reset()
+
+    while primitive.mutate():
+        primitive.render()
+
+    return timer() - start
+
+
+def run (name, duration):
+    """
+    Measure one configuration, expected to be called in a fresh interpreter.
+
+    :type  name:     String
+    :param name:     Name of the configuration
+    :type  duration: Float
+    :param duration: Minimum number of seconds spent on each throughput measurement
+
+    :rtype:  Dictionary
+    :returns: Metric name to value
+    """
+
+    factory = dict(configurations)[name]
+
+    # fuzz libraries are built on first use, count the first num_mutations() call along with the construction.
+    start     = timer()
+    primitive = factory()
+    primitive.num_mutations()
+    first     = timer() - start
+
+    results = {
+        "first_construction_seconds": first,
+        "constructions_per_second":   constructions_per_second(factory, duration),
+        "mutations":                  primitive.num_mutations(),
+    }
+
+    # primitives which never mutate (ie: static) have no mutation throughput to speak of.
+    if primitive.num_mutations():
+        results["mutations_per_second"] = mutations_per_second(primitive, duration)
+        results["renders_per_second"]   = renders_per_second(primitive, duration)
+        results["full_pass_seconds"]    = full_pass_seconds(primitive)
+
+    results["peak_rss_bytes"] = peak_rss()
+
+    return results
+
+
+def measure (name, duration):
+    """
+    Measure one configuration in a fresh interpreter.
+
+    :rtype:  Dictionary
+    :returns: Metric name to value
+    """
+
+    output = subprocess.check_output([sys.executable, "-m", "benchmarks", "--child", name,
+                                      "--duration", str(duration)])
+
+    return json.loads(output.decode("ascii"))
+
+
+def compare (baseline, current, threshold):
+    """
+    Compare two result documents, metric by metric.
+
+    :type  baseline:  Dictionary
+    :param baseline:  Saved results
+    :type  current:   Dictionary
+    :param current:   Fresh results
+    :type  threshold: Float
+    :param threshold: Change, in percent, past which a metric getting worse is a regression
+
+    :rtype:  List
+    :returns: (configuration, metric, baseline value, current value, change in percent, regression) for each metric
+              present in both documents, the change being positive when the metric improved
+    """
+
+    rows = []
+
+    for name, metrics in sorted(current["results"].items()):
+        for metric, value in sorted(metrics.items()):
+            if metric not in higher_is_better:
+                continue
+
+            try:
+                before = baseline["results"][name][metric]
+            except KeyError:
+                continue
+
+            if not before:
+                continue
+
+            change = (value - before) * 100.0 / before
+
+            if not higher_is_better[metric]:
+                change = -change
+
+            rows.append((name, metric, before, value, change, change < -threshold))
+
+    return rows
+
+
+def main (argv=None):
+    parser = optparse.OptionParser(usage="%prog [--only NAME,...] [--output FILE] [--baseline FILE]")
+    parser.add_option("--only", help="comma separated configurations to measure, all of them by default")
+    parser.add_option("--duration", type="float", default=0.5, help="seconds spent on each throughput measurement")
+    parser.add_option("--output", help="write the JSON results to this file rather than to stdout")
+    parser.add_option("--baseline", help="compare the results against those saved in this file")
+    parser.add_option("--threshold", type="float", default=10.0,
+                      help="percentage past which a slower or larger result is a regression")
+    parser.add_option("--list", action="store_true", default=False, help="list the configurations and exit")
+    parser.add_option("--child", help=optparse.SUPPRESS_HELP)
+
+    options, args = parser.parse_args(argv)
+
+    if options.child:
+        sys.stdout.write(json.dumps(run(options.child, options.duration)) + "\n")
+        return 0
+
+    if options.list:
+        for name, factory in configurations:
+            print(name)
+
+        return 0
+
+    names = [name for name, factory in configurations]
+
+    if options.only:
+        for name in options.only.split(","):
+            if name not in names:
+                parser.error("unknown configuration: %s" % name)
+
+        names = [name for name in names if name in options.only.split(",")]
+
+    results = {
+        "python":   platform.python_version(),
+        "platform": platform.platform(),
+        "duration": options.duration,
+        "results":  {},
+    }
+
+    for name in names:
+        results["results"][name] = measure(name, options.duration)
+        sys.stderr.write("measured %s\n" % name)
+
+    document = json.dumps(results, indent=2, sort_keys=True)
+
+    if options.output:
+        fh = open(options.output, "w")
+        fh.write(document + "\n")
+        fh.close()
+    else:
+        print(document)
+
+    if not options.baseline:
+        return 0
+
+    fh = open(options.baseline)
+    baseline = json.load(fh)
+    fh.close()
+
+    rows        = compare(baseline, results, options.threshold)
+    regressions = 0
+
+    sys.stderr.write("%-20s %-28s %14s %14s %9s\n" % ("configuration", "metric", "baseline", "current", "change"))
+
+    for name, metric, before, value, change, regression in rows:
+        sys.stderr.write("%-20s %-28s %14.6g %14.6g %+8.1f%%%s\n" % \
+            (name, metric, before, value, change, "  REGRESSION" if regression else ""))
+
+        regressions += regression
+
+    sys.stderr.write("%d regression(s) past %.1f%%\n" % (regressions, options.threshold))
+
+    return 1 if regressions else 0
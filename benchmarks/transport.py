@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+transport
+----------------------------------
+
+Delivery throughput benchmark for the transport: test cases per second sent to the bundled echo server, answering
+after a delay to play a slow target, at increasing levels of concurrency, with and without keep-alive.
+
+Run from the repository root with: python -m benchmarks.transport [--count N] [--delay SECONDS]
+"""
+
+import optparse
+import sys
+
+from sulley import transport
+from sulley.primitives.group import group
+
+
+def delivery_rate (count, delay, concurrency, keep_alive, proto):
+    """
+    Send count test cases and time them.
+
+    :rtype:  Float
+    :returns: Test cases per second
+    """
+
+    loop   = transport.asyncio.new_event_loop()
+    server = transport.echo_server(proto=proto, delay=delay, loop=loop)
+    loop.run_until_complete(server.start())
+
+    target = transport.sender("127.0.0.1", server.port, proto=proto, concurrency=concurrency, keep_alive=keep_alive,
+                              loop=loop)
+
+    start = loop.time()
+    target.run(group("values", ["test case %d" % i for i in range(count)]))
+    elapsed = loop.time() - start
+
+    target.close()
+    server.close()
+
+    # let the closed transports finish closing, on this loop: trollius' sleep() would run on the default one.
+    loop.call_later(0.01, loop.stop)
+    loop.run_forever()
+    loop.close()
+
+    return count / elapsed
+
+
+def main (argv=None):
+    parser = optparse.OptionParser(usage="%prog [--count N] [--delay SECONDS]")
+    parser.add_option("--count", type="int", default=1000, help="number of test cases sent per measurement")
+    parser.add_option("--delay", type="float", default=0.005, help="seconds the echo server waits before answering")
+
+    options, args = parser.parse_args(argv)
+
+    if transport.asyncio is None:
+        sys.stderr.write("the transport benchmark needs asyncio, or trollius on Python 2\n")
+        return 1
+
+    print("%-6s %12s %12s %18s" % ("proto", "concurrency", "keep-alive", "test cases/second"))
+
+    for proto in transport.PROTOCOLS:
+        for concurrency in (1, 8, 32):
+            for keep_alive in (False, True):
+                # udp endpoints are connectionless, reusing them is the only sensible setting.
+                if proto == "udp" and not keep_alive:
+                    continue
+
+                rate = delivery_rate(options.count, options.delay, concurrency, keep_alive, proto)
+                print("%-6s %12d %12s %18.0f" % (proto, concurrency, keep_alive, rate))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
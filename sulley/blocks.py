@@ -0,0 +1,887 @@
+import bisect
+import hashlib
+import zlib
+
+from .primitives.bit_field import bit_field
+from .primitives.group import group as group_primitive
+
+
+def mutation_count (item):
+    """
+    Number of test cases an item of a request contributes: its mutations, none for primitives which are not fuzzable.
+
+    :rtype:  Integer
+    :returns: Number of test cases
+    """
+
+    if isinstance(item, block) or item.fuzzable:
+        return item.num_mutations()
+
+    return 0
+
+
+class block (object):
+    """
+    An ordered group of primitives and nested blocks, rendered by concatenating its items.
+
+    Test cases are numbered the way a sequential mutate() walk steps through them: every mutation of the first item,
+    then every mutation of the second one and so on, with only one primitive away from its original value at a time. A
+    block tied to a group repeats all of its own test cases once per value of that group, with the group primitive
+    pinned to the value. Test case numbers are therefore mixed-radix, (group value, test case within the block), and are
+    resolved arithmetically from the items' mutation counts rather than by stepping through them.
+
+    Rendering is incremental: the rendered bytes of every item are cached and only dirty primitives are rendered again.
+    As a single field usually changes from one test case to the next, the items on either side of it are kept joined
+    into a prefix and a suffix, and a test case costs one field render plus the copy of the result.
+    """
+
+    # blocks have no value of their own, enclosing blocks always ask them to render and compare what they get back.
+    dirty = True
+
+    def __init__ (self, name, request, group=None):
+        """
+        :type  name:    String
+        :param name:    Name of the new block
+        :type  request: request
+        :param request: Request this block belongs to
+        :type  group:   String
+        :param group:   (Optional, def=None) Name of the group primitive to repeat the block's test cases for
+        """
+
+        self.name    = name
+        self.request = request
+        self.group   = group
+        self.stack   = []       # items of the block, in render order.
+        self.starts  = None     # first test case number of each item, built on first use.
+        self.total   = None     # test cases of the items, for one value of the group.
+
+        self.segments = None    # rendered bytes of each item, as of the last render().
+        self.hole     = None    # position of the item left out of prefix and suffix.
+        self.prefix   = ""      # items before the hole, joined.
+        self.suffix   = ""      # items after the hole, joined.
+        self.rendered = ""
+
+
+    def push (self, item):
+        """
+        Append a primitive or a nested block.
+        """
+
+        self.stack.append(item)
+        self.starts = None
+
+
+    def item_starts (self):
+        """
+        The first test case number of each item, relative to the block and for a single group value.
+
+        :rtype:  List
+        :returns: Test case number each item starts at
+        """
+
+        if self.starts is None:
+            starts = []
+            total  = 0
+
+            for item in self.stack:
+                starts.append(total)
+                total += mutation_count(item)
+
+            self.starts = starts
+            self.total  = total
+
+        return self.starts
+
+
+    def group_primitive (self):
+        """
+        :rtype:  group
+        :returns: The group primitive this block repeats for, None if it is not tied to one
+        """
+
+        if self.group is None:
+            return None
+
+        try:
+            primitive = self.request.names[self.group]
+        except KeyError:
+            raise KeyError("block %s is tied to an unknown group: %s" % (self.name, self.group))
+
+        if not isinstance(primitive, group_primitive):
+            raise TypeError("block %s is tied to %s, which is not a group" % (self.name, self.group))
+
+        return primitive
+
+
+    def num_mutations (self):
+        """
+        Number of test cases of this block, including its repetition for each group value.
+
+        :rtype:  Integer
+        :returns: Number of test cases
+        """
+
+        self.item_starts()
+
+        if self.group is None:
+            return self.total
+
+        return self.total * len(self.group_primitive().values)
+
+
+    def locate (self, index, pins):
+        """
+        Resolve a test case number down to the primitive it mutates, in O(depth) steps.
+
+        :type  index: Integer
+        :param index: Test case number, relative to this block
+        :type  pins:  List
+        :param pins:  List the (group primitive, value) pairs the test case pins groups to are appended to
+
+        :rtype:  Tuple
+        :returns: (primitive, mutation index of that primitive)
+        """
+
+        container = self
+
+        while True:
+            starts = container.item_starts()
+
+            if container.group is not None:
+                primitive    = container.group_primitive()
+                value, index = divmod(index, container.total)
+
+                pins.append((primitive, primitive.values[value]))
+
+            # the item holding the test case is the last one starting at or before it, items without test cases start
+            # where the next one does and are skipped over.
+            position = bisect.bisect_right(starts, index) - 1
+            item     = container.stack[position]
+            index   -= starts[position]
+
+            if not isinstance(item, block):
+                return item, index
+
+            container = item
+
+
+    def render (self):
+        """
+        Render every item with its current value, only rendering again the primitives which changed since the last
+        call.
+
+        :rtype:  Raw
+        :returns: Rendered block
+        """
+
+        segments = self.segments
+
+        if segments is None or len(segments) != len(self.stack):
+            self.segments = [item.render() for item in self.stack]
+            self.hole     = None
+            self.rendered = "".join(self.segments)
+
+            return self.rendered
+
+        changed = []
+
+        for position, item in enumerate(self.stack):
+            if item.dirty:
+                item.render()
+
+            # compare identities, an item rendered by someone else since the last call is picked up too.
+            if item.rendered is not segments[position]:
+                segments[position] = item.rendered
+                changed.append(position)
+
+        if not changed:
+            return self.rendered
+
+        if len(changed) > 1:
+            self.hole     = None
+            self.rendered = "".join(segments)
+
+            return self.rendered
+
+        position = changed[0]
+
+        if position != self.hole:
+            self.hole   = position
+            self.prefix = "".join(segments[:position])
+            self.suffix = "".join(segments[position + 1:])
+
+        self.rendered = self.prefix + segments[position] + self.suffix
+
+        return self.rendered
+
+
+    def render_values (self, values, rendered=None):
+        """
+        Render every item with its original value, except the primitives listed in values.
+
+        :type  values:   Dictionary
+        :param values:   id() of a primitive to the value to render it with
+        :type  rendered: Dictionary
+        :param rendered: (Optional, def=None) id() of a block to its rendered bytes, shared by a whole request render
+                         so that size and checksum fields do not render the blocks they cover twice
+
+        :rtype:  Raw
+        :returns: Rendered block
+        """
+
+        if rendered is None:
+            rendered = {}
+
+        if id(self) in rendered:
+            return rendered[id(self)]
+
+        segments = []
+
+        for item in self.stack:
+            if isinstance(item, (block, calculated)):
+                segments.append(item.render_values(values, rendered))
+            else:
+                segments.append(item.render_value(values.get(id(item), item.original_value)))
+
+        rendered[id(self)] = "".join(segments)
+
+        return rendered[id(self)]
+
+
+class request (block):
+    """
+    Top level block of a message. Primitives and blocks are pushed in render order, a pushed block collects everything
+    pushed after it until it is popped.
+    """
+
+    def __init__ (self, name):
+        """
+        :type  name: String
+        :param name: Name of the request
+        """
+
+        super(request, self).__init__(name, self)
+
+        self.names        = {}     # named primitives and blocks of the request.
+        self.block_stack  = []     # blocks currently open, innermost last.
+        self.mutant_index = 0      # number of the next test case mutate() moves to.
+        self.mutated      = []     # primitives mutate() moved away from their original value.
+
+
+    def push (self, item):
+        """
+        Add a primitive or block to the innermost open block, or to the request itself. Pushed blocks stay open until
+        pop() is called.
+
+        :type  item: primitive or block
+        :param item: Item to add
+        """
+
+        if item.name is not None:
+            if item.name in self.names:
+                raise ValueError("the name %s is already used in request %s" % (item.name, self.name))
+
+            self.names[item.name] = item
+
+        if self.block_stack:
+            self.block_stack[-1].push(item)
+        else:
+            super(request, self).push(item)
+
+        # the counts of every enclosing block change along.
+        for open_block in self.block_stack:
+            open_block.starts = None
+
+        self.starts = None
+
+        if isinstance(item, block):
+            self.block_stack.append(item)
+
+
+    def pop (self):
+        """
+        Close the innermost open block.
+        """
+
+        if not self.block_stack:
+            raise IndexError("no block is open in request %s" % self.name)
+
+        self.block_stack.pop()
+
+
+    def locate (self, index, pins=None):
+        """
+        Resolve a test case number of the request down to the primitive it mutates.
+
+        :type  index: Integer
+        :param index: Test case number, 0 <= index < num_mutations()
+        :type  pins:  List
+        :param pins:  (Optional, def=None) List the (group primitive, value) pairs the test case pins are appended to
+
+        :rtype:  Tuple
+        :returns: (primitive, mutation index of that primitive)
+        """
+
+        if not 0 <= index < self.num_mutations():
+            raise IndexError("test case %d out of range" % index)
+
+        if pins is None:
+            pins = []
+
+        return super(request, self).locate(index, pins)
+
+
+    def mutation_values (self, index):
+        """
+        The values test case number index renders its pinned groups and its mutated primitive with, the mutation
+        itself last.
+
+        :rtype:  List
+        :returns: (primitive, value) pairs
+        """
+
+        pins             = []
+        primitive, local = self.locate(index, pins)
+
+        return pins + [(primitive, primitive.value_at(local))]
+
+
+    def mutation_at (self, index):
+        """
+        Render test case number index directly, without stepping through the preceding test cases and without touching
+        the mutate() state.
+
+        :type  index: Integer
+        :param index: Test case number, 0 <= index < num_mutations()
+
+        :rtype:  Raw
+        :returns: Rendered test case
+        """
+
+        values = dict((id(primitive), value) for primitive, value in self.mutation_values(index))
+
+        return self.render_values(values)
+
+
+    def mutate (self):
+        """
+        Move to the next test case, return False once they are exhausted and every primitive is back to its original
+        value.
+
+        :rtype:  Boolean
+        :returns: True on success, False otherwise.
+        """
+
+        if self.mutant_index >= self.num_mutations():
+            self.assign([])
+            return False
+
+        self.assign(self.mutation_values(self.mutant_index))
+        self.mutant_index += 1
+
+        return True
+
+
+    def reset (self):
+        """
+        Go back to the first test case, restoring every primitive to its original value.
+        """
+
+        self.assign([])
+        self.mutant_index = 0
+
+
+    def skip_to (self, index):
+        """
+        Move straight to test case number index, leaving the request as index + 1 calls to mutate() from a reset would
+        have. The test case is resolved arithmetically, see locate(), none of the test cases before it are stepped
+        through.
+
+        :type  index: Integer
+        :param index: Test case number, 0 <= index < num_mutations()
+        """
+
+        self.assign(self.mutation_values(index))
+        self.mutant_index = index + 1
+
+
+    def checkpoint (self):
+        """
+        Capture the position of the request in its test cases. The values of every primitive follow from it, so the
+        snapshot is a single integer.
+
+        :rtype:  Integer
+        :returns: Snapshot, to be given back to restore()
+        """
+
+        return self.mutant_index
+
+
+    def restore (self, state):
+        """
+        Go back to a position captured by checkpoint(), in O(depth) steps.
+
+        :type  state: Integer
+        :param state: Snapshot returned by checkpoint()
+        """
+
+        if not state:
+            self.reset()
+        elif state > self.num_mutations():
+            raise IndexError("test case %d out of range" % (state - 1))
+        else:
+            self.skip_to(state - 1)
+
+
+    def assign (self, values):
+        """
+        Give primitives the values of a test case, putting those mutated for the previous one back to their original
+        value. Only the primitives whose value changes are flagged dirty, a group pinned to the same value for a whole
+        block of test cases is not rendered again.
+
+        :type  values: List
+        :param values: (primitive, value) pairs of the test case
+        """
+
+        assigned = dict((id(primitive), value) for primitive, value in values)
+
+        for primitive in self.mutated:
+            if id(primitive) not in assigned and primitive.value is not primitive.original_value:
+                primitive.value = primitive.original_value
+                primitive.dirty = True
+
+        for primitive, value in values:
+            if primitive.value is not value:
+                primitive.value = value
+                primitive.dirty = True
+
+        self.mutated = [primitive for primitive, value in values]
+
+
+class calculated (object):
+    """
+    Base for the fields whose value is calculated from the rendered bytes of a block, such as sizes and checksums.
+
+    The calculation is cached against the identity of the bytes the block last rendered, blocks render incrementally
+    and hand the very same object back until one of their items changes, so a field covering an unchanged block costs
+    an identity check per test case.
+
+    When fuzzable, the mutations replace the calculated value with the fuzz library of the underlying bit field.
+    """
+
+    # calculated fields depend on another block, enclosing blocks always ask them to render.
+    dirty = True
+
+    def __init__ (self, block_name, request, field, fuzzable, name):
+        """
+        :type  block_name: String
+        :param block_name: Name of the block the field is calculated from
+        :type  request:    request
+        :param request:    Request the block belongs to
+        :type  field:      bit_field
+        :param field:      Bit field rendering the calculated value
+        :type  fuzzable:   Boolean
+        :param fuzzable:   Enable/disable fuzzing of the field
+        :type  name:       String
+        :param name:       Specifying a name gives you direct access to the field
+        """
+
+        self.block_name     = block_name
+        self.request        = request
+        self.field          = field
+        self.fuzzable       = fuzzable
+        self.name           = name
+
+        self.value          = None  # fuzzed value, None while the field renders its calculated value.
+        self.original_value = None
+        self.rendered       = ""
+        self.covered        = None  # rendered bytes of the block the cached calculation was made over.
+        self.calculated     = None  # cached calculation.
+        self.busy           = False # raised while rendering the covered block, to catch a field covering itself.
+
+
+    def target (self):
+        """
+        :rtype:  block
+        :returns: The block this field is calculated from
+        """
+
+        try:
+            return self.request.names[self.block_name]
+        except KeyError:
+            raise KeyError("%s refers to an unknown block: %s" % (type(self).__name__, self.block_name))
+
+
+    def covered_bytes (self, render):
+        """
+        Render the covered block through the given callable, refusing to recurse into a field covering itself.
+        """
+
+        if self.busy:
+            raise ValueError("%s can not be part of the block %s it is calculated from" % \
+                (type(self).__name__, self.block_name))
+
+        self.busy = True
+
+        try:
+            return render()
+        finally:
+            self.busy = False
+
+
+    def calculate (self, target, data):
+        """
+        Calculate the value of the field. Overridden by sizes and checksums.
+
+        :type  target: block
+        :param target: Covered block, whose incremental render state may be used to speed the calculation up
+        :type  data:   Raw
+        :param data:   Rendered bytes of the covered block
+
+        :rtype:  Integer or Raw
+        :returns: Calculated value
+        """
+
+        raise NotImplementedError
+
+
+    def render_calculated (self, value):
+        """
+        Render a calculated value, through the bit field by default.
+        """
+
+        return self.field.render_value(value)
+
+
+    def num_mutations (self):
+        """
+        :rtype:  Integer
+        :returns: Number of fuzz values of the underlying bit field
+        """
+
+        return self.field.num_mutations()
+
+
+    def value_at (self, index):
+        return self.field.value_at(index)
+
+
+    def render (self):
+        """
+        Render the fuzzed value if there is one, the calculated value otherwise. The rendered bytes are only replaced
+        when they change, so that enclosing blocks keep their cached render.
+
+        :rtype:  Raw
+        :returns: Rendered field
+        """
+
+        if self.value is not None:
+            rendered = self.field.render_value(self.value)
+        else:
+            target = self.target()
+            data   = self.covered_bytes(target.render)
+
+            if data is not self.covered:
+                self.calculated = self.calculate(target, data)
+                self.covered    = data
+
+            rendered = self.render_calculated(self.calculated)
+
+        if rendered != self.rendered:
+            self.rendered = rendered
+
+        return self.rendered
+
+
+    def render_values (self, values, rendered):
+        """
+        Render the field for a test case, see block.render_values().
+        """
+
+        if id(self) in values:
+            return self.field.render_value(values[id(self)])
+
+        target = self.target()
+        data   = self.covered_bytes(lambda: target.render_values(values, rendered))
+
+        # no incremental state matches these bytes, calculate from scratch.
+        return self.render_calculated(self.calculate(None, data))
+
+
+class size (calculated):
+    """
+    Length of a block, rendered as a bit field.
+    """
+
+    def __init__ (self, block_name, request, offset=0, length=4, endian="<", format="binary", inclusive=False,
+                  signed=False, math=None, fuzzable=False, name=None):
+        """
+        :type  block_name: String
+        :param block_name: Name of the block to measure
+        :type  request:    request
+        :param request:    Request the block belongs to
+        :type  offset:     Integer
+        :param offset:     (Optional, def=0) Offset added to the calculated size
+        :type  length:     Integer
+        :param length:     (Optional, def=4) Length of the size field, in bytes
+        :type  endian:     Character
+        :param endian:     (Optional, def=LITTLE_ENDIAN) Endianess of the bit field (LITTLE_ENDIAN: <, BIG_ENDIAN: >)
+        :type  format:     String
+        :param format:     (Optional, def=binary) Output format, "binary" or "ascii"
+        :type  inclusive:  Boolean
+        :param inclusive:  (Optional, def=False) Whether the size counts the size field itself
+        :type  signed:     Boolean
+        :param signed:     (Optional, def=False) Make size signed vs. unsigned (applicable only with format="ascii")
+        :type  math:       Function
+        :param math:       (Optional, def=None) Function applied to the size before it is rendered
+        :type  fuzzable:   Boolean
+        :param fuzzable:   (Optional, def=False) Enable/disable fuzzing of this size
+        :type  name:       String
+        :param name:       (Optional, def=None) Specifying a name gives you direct access to the size
+        """
+
+        field = bit_field(0, length * 8, endian=endian, format=format, signed=signed)
+
+        super(size, self).__init__(block_name, request, field, fuzzable, name)
+
+        self.offset    = offset
+        self.length    = length
+        self.inclusive = inclusive
+        self.math      = math
+        self.s_type    = "size"
+
+
+    def calculate (self, target, data):
+        calculated = len(data) + self.offset
+
+        if self.inclusive:
+            calculated += self.length
+
+        if self.math is not None:
+            calculated = self.math(calculated)
+
+        return calculated
+
+
+# checksums which may be updated from a running value: (function, combine function). combine functions merge the
+# checksums of two adjacent pieces of data given the checksum of each one and the length of the second.
+running_checksums = {}
+
+# checksums provided by hashlib, rendered as raw digests.
+digests = ("md5", "sha1")
+
+# CRC-32 polynomial, reversed, as used by zlib.
+CRC32_POLYNOMIAL = 0xEDB88320
+
+# operators appending 2^k zero bytes to a CRC-32, as lists of 32 columns over GF(2). built on first use.
+crc32_operators = []
+
+# operators appending a given number of zero bytes, keyed on the number. only a handful of suffix lengths are ever in
+# use at once, the cache is emptied when it grows past CRC32_SHIFTS entries.
+crc32_shifts = {}
+CRC32_SHIFTS = 64
+
+# suffixes shorter than this are cheaper to checksum again, in C, than to shift a checksum over in Python.
+COMBINE_THRESHOLD = 64 * 1024
+
+
+def gf2_times (operator, vector):
+    """
+    Multiply a 32x32 GF(2) matrix, given as a list of columns, by a 32-bit vector.
+    """
+
+    total = 0
+    index = 0
+
+    while vector:
+        if vector & 1:
+            total ^= operator[index]
+
+        vector >>= 1
+        index  += 1
+
+    return total
+
+
+def crc32_shift (length):
+    """
+    Operator appending length zero bytes to a CRC-32 register, composed out of the power of two operators.
+
+    :rtype:  List
+    :returns: 32 columns of the operator
+    """
+
+    if length in crc32_shifts:
+        return crc32_shifts[length]
+
+    if not crc32_operators:
+        # one zero bit, then squared three times for one zero byte.
+        operator = [CRC32_POLYNOMIAL] + [1 << bit for bit in range(31)]
+
+        for _ in range(3):
+            operator = [gf2_times(operator, column) for column in operator]
+
+        crc32_operators.append(operator)
+
+    shift = [1 << bit for bit in range(32)]
+    power = 0
+
+    while length >> power:
+        while power >= len(crc32_operators):
+            operator = crc32_operators[-1]
+            crc32_operators.append([gf2_times(operator, column) for column in operator])
+
+        if (length >> power) & 1:
+            shift = [gf2_times(crc32_operators[power], column) for column in shift]
+
+        power += 1
+
+    if len(crc32_shifts) >= CRC32_SHIFTS:
+        crc32_shifts.clear()
+
+    crc32_shifts[length] = shift
+
+    return shift
+
+
+def crc32_combine (first, second, length):
+    """
+    CRC-32 of two concatenated pieces of data, from the CRC-32 of each piece, like zlib's crc32_combine().
+
+    :type  first:  Integer
+    :param first:  CRC-32 of the first piece
+    :type  second: Integer
+    :param second: CRC-32 of the second piece
+    :type  length: Integer
+    :param length: Length of the second piece
+
+    :rtype:  Integer
+    :returns: Unsigned CRC-32 of the concatenation
+    """
+
+    if not length:
+        return first
+
+    return gf2_times(crc32_shift(length), first) ^ second
+
+
+ADLER32_BASE = 65521
+
+
+def adler32_combine (first, second, length):
+    """
+    Adler-32 of two concatenated pieces of data, from the Adler-32 of each piece, like zlib's adler32_combine().
+
+    :type  first:  Integer
+    :param first:  Adler-32 of the first piece
+    :type  second: Integer
+    :param second: Adler-32 of the second piece
+    :type  length: Integer
+    :param length: Length of the second piece
+
+    :rtype:  Integer
+    :returns: Unsigned Adler-32 of the concatenation
+    """
+
+    remainder = length % ADLER32_BASE
+    sum1      = first & 0xFFFF
+    sum2      = (remainder * sum1) % ADLER32_BASE
+
+    sum1 += (second & 0xFFFF) + ADLER32_BASE - 1
+    sum2 += ((first >> 16) & 0xFFFF) + ((second >> 16) & 0xFFFF) + ADLER32_BASE - remainder
+
+    return (sum1 % ADLER32_BASE) | ((sum2 % ADLER32_BASE) << 16)
+
+
+running_checksums["crc32"]   = (zlib.crc32, crc32_combine)
+running_checksums["adler32"] = (zlib.adler32, adler32_combine)
+
+
+class checksum (calculated):
+    """
+    Checksum of a block: crc32 and adler32, rendered as a 32-bit field, or md5 and sha1, rendered as raw digests.
+
+    When the covered block changed in a single item since its previous render, only the bytes from that item on are
+    processed: the running checksum over the unchanged prefix is kept, crc32 and adler32 then combine in the checksum of
+    the unchanged suffix as well, while md5 and sha1 resume from a copy of the hash of the prefix.
+    """
+
+    def __init__ (self, block_name, request, algorithm="crc32", endian="<", fuzzable=False, name=None):
+        """
+        :type  block_name: String
+        :param block_name: Name of the block to checksum
+        :type  request:    request
+        :param request:    Request the block belongs to
+        :type  algorithm:  String
+        :param algorithm:  (Optional, def=crc32) Checksum algorithm: crc32, adler32, md5 or sha1
+        :type  endian:     Character
+        :param endian:     (Optional, def=LITTLE_ENDIAN) Endianess of crc32 and adler32 checksums
+        :type  fuzzable:   Boolean
+        :param fuzzable:   (Optional, def=False) Enable/disable fuzzing of this checksum
+        :type  name:       String
+        :param name:       (Optional, def=None) Specifying a name gives you direct access to the checksum
+        """
+
+        if algorithm not in running_checksums and algorithm not in digests:
+            raise ValueError("unsupported checksum algorithm: %s" % algorithm)
+
+        if algorithm in digests:
+            length = hashlib.new(algorithm).digest_size
+        else:
+            length = 4
+
+        super(checksum, self).__init__(block_name, request, bit_field(0, length * 8, endian=endian), fuzzable, name)
+
+        self.algorithm = algorithm
+        self.s_type    = "checksum"
+        self.state     = None   # (prefix, suffix, prefix state, suffix state) of the covered block's current hole.
+
+
+    def render_calculated (self, value):
+        if self.algorithm in digests:
+            return value
+
+        return self.field.render_value(value)
+
+
+    def calculate (self, target, data):
+        # the single item which changed, and the bytes on either side of it, are only known for the render the block
+        # just did.
+        if target is None or target.hole is None or target.rendered is not data:
+            return self.checksum(data)
+
+        prefix, suffix = target.prefix, target.suffix
+        changed        = target.segments[target.hole]
+
+        if self.state is None or self.state[0] is not prefix or self.state[1] is not suffix:
+            if self.algorithm in digests:
+                self.state = (prefix, suffix, hashlib.new(self.algorithm, prefix), None)
+            else:
+                function   = running_checksums[self.algorithm][0]
+                self.state = (prefix, suffix, function(prefix), function(suffix) & 0xFFFFFFFF)
+
+        if self.algorithm in digests:
+            running = self.state[2].copy()
+            running.update(changed)
+            running.update(suffix)
+
+            return running.digest()
+
+        function, combine = running_checksums[self.algorithm]
+        running           = function(changed, self.state[2])
+
+        if len(suffix) < COMBINE_THRESHOLD:
+            return function(suffix, running) & 0xFFFFFFFF
+
+        return combine(running & 0xFFFFFFFF, self.state[3], len(suffix))
+
+
+    def checksum (self, data):
+        """
+        Checksum data from scratch.
+        """
+
+        if self.algorithm in digests:
+            return hashlib.new(self.algorithm, data).digest()
+
+        return running_checksums[self.algorithm][0](data) & 0xFFFFFFFF
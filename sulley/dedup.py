@@ -0,0 +1,227 @@
+import hashlib
+import math
+import struct
+
+
+def fingerprint (data):
+    """
+    Fixed-size fingerprint of rendered bytes: the first 64 bits of their MD5, as a signed integer so that it stays a
+    machine sized int on 64-bit interpreters.
+
+    :type  data: Raw
+    :param data: Rendered bytes
+
+    :rtype:  Integer
+    :returns: Fingerprint
+    """
+
+    return struct.unpack("<q", hashlib.md5(data).digest()[:8])[0]
+
+
+class fingerprint_set (object):
+    """
+    Exact record of the renders seen so far, keeping a 64-bit fingerprint rather than the bytes themselves. Distinct
+    renders only become likely to collide on their fingerprint, the later one being skipped as a duplicate, past
+    billions of them.
+    """
+
+    def __init__ (self):
+        self.fingerprints = set()
+
+
+    def add (self, data):
+        """
+        Record a render.
+
+        :type  data: Raw
+        :param data: Rendered bytes
+
+        :rtype:  Boolean
+        :returns: True if the render had not been seen before, False otherwise
+        """
+
+        key = fingerprint(data)
+
+        if key in self.fingerprints:
+            return False
+
+        self.fingerprints.add(key)
+        return True
+
+
+    def clear (self):
+        self.fingerprints.clear()
+
+
+    def __contains__ (self, data):
+        return fingerprint(data) in self.fingerprints
+
+
+    def __len__ (self):
+        return len(self.fingerprints)
+
+
+class bloom_filter (object):
+    """
+    Record of the renders seen so far in a fixed amount of memory, sized for an expected number of renders. A render
+    never seen before is taken for a duplicate with a probability of error_rate once capacity renders were added, and
+    more often past that, so a new test case is occasionally skipped. A duplicate is never taken for a new render.
+    """
+
+    def __init__ (self, capacity=10 * 1000 * 1000, error_rate=0.0001):
+        """
+        :type  capacity:   Integer
+        :param capacity:   (Optional, def=10M) Expected number of distinct renders
+        :type  error_rate: Float
+        :param error_rate: (Optional, def=0.0001) Chance of a new render being taken for a duplicate at capacity
+        """
+
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("a bloom filter needs a positive capacity and an error rate between 0 and 1")
+
+        self.capacity   = capacity
+        self.error_rate = error_rate
+        self.num_bits   = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(float(self.num_bits) / capacity * math.log(2))))
+        self.bits       = bytearray((self.num_bits + 7) // 8)
+        self.count      = 0    # renders added which were not already in the filter.
+
+
+    def positions (self, data):
+        """
+        Generate the bit positions of a render, by double hashing the two halves of its fingerprint.
+        """
+
+        key    = fingerprint(data)
+        first  = key & 0xFFFFFFFF
+        second = key >> 32 & 0xFFFFFFFF | 1    # an odd step keeps the positions apart whatever the number of bits.
+
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+
+    def add (self, data):
+        """
+        Record a render.
+
+        :type  data: Raw
+        :param data: Rendered bytes
+
+        :rtype:  Boolean
+        :returns: True if the render had not been seen before, False if it was, or was taken for one that was
+        """
+
+        bits  = self.bits
+        added = False
+
+        for position in self.positions(data):
+            mask = 1 << (position & 7)
+
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+
+        self.count += added
+        return added
+
+
+    def clear (self):
+        self.bits  = bytearray(len(self.bits))
+        self.count = 0
+
+
+    def __contains__ (self, data):
+        for position in self.positions(data):
+            if not self.bits[position >> 3] & 1 << (position & 7):
+                return False
+
+        return True
+
+
+    def __len__ (self):
+        return self.count
+
+
+class dedup (object):
+    """
+    Filter a mutation stream, skipping the mutations which render the same bytes as one produced before. Wraps anything
+    with the mutate()/render()/reset() interface, a single primitive or a whole request, and is used in its place:
+
+        unique = dedup(req)
+
+        while unique.mutate():
+            send(unique.render())
+
+    Skipped mutations still advance the wrapped object, the test case numbers of a request stay its own. Passing the
+    same fingerprint store to the filters of several primitives or requests deduplicates across all of them.
+    """
+
+    def __init__ (self, mutable, seen=None, original=True):
+        """
+        :type  mutable:  primitive or request
+        :param mutable:  Primitive or request to filter the mutations of
+        :type  seen:     fingerprint_set or bloom_filter
+        :param seen:     (Optional, def=fingerprint_set()) Record of the renders seen so far
+        :type  original: Boolean
+        :param original: (Optional, def=True) Also skip the mutations rendering like the original value
+        """
+
+        self.mutable    = mutable
+        self.seen       = seen if seen is not None else fingerprint_set()
+        self.original   = original
+        self.started    = False    # whether the original render was recorded for this pass.
+        self.unique     = 0        # mutations let through.
+        self.duplicates = 0        # mutations skipped.
+
+
+    def mutate (self):
+        """
+        Move the wrapped object to its next mutation which renders differently from all the previous ones.
+
+        :rtype:  Boolean
+        :returns: True on success, False once the mutations are exhausted
+        """
+
+        mutable = self.mutable
+        seen    = self.seen
+
+        if not self.started:
+            self.started = True
+
+            if self.original:
+                seen.add(mutable.render())
+
+        while mutable.mutate():
+            if seen.add(mutable.render()):
+                self.unique += 1
+                return True
+
+            self.duplicates += 1
+
+        return False
+
+
+    def render (self):
+        return self.mutable.render()
+
+
+    def reset (self):
+        """
+        Go back to the first mutation, forgetting the renders seen so far.
+        """
+
+        self.mutable.reset()
+        self.seen.clear()
+
+        self.started    = False
+        self.unique     = 0
+        self.duplicates = 0
+
+
+    def num_mutations (self):
+        """
+        :rtype:  Integer
+        :returns: Number of mutations of the wrapped object, an upper bound of those the filter lets through
+        """
+
+        return self.mutable.num_mutations()
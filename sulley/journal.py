@@ -0,0 +1,477 @@
+import bisect
+import mmap
+import os
+import struct
+import sys
+import time
+
+from .blocks import block
+from .dedup import fingerprint
+
+# a journal is laid out as:
+#
+#     MAGIC | HEADER: (test cases of the request, path count) | request name | primitives ... | records ...
+#
+# with every primitive stored as its path followed by a SEEDED flag and, when it is set, the primitive's seed. the name,
+# paths and seeds are stored as a little endian 16-bit length followed by the bytes. records have a fixed size and are
+# only ever appended, so a journal cut short by a crash loses at most the record being written and record number n is
+# found at a known offset.
+MAGIC  = "SULJRNL\x02"
+HEADER = struct.Struct("<QL")
+LENGTH = struct.Struct("<H")
+SEEDED = struct.Struct("<B")
+
+# test case number, primitive (position in the path table), mutation index of the primitive, seed fingerprint, unix
+# time, fingerprint of the rendered test case.
+RECORD = struct.Struct("<QLQqdq")
+
+# test case numbers of a block of consecutive records, skipping the rest of each record.
+NUMBERS = 4096
+BLOCK   = struct.Struct("<" + ("Q%dx" % (RECORD.size - 8)) * NUMBERS)
+
+
+def primitive_paths (container, prefix=None):
+    """
+    Path of every primitive of a request, in render order: the names of the enclosing blocks and of the primitive,
+    joined with '/'. Unnamed primitives go by their type and position within their block, ie: login/string[2].
+
+    :type  container: request
+    :param container: Request, or block when called on the blocks of a request
+    :type  prefix:    String
+    :param prefix:    (Optional, def=name of the container) Path of the container
+
+    :rtype:  List
+    :returns: (path, primitive) pairs
+    """
+
+    if prefix is None:
+        prefix = container.name
+
+    paths = []
+
+    for position, item in enumerate(container.stack):
+        if item.name is not None:
+            path = "%s/%s" % (prefix, item.name)
+        else:
+            path = "%s/%s[%d]" % (prefix, type(item).__name__, position)
+
+        # blocks render their items in place, depth first.
+        if isinstance(item, block):
+            paths.extend(primitive_paths(item, path))
+        else:
+            paths.append((path, item))
+
+    return paths
+
+
+def primitive_seed (primitive):
+    """
+    Seed of a primitive as it is journaled, None for primitives without one. Seeded primitives derive their mutations
+    from the seed's string form, which regenerates them as well as the seed itself.
+    """
+
+    seed = getattr(primitive, "seed", None)
+
+    if seed is None:
+        return None
+
+    return str(seed)
+
+
+def seed_fingerprint (seed):
+    """
+    Fingerprint of a journaled seed, 0 for None. Every record carries the fingerprint of its primitive's seed, to
+    verify the seed stored in the header against.
+    """
+
+    if seed is None:
+        return 0
+
+    return fingerprint(seed)
+
+
+def pack_string (value):
+    return LENGTH.pack(len(value)) + value
+
+
+def pack_primitive (path, seed):
+    if seed is None:
+        return pack_string(path) + SEEDED.pack(0)
+
+    return pack_string(path) + SEEDED.pack(1) + pack_string(seed)
+
+
+class entry (object):
+    """
+    A journal record, the coordinates of one test case.
+    """
+
+    __slots__ = ("position", "number", "primitive", "path", "mutant_index", "seed", "seed_fingerprint", "timestamp",
+                 "fingerprint")
+
+    def __init__ (self, position, record, paths, seeds):
+        number, primitive, mutant_index, seed, timestamp, rendered = record
+
+        self.position         = position         # position of the record in the journal.
+        self.number           = number           # test case number within the request.
+        self.primitive        = primitive        # position of the mutated primitive in the path table.
+        self.path             = paths[primitive] # path of the mutated primitive.
+        self.mutant_index     = mutant_index     # mutation index of the primitive.
+        self.seed             = seeds[primitive] # seed of the primitive, None if it has none.
+        self.seed_fingerprint = seed             # fingerprint of the seed, recorded along with the test case.
+        self.timestamp        = timestamp        # unix time the test case was recorded at.
+        self.fingerprint      = rendered         # fingerprint of the rendered test case.
+
+
+class journal_writer (object):
+    """
+    Append-only journal of the test cases of a request. Rather than their rendered bytes, which can reach megabytes
+    apiece, it records the coordinates needed to regenerate each test case, 44 bytes per test case after a header
+    holding the primitive paths and seeds.
+
+    Reopening an existing journal appends to it, provided it was written for a request with the same test cases,
+    primitives and seeds.
+    """
+
+    def __init__ (self, path, request):
+        """
+        :type  path:    String
+        :param path:    Path of the journal file
+        :type  request: request
+        :param request: Request whose test cases are recorded
+        """
+
+        self.path    = path
+        self.request = request
+        self.paths   = primitive_paths(request)
+        self.ids     = dict((id(primitive), position) for position, (name, primitive) in enumerate(self.paths))
+
+        header = MAGIC + HEADER.pack(request.num_mutations(), len(self.paths)) + pack_string(request.name) + \
+                 "".join([pack_primitive(name, primitive_seed(primitive)) for name, primitive in self.paths])
+
+        if os.path.exists(path) and os.path.getsize(path):
+            fh = open(path, "rb")
+
+            try:
+                existing = fh.read(len(header))
+            finally:
+                fh.close()
+
+            if existing != header:
+                raise ValueError("%s is not a journal of request %s as currently defined" % (path, request.name))
+
+            # drop any record a crash left half written.
+            records = (os.path.getsize(path) - len(header)) // RECORD.size
+
+            self.fh = open(path, "ab")
+            self.fh.truncate(len(header) + records * RECORD.size)
+        else:
+            self.fh = open(path, "wb")
+            self.fh.write(header)
+
+
+    def record (self, number, rendered):
+        """
+        Append a test case to the journal.
+
+        :type  number:   Integer
+        :param number:   Test case number within the request
+        :type  rendered: Raw
+        :param rendered: Rendered test case
+        """
+
+        primitive, mutant_index = self.request.locate(number)
+
+        self.fh.write(RECORD.pack(number, self.ids[id(primitive)], mutant_index,
+                                  seed_fingerprint(primitive_seed(primitive)), time.time(), fingerprint(rendered)))
+
+
+    def flush (self):
+        self.fh.flush()
+
+
+    def close (self):
+        self.fh.close()
+
+
+class journal (object):
+    """
+    Read-only view of a journal. The file is memory mapped, records are decoded on access and looked up by test case
+    number in O(1) when the test cases were recorded in a contiguous run, O(log n) when they were recorded in
+    increasing order with gaps, ie: after deduplication. A journal appended to by several runs is searched run by run,
+    the latest run first.
+    """
+
+    def __init__ (self, path):
+        """
+        :type  path: String
+        :param path: Path of the journal file
+        """
+
+        self.path = path
+
+        fh = open(path, "rb")
+
+        try:
+            self.map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            fh.close()
+
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError("%s is not a journal" % path)
+
+        offset                 = len(MAGIC)
+        self.total, path_count = HEADER.unpack_from(self.map, offset)
+        offset                += HEADER.size
+
+        self.name, offset = self.unpack_string(offset)     # name of the request.
+        self.paths        = []                             # path of every primitive of the request.
+        self.seeds        = []                             # seed of every primitive, None for those without one.
+
+        for _ in range(path_count):
+            path, offset = self.unpack_string(offset)
+            seeded       = SEEDED.unpack_from(self.map, offset)[0]
+            offset      += SEEDED.size
+            seed         = None
+
+            if seeded:
+                seed, offset = self.unpack_string(offset)
+
+            self.paths.append(path)
+            self.seeds.append(seed)
+
+        self.records = offset        # offset of the first record.
+        self.length  = (len(self.map) - offset) // RECORD.size
+        self.starts  = None          # first position of every run of increasing test case numbers, found on lookup.
+
+
+    def unpack_string (self, offset):
+        """
+        :rtype:  Tuple
+        :returns: (string stored at offset, offset just past it)
+        """
+
+        length  = LENGTH.unpack_from(self.map, offset)[0]
+        offset += LENGTH.size
+
+        return self.map[offset:offset + length], offset + length
+
+
+    def close (self):
+        self.map.close()
+
+
+    def __len__ (self):
+        return self.length
+
+
+    def __getitem__ (self, position):
+        if position < 0:
+            position += self.length
+
+        if not 0 <= position < self.length:
+            raise IndexError("journal index out of range")
+
+        return entry(position, RECORD.unpack_from(self.map, self.records + position * RECORD.size), self.paths,
+                     self.seeds)
+
+
+    def __iter__ (self):
+        for position in range(self.length):
+            yield self[position]
+
+
+    def number_at (self, position):
+        return struct.unpack_from("<Q", self.map, self.records + position * RECORD.size)[0]
+
+
+    def runs (self):
+        """
+        Split the records into runs of increasing test case numbers, a journal written by a single run holding just
+        one. The test case numbers are read a block at a time, on the first call only.
+
+        :rtype:  List
+        :returns: (start, end) positions of every run, in journal order
+        """
+
+        if self.starts is None:
+            self.starts = [0]
+            previous    = None
+            position    = 0
+
+            while position < self.length:
+                count = min(NUMBERS, self.length - position)
+                where = self.records + position * RECORD.size
+
+                if count == NUMBERS:
+                    numbers = BLOCK.unpack_from(self.map, where)
+                else:
+                    numbers = struct.unpack_from("<" + ("Q%dx" % (RECORD.size - 8)) * count, self.map, where)
+
+                for offset, number in enumerate(numbers):
+                    if previous is not None and number <= previous:
+                        self.starts.append(position + offset)
+
+                    previous = number
+
+                position += count
+
+        return list(zip(self.starts, self.starts[1:] + [self.length]))
+
+
+    def lookup (self, number):
+        """
+        Find the record of a test case.
+
+        :type  number: Integer
+        :param number: Test case number
+
+        :rtype:  entry
+        :returns: Record of the test case, the latest one if it was recorded more than once
+
+        :raises KeyError: If the test case is not in the journal
+        """
+
+        if not self.length:
+            raise KeyError(number)
+
+        positions = positions_view(self)
+
+        for start, end in reversed(self.runs()):
+            # contiguous run of test cases: the record sits at a known position.
+            position = start + number - self.number_at(start)
+
+            if start <= position < end and self.number_at(position) == number:
+                return self[position]
+
+            # increasing test case numbers with gaps: binary search.
+            position = bisect.bisect_right(positions, number, start, end) - 1
+
+            if position >= start and self.number_at(position) == number:
+                return self[position]
+
+        raise KeyError(number)
+
+
+class positions_view (object):
+    """
+    The test case numbers of a journal's records, as a sequence bisect can search without decoding whole records.
+    """
+
+    def __init__ (self, journal):
+        self.journal = journal
+
+
+    def __len__ (self):
+        return self.journal.length
+
+
+    def __getitem__ (self, position):
+        return self.journal.number_at(position)
+
+
+def replay (request, record):
+    """
+    Regenerate the rendered bytes of a recorded test case. A seeded primitive regenerates its mutation from the seed
+    stored in the journal, whatever seed the request was built with.
+
+    :type  request: request
+    :param request: Request the journal was written for, built the same way, seeds aside
+    :type  record:  entry
+    :param record:  Journal record of the test case
+
+    :rtype:  Raw
+    :returns: Rendered test case
+
+    :raises ValueError: If the request does not regenerate the test case that was recorded
+    """
+
+    primitive, mutant_index = request.locate(record.number)
+    seed                    = getattr(primitive, "seed", None)
+
+    if record.seed is not None and primitive_seed(primitive) != record.seed:
+        primitive.seed = record.seed
+
+        try:
+            rendered = request.mutation_at(record.number)
+        finally:
+            primitive.seed = seed
+    else:
+        rendered = request.mutation_at(record.number)
+
+    if mutant_index != record.mutant_index or seed_fingerprint(record.seed) != record.seed_fingerprint or \
+       fingerprint(rendered) != record.fingerprint:
+        raise ValueError("test case %d of %s does not match its journal record" % (record.number, request.name))
+
+    return rendered
+
+
+def load_factory (spec):
+    """
+    Import the function building a request, given as module:function.
+    """
+
+    module, function = spec.split(":", 1)
+
+    # __import__() returns the top level package, the module itself is found in sys.modules.
+    __import__(module)
+
+    return getattr(sys.modules[module], function)
+
+
+def main (argv=None):
+    """
+    Command line journal tool:
+
+        python -m sulley.journal show journal [number ...]
+        python -m sulley.journal replay journal module:function number [--output FILE]
+
+    show lists the records of the given test cases, or of the whole journal. replay rebuilds the request with the
+    given function and writes the exact bytes of a test case, to stdout by default.
+    """
+
+    import optparse
+
+    parser = optparse.OptionParser(usage="%prog show journal [number ...]\n"
+                                         "       %prog replay journal module:function number [--output FILE]")
+    parser.add_option("--output", help="write the replayed test case to this file rather than to stdout")
+
+    options, args = parser.parse_args(argv)
+
+    if len(args) < 2 or args[0] not in ("show", "replay") or (args[0] == "replay" and len(args) != 4):
+        parser.error("expected show or replay and their arguments")
+
+    recorded = journal(args[1])
+
+    try:
+        if args[0] == "show":
+            records = [recorded.lookup(int(number)) for number in args[2:]] if args[2:] else recorded
+
+            for record in records:
+                sys.stdout.write("%10d  %-40s %8d  %016x  %s\n" % (record.number, record.path, record.mutant_index,
+                                 record.fingerprint & 0xFFFFFFFFFFFFFFFF,
+                                 time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.timestamp))))
+
+            return 0
+
+        request  = load_factory(args[2])()
+        rendered = replay(request, recorded.lookup(int(args[3])))
+    except KeyError as error:
+        sys.stderr.write("test case %s is not in %s\n" % (error.args[0], args[1]))
+        return 1
+    finally:
+        recorded.close()
+
+    if options.output:
+        fh = open(options.output, "wb")
+        fh.write(rendered)
+        fh.close()
+    else:
+        sys.stdout.write(rendered)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,6 @@
+import sys
+import types
+
 __all__ = [
     'bit_field',
     'byte',
@@ -8,4 +11,47 @@ __all__ = [
     'static',
     'string',
     'word',
-]
\ No newline at end of file
+]
+
+
+class lazy_package (types.ModuleType):
+    """
+    The sulley.primitives package, exposing each primitive class as an attribute of the package. The module defining a
+    primitive is only imported the first time the primitive is accessed, so that short-lived tools importing the
+    package do not pay for the primitives they never use.
+    """
+
+    def __getattribute__ (self, name):
+        value = types.ModuleType.__getattribute__(self, name)
+
+        # importing a submodule binds it on the package under the name of the primitive it defines, replace it with the
+        # primitive like an eager "from .string import string" would have.
+        if name in __all__ and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+            setattr(self, name, value)
+
+        return value
+
+
+    def __getattr__ (self, name):
+        if name not in __all__:
+            raise AttributeError("module %r has no attribute %r" % (self.__name__, name))
+
+        # a relative __import__() rather than importlib, which Python 2.6 does not have.
+        value = getattr(__import__(name, globals(), locals(), [name], 1), name)
+        setattr(self, name, value)
+
+        return value
+
+
+    def __dir__ (self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+# swap this module for a lazy package carrying the same globals. the original module is kept referenced, Python 2
+# clears the globals of a module once it is garbage collected and the methods above still use them.
+package        = lazy_package(__name__, __doc__)
+package.module = sys.modules[__name__]
+
+package.__dict__.update(dict((key, value) for key, value in globals().items() if key != "package"))
+sys.modules[__name__] = package
@@ -1,21 +1,194 @@
+import array
+from .library import library_length
+
 class base(object):
     """
     The primitive base class implements common functionality shared across most primitives.
 
     Most of these methods get overridden in their respective classes anyway.
+
+    Primitives are slotted, models can hold tens of thousands of them. Subclasses list their own attributes in
+    __slots__, those set here and the common 'name' and 's_type' are declared once on this class.
     """
 
+    __slots__ = ("fuzz_complete", "library", "fuzzable", "mutant_index", "original_value", "rendered", "value",
+                 "name", "s_type", "counters", "dirty")
+
     def __init__(self):
         self.fuzz_complete  = False # this flag is raised when the mutations are exhausted.
-        self.fuzz_library   = []    # library of static fuzz heuristics to cycle through.
+        self.library        = None  # fuzz library, built by build_library() on first use, see fuzz_library.
         self.fuzzable       = True  # flag controlling whether or not the given primitive is to be fuzzed.
         self.mutant_index   = 0     # current mutation index into the fuzz library.
         self.original_value = None  # original value of primitive.
         self.rendered       = ""    # rendered value of primitive.
         self.value          = None  # current value of primitive.
+        self.name           = None  # optional name, giving direct access to the primitive.
+        self.counters       = None  # instrumentation counters, only created once instrumentation is enabled.
+        self.dirty          = True  # raised when value changes through mutate() / reset(), lowered by render().
+
+    @property
+    def fuzz_library(self):
+        """
+        Library of static fuzz heuristics to cycle through. It is only built, by build_library(), the first time it is
+        needed, so that primitives which are constructed but never mutated do not pay for it.
+        """
+        if self.library is None:
+            self.library = self.build_library()
+
+        return self.library
+
+    @fuzz_library.setter
+    def fuzz_library(self, library):
+        self.library = library
+
+    def build_library(self):
+        """
+        Build the fuzz library of this primitive, called on first use. Primitives with a library override this.
+
+        :rtype:  Sequence
+        :returns: Fuzz library
+        """
+        return []
+
+    def __getstate__(self):
+        # slotted objects have no __dict__ to pickle, gather every slot which has been set across the hierarchy.
+        state = {}
+
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+
+        return state
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def __len__(self):
+        # under Python 2 len() overflows past sys.maxsize mutations (ie: a full range qword), use num_mutations() there.
+        return self.num_mutations()
+
+    def __nonzero__(self):
+        # primitives are always truthy, regardless of how many mutations __len__() reports.
+        return True
+
+    __bool__ = __nonzero__
+
+    def iter_mutations(self):
+        """
+        Generate the rendered form of every mutation of this primitive, in mutation order, without touching the
+        mutate() / reset() state.
+
+        :rtype:  Generator
+        :returns: Rendered mutations
+        """
+
+        index = 0
+
+        # count by hand, xrange() can not go past sys.maxsize under Python 2.
+        while index < self.num_mutations():
+            yield self.mutation_at(index)
+            index += 1
+
+    def mutation_at(self, index):
+        """
+        Render mutation number index directly, without stepping through the preceding mutations and without touching
+        mutant_index, value or rendered.
+
+        :type  index: Integer
+        :param index: Mutation number, 0 <= index < num_mutations()
+
+        :rtype:  Raw
+        :returns: Rendered value of the given mutation
+        """
+
+        if not 0 <= index < self.num_mutations():
+            raise IndexError("mutation index %d out of range" % index)
+
+        return self.render_value(self.value_at(index))
+
+    def render_batch(self, start, count, out):
+        """
+        Render count consecutive mutations, starting with mutation number start, back to back into a caller supplied
+        buffer, without allocating a rendered string per mutation where the primitive can avoid it.
+
+        :type  start: Integer
+        :param start: First mutation number
+        :type  count: Integer
+        :param count: Number of mutations to render
+        :type  out:   Buffer
+        :param out:   Preallocated bytearray or writable memoryview, large enough for the whole batch
+
+        :rtype:  array.array
+        :returns: count + 1 offsets, mutation start + i occupies out[offsets[i]:offsets[i + 1]]
+        """
+
+        offsets  = array.array("L", [0])
+        position = 0
+
+        for index in xrange(count):
+            position = self.render_into(start + index, out, position)
+            offsets.append(position)
+
+        return offsets
+
+    def render_into(self, index, out, position):
+        """
+        Render mutation number index into out at the given position.
+
+        :type  index:    Integer
+        :param index:    Mutation number
+        :type  out:      Buffer
+        :param out:      Preallocated bytearray or writable memoryview
+        :type  position: Integer
+        :param position: Offset in out to render at
+
+        :rtype:  Integer
+        :returns: Offset just past the rendered mutation
+        """
+
+        rendered = self.mutation_at(index)
+        end      = self.check_room(out, position, len(rendered))
+
+        out[position:end] = rendered
+        return end
+
+    def check_room(self, out, position, length):
+        """
+        Ensure out has room for length bytes at position.
+
+        :rtype:  Integer
+        :returns: Offset just past the room
+        """
+
+        end = position + length
+
+        if end > len(out):
+            raise ValueError("output buffer holds %d bytes, %d needed" % (len(out), end))
+
+        return end
+
+    def value_at(self, index):
+        """
+        Return the (unrendered) value this primitive takes on for mutation number index.
+
+        :type  index: Integer
+        :param index: Mutation number
+
+        :rtype:  Raw
+        :returns: Mutated value
+        """
+
+        # mutate() calls this for every mutation, skip the fuzz_library property once the library is built.
+        library = self.library
+
+        if library is None:
+            library = self.fuzz_library
+
+        return library[index]
 
     def mutate(self):
-        # TODO: Turn mutate() into an iterator, easier to mutate and throw.
         """
         Mutate the primitive by stepping through the fuzz library, return False on completion.
 
@@ -32,10 +205,12 @@ class base(object):
         # if fuzzing was disabled or complete, and mutate() is called, ensure the original value is restored.
         if not self.fuzzable or self.fuzz_complete:
             self.value = self.original_value
+            self.dirty = True
             return False
 
         # update the current value from the fuzz library.
-        self.value = self.fuzz_library[self.mutant_index]
+        self.value = self.value_at(self.mutant_index)
+        self.dirty = True
 
         # increment the mutation count.
         self.mutant_index += 1
@@ -49,16 +224,49 @@ class base(object):
         :rtype:  Integer
         :returns: Number of mutated forms this primitive can take
         """
-        return len(self.fuzz_library)
+        library = self.library
+
+        if library is None:
+            library = self.fuzz_library
+
+        return library_length(library)
 
 
     def render(self):
         """
-        Nothing fancy on render, simply return the value.
+        Render the current value through render_value() and keep the result in rendered.
+
+        Blocks only call this for dirty primitives and otherwise reuse rendered, a value assigned by hand must raise the
+        dirty flag for enclosing blocks to notice it.
         """
-        self.rendered = self.value
+        self.rendered = self.render_value(self.value)
+        self.dirty    = False
         return self.rendered
 
+    def render_value(self, value):
+        """
+        Nothing fancy on render, simply return the value.
+
+        :type  value: Raw
+        :param value: Value to render
+
+        :rtype:  Raw
+        :returns: Rendered value
+        """
+        return value
+
+    def stats(self):
+        """
+        Snapshot of the instrumentation counters of this primitive. They are only kept up to date while
+        sulley.primitives.instrumentation is enabled, and are all zero if it never was.
+
+        :rtype:  Dictionary
+        :returns: mutations, mutate_seconds, renders, render_seconds, rendered_bytes and largest_render
+        """
+        from .instrumentation import COUNTER_NAMES
+
+        return dict(zip(COUNTER_NAMES, self.counters or (0, 0.0, 0, 0.0, 0, 0)))
+
     def reset(self):
         """
         Reset this primitive to the starting mutation state.
@@ -66,3 +274,61 @@ class base(object):
         self.fuzz_complete = False
         self.mutant_index = 0
         self.value = self.original_value
+        self.dirty = True
+
+    def skip_to(self, index):
+        """
+        Move straight to mutation number index, leaving the primitive as index + 1 calls to mutate() from a reset would
+        have, without stepping through the mutations before it.
+
+        :type  index: Integer
+        :param index: Mutation number, 0 <= index < num_mutations()
+        """
+
+        if not 0 <= index < self.num_mutations():
+            raise IndexError("mutation index %d out of range" % index)
+
+        self.fuzz_complete = False
+        self.value         = self.value_at(index)
+        self.mutant_index  = index + 1
+        self.dirty         = True
+
+    def checkpoint(self):
+        """
+        Capture the mutation state of this primitive, see restore(). The current value is only kept when it can not be
+        regenerated, ie: it was assigned by hand, so snapshots stay small whatever the size of the values.
+
+        :rtype:  Tuple
+        :returns: (mutant_index, fuzz_complete, value), picklable. value is None for the mutation mutant_index points
+                  past, an empty tuple for the original value and a 1-tuple holding the value otherwise
+        """
+
+        if self.value is self.original_value:
+            value = ()
+        elif self.mutant_index and not self.fuzz_complete and self.value == self.value_at(self.mutant_index - 1):
+            value = None
+        else:
+            value = (self.value,)
+
+        return self.mutant_index, self.fuzz_complete, value
+
+    def restore(self, state):
+        """
+        Go back to a mutation state captured by checkpoint(), in constant time.
+
+        :type  state: Tuple
+        :param state: Snapshot returned by checkpoint()
+        """
+
+        mutant_index, fuzz_complete, value = state[:3]
+
+        if value is None:
+            self.value = self.value_at(mutant_index - 1)
+        elif value:
+            self.value = value[0]
+        else:
+            self.value = self.original_value
+
+        self.mutant_index  = mutant_index
+        self.fuzz_complete = fuzz_complete
+        self.dirty         = True
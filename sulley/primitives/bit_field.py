@@ -1,7 +1,22 @@
 import struct
-from base import base
+from binascii import unhexlify
+from . import dictionaries
+from .base import base
+from .library import chained_library, integer_array, integer_range
+
+# precompiled packers for the natively sized widths, keyed on (little endian, width).
+packers = {}
+
+for little, endian in ((True, "<"), (False, ">")):
+    for width, fmt in ((8, "B"), (16, "H"), (32, "L"), (64, "Q")):
+        packers[(little, width)] = struct.Struct(endian + fmt)
+
+# "smart" value libraries shared by every non full range field with the same max_num, keyed on max_num.
+boundary_libraries = {}
 
 class bit_field (base):
+    __slots__ = ("width", "max_num", "endian", "format", "signed", "full_range")
+
     def __init__ (self, value, width, max_num=None, endian="<", format="binary", signed=False, full_range=False, fuzzable=True, name=None):
         """
         The bit field primitive represents a number of variable length and is used to define all other integer types.
@@ -40,23 +55,34 @@ class bit_field (base):
         self.fuzzable      = fuzzable
         self.name          = name
 
-        self.rendered      = ""        # rendered value
-        self.fuzz_complete = False     # flag if this primitive has been completely fuzzed
-        self.fuzz_library  = []        # library of fuzz heuristics
-        self.mutant_index  = 0         # current mutation number
 
         if self.max_num is None:
             self.max_num = self.to_decimal("1" * width)
 
         assert(type(self.max_num) is int or type(self.max_num) is long)
 
-        # build the fuzz library.
+        # the fuzz library is built on first use, see build_library().
+
+
+    def build_library (self):
+        """
+        Build the fuzz library: every possible value for a full range field, "smart" boundary values otherwise, followed
+        by the custom values in range from the optional '.fuzz_ints' file.
+
+        :rtype:  Sequence
+        :returns: Fuzz library
+        """
+
         if self.full_range:
-            # add all possible values.
-            for i in xrange(0, self.max_num):
-                self.fuzz_library.append(i)
+            # add all possible values, as a virtual range rather than one int object per value.
+            library = integer_range(0, self.max_num)
+        elif self.max_num in boundary_libraries:
+            # the "smart" values only depend on max_num, fields of the same size share a single packed array.
+            library = boundary_libraries[self.max_num]
         else:
-            # try only "smart" values.
+            # try only "smart" values, packed into an array rather than a list of int objects.
+            self.library = integer_array(self.max_num)
+
             self.add_integer_boundaries(0)
             self.add_integer_boundaries(self.max_num / 2)
             self.add_integer_boundaries(self.max_num / 3)
@@ -66,23 +92,15 @@ class bit_field (base):
             self.add_integer_boundaries(self.max_num / 32)
             self.add_integer_boundaries(self.max_num)
 
-        # if the optional file '.fuzz_ints' is found, parse each line as a new entry for the fuzz library.
-        try:
-            fh = open(".fuzz_ints", "r")
+            library = boundary_libraries[self.max_num] = self.library
 
-            for fuzz_int in fh.readlines():
-                # convert the line into an integer, continue on failure.
-                try:
-                    fuzz_int = long(fuzz_int, 16)
-                except:
-                    continue
+        # the custom values come last. the file is only parsed again if it changes.
+        custom = dictionaries.fuzz_ints(self.max_num)
 
-                if fuzz_int <= self.max_num:
-                    self.fuzz_library.append(fuzz_int)
+        if custom:
+            library = chained_library(library, integer_array(self.max_num, custom))
 
-            fh.close()
-        except:
-            pass
+        return library
 
 
     def add_integer_boundaries (self, integer):
@@ -93,6 +111,10 @@ class bit_field (base):
         :param integer: Integer to append to fuzz heuristics
         """
 
+        # never grow a library shared with other fields, take a private copy first.
+        if not isinstance(self.fuzz_library, integer_array) or self.fuzz_library is boundary_libraries.get(self.max_num):
+            self.fuzz_library = integer_array(self.max_num, self.fuzz_library)
+
         for i in xrange(-10, 10):
             case = integer + i
 
@@ -102,9 +124,15 @@ class bit_field (base):
                     self.fuzz_library.append(case)
 
 
-    def render (self):
+    def render_value (self, value):
         """
-        Render the primitive.
+        Render the given value as this bit field.
+
+        :type  value: Integer
+        :param value: Value to render
+
+        :rtype:  Raw
+        :returns: Rendered value
         """
 
         #
@@ -112,51 +140,68 @@ class bit_field (base):
         #
 
         if self.format == "binary":
-            bit_stream = ""
-            rendered   = ""
+            # only the low order width bits make it into the bit field.
+            value &= (1 << self.width) - 1
+
+            # natively sized fields are a single struct call away.
+            packer = packers.get((self.endian == "<", self.width))
 
-            # pad the bit stream to the next byte boundary.
-            if self.width % 8 == 0:
-                bit_stream += self.to_binary()
-            else:
-                bit_stream  = "0" * (8 - (self.width % 8))
-                bit_stream += self.to_binary()
+            if packer:
+                return packer.pack(value)
 
-            # convert the bit stream from a string of bits into raw bytes.
-            for i in xrange(len(bit_stream) / 8):
-                chunk = bit_stream[8*i:8*i+8]
-                rendered += struct.pack("B", self.to_decimal(chunk))
+            if not self.width:
+                return ""
+
+            # otherwise pad to the next byte boundary and let binascii do the conversion, big endian first.
+            rendered = unhexlify("%0*x" % ((self.width + 7) / 8 * 2, value))
 
             # if necessary, convert the endianess of the raw bytes.
             if self.endian == "<":
-                rendered = list(rendered)
-                rendered.reverse()
-                rendered = "".join(rendered)
+                rendered = rendered[::-1]
 
-            self.rendered = rendered
+            return rendered
 
         #
         # ascii formatting.
         #
 
-        else:
-            # if the sign flag is raised and we are dealing with a signed integer (first bit is 1).
-            if self.signed and self.to_binary()[0] == "1":
-                max_num = self.to_decimal("0" + "1" * (self.width - 1))
-                # chop off the sign bit.
-                val = self.value & max_num
+        # if the sign flag is raised and we are dealing with a signed integer (first bit is 1).
+        if self.signed and (value >> (self.width - 1)) & 1:
+            # chop off the sign bit and account for the fact that the negative scale works backwards.
+            sign_bit = 1 << (self.width - 1)
+            return "%d" % ((value & (sign_bit - 1)) - sign_bit)
+
+        # unsigned integer or positive signed integer.
+        return "%d" % value
+
+
+    def render_into (self, index, out, position):
+        """
+        Render mutation number index into out at the given position, packing natively sized binary fields in place.
+
+        :type  index:    Integer
+        :param index:    Mutation number
+        :type  out:      Buffer
+        :param out:      Preallocated bytearray or writable memoryview
+        :type  position: Integer
+        :param position: Offset in out to render at
+
+        :rtype:  Integer
+        :returns: Offset just past the rendered mutation
+        """
+
+        packer = packers.get((self.endian == "<", self.width))
 
-                # account for the fact that the negative scale works backwards.
-                val = max_num - val
+        if self.format != "binary" or not packer:
+            return super(bit_field, self).render_into(index, out, position)
 
-                # toss in the negative sign.
-                self.rendered = "%d" % ~val
+        if not 0 <= index < self.num_mutations():
+            raise IndexError("mutation index %d out of range" % index)
 
-            # unsigned integer or positive signed integer.
-            else:
-                self.rendered = "%d" % self.value
+        end = self.check_room(out, position, packer.size)
 
-        return self.rendered
+        packer.pack_into(out, position, self.value_at(index) & ((1 << self.width) - 1))
+        return end
 
 
     def to_binary (self, number=None, bit_count=None):
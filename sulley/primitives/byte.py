@@ -1,7 +1,9 @@
 import struct
-from bit_field import bit_field
+from .bit_field import bit_field
 
 class byte (bit_field):
+    __slots__ = ()
+
     def __init__ (self, value, endian="<", format="binary", signed=False, full_range=False, fuzzable=True, name=None):
         self.s_type  = "byte"
         if type(value) not in [int, long]:
@@ -0,0 +1,212 @@
+import mmap
+import os
+import struct
+import sys
+
+# a packed corpus is laid out as:
+#
+#     MAGIC | entry data ... | index: (offset, length) per entry | footer: (index offset, entry count)
+#
+# with every integer stored as a little endian unsigned 64-bit value. the index comes last so that corpora can be
+# written in a single streaming pass.
+MAGIC  = "SULCORP\x01"
+INDEX  = struct.Struct("<QQ")
+FOOTER = struct.Struct("<QQ")
+
+# types of the zero-copy slices corpus entries are handed out as: Python 3 only has memoryview, Python 2.6 only buffer.
+try:
+    entry_types = (memoryview, buffer)
+except NameError:
+    try:
+        entry_types = (buffer,)
+    except NameError:
+        entry_types = (memoryview,)
+
+
+def write_corpus (path, entries):
+    """
+    Pack entries into a corpus file.
+
+    :type  path:    String
+    :param path:    Path of the corpus file to create
+    :type  entries: Iterable
+    :param entries: Raw entries, which may contain any byte including newlines
+
+    :rtype:  Integer
+    :returns: Number of entries written
+    """
+
+    index = []
+    fh    = open(path, "wb")
+
+    try:
+        fh.write(MAGIC)
+        offset = len(MAGIC)
+
+        for entry in entries:
+            fh.write(entry)
+            index.append((offset, len(entry)))
+            offset += len(entry)
+
+        for entry_offset, length in index:
+            fh.write(INDEX.pack(entry_offset, length))
+
+        fh.write(FOOTER.pack(offset, len(index)))
+    finally:
+        fh.close()
+
+    return len(index)
+
+
+class corpus (object):
+    """
+    Read-only fuzz library over a packed corpus file. The file is memory mapped and entries are handed out as zero-copy
+    slices of the mapping (memoryview where the interpreter can map one, buffer under Python 2), so every process
+    using the same corpus shares its pages through the OS page cache instead of keeping a private copy.
+    """
+
+    def __init__ (self, path):
+        """
+        :type  path: String
+        :param path: Path to the corpus file
+        """
+
+        self.path = path
+
+        fh = open(path, "rb")
+
+        try:
+            self.map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            fh.close()
+
+        if self.map[:len(MAGIC)] != MAGIC or len(self.map) < len(MAGIC) + FOOTER.size:
+            self.map.close()
+            raise ValueError("%s is not a packed corpus" % path)
+
+        self.index_offset, self.length = FOOTER.unpack_from(self.map, len(self.map) - FOOTER.size)
+
+        try:
+            self.view = memoryview(self.map)
+        except (NameError, TypeError):
+            self.view = None
+
+
+    def close (self):
+        """
+        Release the mapping, entries handed out earlier must not be used afterwards.
+        """
+
+        self.view = None
+        self.map.close()
+
+
+    def entry_location (self, index):
+        """
+        Look an entry up in the index.
+
+        :type  index: Integer
+        :param index: Entry number
+
+        :rtype:  Tuple
+        :returns: (offset, length) of the entry within the file
+        """
+
+        if index < 0:
+            index += self.length
+
+        if not 0 <= index < self.length:
+            raise IndexError("corpus index out of range")
+
+        return INDEX.unpack_from(self.map, self.index_offset + index * INDEX.size)
+
+
+    def entry_length (self, index):
+        """
+        Length of an entry, read from the index without touching the entry data.
+
+        :type  index: Integer
+        :param index: Entry number
+
+        :rtype:  Integer
+        :returns: Length of the entry
+        """
+
+        return self.entry_location(index)[1]
+
+
+    def lengths (self):
+        """
+        Generate the length of every entry, in corpus order.
+        """
+
+        for index in range(self.length):
+            yield self.entry_length(index)
+
+
+    def __len__ (self):
+        return self.length
+
+
+    def __getitem__ (self, index):
+        offset, length = self.entry_location(index)
+
+        if self.view is not None:
+            return self.view[offset:offset + length]
+
+        return buffer(self.map, offset, length)
+
+
+    def __iter__ (self):
+        for index in range(self.length):
+            yield self[index]
+
+
+def main (argv=None, out=None):
+    """
+    Command line corpus writer:
+
+        python -m sulley.primitives.corpus [--files] output input [input ...]
+
+    By default every non empty line of every input becomes an entry, like in a '.fuzz_strings' file. With --files each
+    input file becomes a single entry, byte for byte, which is how binary payloads containing newlines are packed. A
+    summary is written to out, stdout by default.
+    """
+
+    import optparse
+
+    parser = optparse.OptionParser(usage="%prog [--files] output input [input ...]")
+    parser.add_option("--files", action="store_true", default=False, help="pack each input file as a single entry")
+
+    options, args = parser.parse_args(argv)
+
+    if len(args) < 2:
+        parser.error("an output and at least one input are required")
+
+    output, inputs = args[0], args[1:]
+
+    def entries ():
+        for path in inputs:
+            fh = open(path, "rb")
+
+            try:
+                if options.files:
+                    yield fh.read()
+                    continue
+
+                for line in fh:
+                    line = line.rstrip("\r\n")
+
+                    if line != "":
+                        yield line
+            finally:
+                fh.close()
+
+    count = write_corpus(output, entries())
+    (out or sys.stdout).write("packed %d entries (%d bytes) into %s\n" % (count, os.path.getsize(output), output))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
-from base import base
+from .base import base
 
 class delim (base):
+    __slots__ = ()
+
     def __init__ (self, value, fuzzable=True, name=None):
         """
         Represent a delimiter such as :,\r,\n, ,=,>,< etc... Mutations include repetition, substitution and exclusion.
@@ -19,68 +21,75 @@ class delim (base):
         self.name          = name
 
         self.s_type        = "delim"   # for ease of object identification
-        self.rendered      = ""        # rendered value
-        self.fuzz_complete = False     # flag if this primitive has been completely fuzzed
-        self.fuzz_library  = []        # library of fuzz heuristics
-        self.mutant_index  = 0         # current mutation number
 
-        #
-        # build the library of fuzz heuristics.
-        #
+        # the library of fuzz heuristics is built on first use, see build_library().
+
+
+    def build_library (self):
+        """
+        Build the library of fuzz heuristics: repetitions of the delimiter, its omission and substitutions.
+
+        :rtype:  List
+        :returns: Fuzz library
+        """
+
+        library = []
 
         # if the default delim is not blank, repeat it a bunch of times.
-        if self.value:
-            self.fuzz_library.append(self.value * 2)
-            self.fuzz_library.append(self.value * 5)
-            self.fuzz_library.append(self.value * 10)
-            self.fuzz_library.append(self.value * 25)
-            self.fuzz_library.append(self.value * 100)
-            self.fuzz_library.append(self.value * 500)
-            self.fuzz_library.append(self.value * 1000)
+        if self.original_value:
+            library.append(self.original_value * 2)
+            library.append(self.original_value * 5)
+            library.append(self.original_value * 10)
+            library.append(self.original_value * 25)
+            library.append(self.original_value * 100)
+            library.append(self.original_value * 500)
+            library.append(self.original_value * 1000)
 
         # try ommitting the delimiter.
-        self.fuzz_library.append("")
+        library.append("")
 
         # if the delimiter is a space, try throwing out some tabs.
-        if self.value == " ":
-            self.fuzz_library.append("\t")
-            self.fuzz_library.append("\t" * 2)
-            self.fuzz_library.append("\t" * 100)
+        if self.original_value == " ":
+            library.append("\t")
+            library.append("\t" * 2)
+            library.append("\t" * 100)
 
         # toss in some other common delimiters:
-        self.fuzz_library.append(" ")
-        self.fuzz_library.append("\t")
-        self.fuzz_library.append("\t " * 100)
-        self.fuzz_library.append("\t\r\n" * 100)
-        self.fuzz_library.append("!")
-        self.fuzz_library.append("@")
-        self.fuzz_library.append("#")
-        self.fuzz_library.append("$")
-        self.fuzz_library.append("%")
-        self.fuzz_library.append("^")
-        self.fuzz_library.append("&")
-        self.fuzz_library.append("*")
-        self.fuzz_library.append("(")
-        self.fuzz_library.append(")")
-        self.fuzz_library.append("-")
-        self.fuzz_library.append("_")
-        self.fuzz_library.append("+")
-        self.fuzz_library.append("=")
-        self.fuzz_library.append(":")
-        self.fuzz_library.append(": " * 100)
-        self.fuzz_library.append(":7" * 100)
-        self.fuzz_library.append(";")
-        self.fuzz_library.append("'")
-        self.fuzz_library.append("\"")
-        self.fuzz_library.append("/")
-        self.fuzz_library.append("\\")
-        self.fuzz_library.append("?")
-        self.fuzz_library.append("<")
-        self.fuzz_library.append(">")
-        self.fuzz_library.append(".")
-        self.fuzz_library.append(",")
-        self.fuzz_library.append("\r")
-        self.fuzz_library.append("\n")
-        self.fuzz_library.append("\r\n" * 64)
-        self.fuzz_library.append("\r\n" * 128)
-        self.fuzz_library.append("\r\n" * 512)
+        library.append(" ")
+        library.append("\t")
+        library.append("\t " * 100)
+        library.append("\t\r\n" * 100)
+        library.append("!")
+        library.append("@")
+        library.append("#")
+        library.append("$")
+        library.append("%")
+        library.append("^")
+        library.append("&")
+        library.append("*")
+        library.append("(")
+        library.append(")")
+        library.append("-")
+        library.append("_")
+        library.append("+")
+        library.append("=")
+        library.append(":")
+        library.append(": " * 100)
+        library.append(":7" * 100)
+        library.append(";")
+        library.append("'")
+        library.append("\"")
+        library.append("/")
+        library.append("\\")
+        library.append("?")
+        library.append("<")
+        library.append(">")
+        library.append(".")
+        library.append(",")
+        library.append("\r")
+        library.append("\n")
+        library.append("\r\n" * 64)
+        library.append("\r\n" * 128)
+        library.append("\r\n" * 512)
+
+        return library
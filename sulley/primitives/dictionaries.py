@@ -0,0 +1,163 @@
+import bisect
+import os
+
+from .corpus import MAGIC, corpus
+
+# default locations of the optional custom dictionaries. relative paths are looked up in the current working directory,
+# set an absolute path to share one dictionary across runs started from anywhere.
+FUZZ_INTS    = ".fuzz_ints"
+FUZZ_STRINGS = ".fuzz_strings"
+
+# parsed dictionaries keyed on (parser, absolute path), each holding ((mtime, size), parsed dictionary).
+cache = {}
+
+
+class int_dictionary (object):
+    """
+    Integers parsed from a '.fuzz_ints' style file, one hexadecimal number per line, with a sorted view to answer
+    max_num queries by bisection.
+    """
+
+    def __init__ (self, fh):
+        """
+        :type  fh: File
+        :param fh: Open dictionary file, lines which are not hexadecimal numbers are ignored
+        """
+
+        self.values = []
+
+        for line in fh.readlines():
+            # convert the line into an integer, continue on failure.
+            try:
+                self.values.append(int(line, 16))
+            except ValueError:
+                continue
+
+        # file positions ordered by value, and the matching values for bisect.
+        self.order         = sorted(range(len(self.values)), key=self.values.__getitem__)
+        self.sorted_values = [self.values[position] for position in self.order]
+        self.filtered      = {}
+
+
+    def up_to (self, max_num):
+        """
+        Return the values less than or equal to max_num, in file order. Results are cached per max_num since every
+        byte, word, etc. asks the same question.
+
+        :type  max_num: Integer
+        :param max_num: Largest value to return
+
+        :rtype:  Tuple
+        :returns: Matching values
+        """
+
+        values = self.filtered.get(max_num)
+
+        if values is None:
+            count  = bisect.bisect_right(self.sorted_values, max_num)
+            values = tuple([self.values[position] for position in sorted(self.order[:count])])
+
+            self.filtered[max_num] = values
+
+        return values
+
+
+class string_dictionary (object):
+    """
+    Strings from a '.fuzz_strings' style file, either one entry per non empty line or a packed corpus (see the corpus
+    module) which is memory mapped rather than read in.
+    """
+
+    def __init__ (self, fh):
+        """
+        :type  fh: File
+        :param fh: Open dictionary file
+        """
+
+        if fh.read(len(MAGIC)) == MAGIC:
+            self.values = corpus(fh.name)
+            return
+
+        fh.seek(0)
+        self.values = tuple([line.rstrip("\r\n") for line in fh.readlines() if line.rstrip("\r\n") != ""])
+
+
+def load (parser, path):
+    """
+    Parse the dictionary at path with parser, or return the copy parsed earlier in this process if the file has not
+    been modified since.
+
+    :type  parser: Class
+    :param parser: Dictionary class to parse the open file with
+    :type  path:   String
+    :param path:   Path to the dictionary file
+
+    :rtype:  Object
+    :returns: Parsed dictionary, None if the file can not be read
+    """
+
+    key = (parser, os.path.abspath(path))
+
+    try:
+        stat = os.stat(key[1])
+    except OSError:
+        cache.pop(key, None)
+        return None
+
+    version = (stat.st_mtime, stat.st_size)
+    entry   = cache.get(key)
+
+    if entry is None or entry[0] != version:
+        try:
+            fh = open(key[1], "rb")
+
+            try:
+                entry = (version, parser(fh))
+            finally:
+                fh.close()
+        except IOError:
+            return None
+
+        cache[key] = entry
+
+    return entry[1]
+
+
+def fuzz_ints (max_num, path=None):
+    """
+    Custom integers less than or equal to max_num from the optional integer dictionary.
+
+    :type  max_num: Integer
+    :param max_num: Largest value to return
+    :type  path:    String
+    :param path:    (Optional, def=FUZZ_INTS) Path to the integer dictionary
+
+    :rtype:  Tuple
+    :returns: Custom integers in file order, empty if there is no dictionary
+    """
+
+    dictionary = load(int_dictionary, path or FUZZ_INTS)
+
+    if dictionary is None:
+        return ()
+
+    return dictionary.up_to(max_num)
+
+
+def fuzz_strings (path=None):
+    """
+    Custom strings from the optional string dictionary.
+
+    :type  path: String
+    :param path: (Optional, def=FUZZ_STRINGS) Path to the string dictionary
+
+    :rtype:  Sequence
+    :returns: Custom strings in file order (a corpus for packed dictionaries), empty if there is no dictionary
+    """
+
+    dictionary = load(string_dictionary, path or FUZZ_STRINGS)
+
+    if dictionary is None:
+        return ()
+
+    return dictionary.values
@@ -1,6 +1,8 @@
-from base import base
+from .base import base
 
 class group (base):
+    __slots__ = ("values",)
+
     def __init__ (self, name, values):
         """
         This primitive represents a list of static values, stepping through each one on mutation. You can tie a block
@@ -22,9 +24,6 @@ class group (base):
         self.s_type         = "group"
         self.value          = self.values[0]
         self.original_value = self.values[0]
-        self.rendered       = ""
-        self.fuzz_complete  = False
-        self.mutant_index   = 0
 
         # sanity check that values list only contains strings (or raw data)
         if self.values:
@@ -46,10 +45,12 @@ class group (base):
         # if fuzzing was disabled or complete, and mutate() is called, ensure the original value is restored.
         if not self.fuzzable or self.fuzz_complete:
             self.value = self.values[0]
+            self.dirty = True
             return False
 
         # step through the value list.
-        self.value = self.values[self.mutant_index]
+        self.value = self.value_at(self.mutant_index)
+        self.dirty = True
 
         # increment the mutation count.
         self.mutant_index += 1
@@ -66,3 +67,17 @@ class group (base):
         """
 
         return len(self.values)
+
+
+    def value_at (self, index):
+        """
+        Return the entry of the values list for mutation number index.
+
+        :type  index: Integer
+        :param index: Mutation number
+
+        :rtype:  Raw
+        :returns: Group value
+        """
+
+        return self.values[index]
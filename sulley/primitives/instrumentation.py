@@ -0,0 +1,246 @@
+import sys
+import time
+
+from . import __all__ as PRIMITIVES
+from .base import base
+
+# timer with the best resolution the interpreter offers.
+try:
+    timer = time.perf_counter
+except AttributeError:
+    timer = time.clock if sys.platform == "win32" else time.time
+
+# positions of the per-primitive counters, kept in a list in the primitive's 'counters' slot.
+MUTATIONS, MUTATE_SECONDS, RENDERS, RENDER_SECONDS, RENDERED_BYTES, LARGEST_RENDER = range(6)
+
+COUNTER_NAMES = ("mutations", "mutate_seconds", "renders", "render_seconds", "rendered_bytes", "largest_render")
+
+# methods wrapped while instrumentation is enabled.
+METHODS = ("mutate", "render")
+
+# (class, method name) -> the function the class defined itself, None when it inherited it. the wrappers are installed
+# on every class of the hierarchy and removed again on disable(), so a disabled primitive runs the original methods
+# without any indirection.
+originals = {}
+
+# profiling hook, called as callback(primitive, method name, seconds, rendered length or None) after every call.
+callback = None
+
+
+def classes ():
+    """
+    Generate base and every one of its subclasses defined so far.
+    """
+
+    pending = [base]
+    seen    = set()
+
+    while pending:
+        cls = pending.pop()
+
+        if cls in seen:
+            continue
+
+        seen.add(cls)
+        pending.extend(cls.__subclasses__())
+
+        yield cls
+
+
+def counters (primitive):
+    """
+    Counters of a primitive, created on first use.
+
+    :rtype:  List
+    :returns: Counters, indexed by MUTATIONS, MUTATE_SECONDS, RENDERS, RENDER_SECONDS, RENDERED_BYTES and LARGEST_RENDER
+    """
+
+    if primitive.counters is None:
+        primitive.counters = [0, 0.0, 0, 0.0, 0, 0]
+
+    return primitive.counters
+
+
+def instrument_mutate (cls, mutate):
+    def instrumented_mutate (self):
+        # a super() call from an overriding method lands here too, only the outermost call is counted.
+        if type(self) is not cls:
+            return mutate(self)
+
+        start    = timer()
+        mutated  = mutate(self)
+        duration = timer() - start
+
+        stats = counters(self)
+        stats[MUTATE_SECONDS] += duration
+
+        if mutated:
+            stats[MUTATIONS] += 1
+
+        if callback is not None:
+            callback(self, "mutate", duration, None)
+
+        return mutated
+
+    instrumented_mutate.__doc__ = mutate.__doc__
+    return instrumented_mutate
+
+
+def instrument_render (cls, render):
+    def instrumented_render (self):
+        if type(self) is not cls:
+            return render(self)
+
+        start    = timer()
+        rendered = render(self)
+        duration = timer() - start
+        length   = len(rendered)
+
+        stats = counters(self)
+        stats[RENDERS]        += 1
+        stats[RENDER_SECONDS] += duration
+        stats[RENDERED_BYTES] += length
+
+        if length > stats[LARGEST_RENDER]:
+            stats[LARGEST_RENDER] = length
+
+        if callback is not None:
+            callback(self, "render", duration, length)
+
+        return rendered
+
+    instrumented_render.__doc__ = render.__doc__
+    return instrumented_render
+
+
+def instrument_request_mutate (mutate):
+    def instrumented_mutate (self):
+        start    = timer()
+        mutated  = mutate(self)
+        duration = timer() - start
+
+        # requests assign the values of a test case rather than calling mutate() on their primitives. the primitive the
+        # test case mutates comes last, after the groups it pins.
+        if mutated:
+            primitive = self.mutated[-1]
+
+            stats = counters(primitive)
+            stats[MUTATIONS]      += 1
+            stats[MUTATE_SECONDS] += duration
+
+            if callback is not None:
+                callback(primitive, "mutate", duration, None)
+
+        return mutated
+
+    instrumented_mutate.__doc__ = mutate.__doc__
+    return instrumented_mutate
+
+
+def enable (hook=None):
+    """
+    Start counting mutate() and render() calls on every primitive, including those already constructed. The modules of
+    the lazily loaded sulley.primitives package are imported first, so their primitives are instrumented whether or not
+    they were used yet. Primitive classes defined elsewhere after this call are not instrumented until the next
+    disable() / enable() cycle. Test cases a request steps through are counted as mutations of the primitive they
+    mutate.
+
+    :type  hook: Callable
+    :param hook: (Optional, def=None) Profiling hook, called as hook(primitive, method name, seconds, rendered length)
+                 after each call, the length being None for mutate()
+    """
+
+    global callback
+
+    callback = hook
+
+    if originals:
+        return
+
+    for name in PRIMITIVES:
+        __import__(name, globals(), locals(), [name], 1)
+
+    # resolve every original before installing anything, so that no wrapper ends up wrapping another one.
+    wrappers = []
+
+    for cls in classes():
+        for name in METHODS:
+            for owner in cls.__mro__:
+                if name in owner.__dict__:
+                    function = owner.__dict__[name]
+                    break
+
+            originals[(cls, name)] = cls.__dict__.get(name)
+            wrappers.append((cls, name, function))
+
+    for cls, name, function in wrappers:
+        if name == "mutate":
+            setattr(cls, name, instrument_mutate(cls, function))
+        else:
+            setattr(cls, name, instrument_render(cls, function))
+
+    # imported here, the blocks module imports the primitives.
+    from ..blocks import request
+
+    originals[(request, "mutate")] = request.__dict__["mutate"]
+    request.mutate                 = instrument_request_mutate(request.__dict__["mutate"])
+
+
+def disable ():
+    """
+    Stop counting and put the original methods back. Counters gathered so far are kept.
+    """
+
+    global callback
+
+    callback = None
+
+    for (cls, name), function in originals.items():
+        if function is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, function)
+
+    originals.clear()
+
+
+def is_enabled ():
+    """
+    :rtype:  Boolean
+    :returns: Whether mutate() and render() calls are being counted
+    """
+
+    return bool(originals)
+
+
+def clear (primitives):
+    """
+    Zero the counters of the given primitives.
+
+    :type  primitives: Iterable
+    :param primitives: Primitives to clear
+    """
+
+    for primitive in primitives:
+        primitive.counters = None
+
+
+def hottest (primitives, counter="render_seconds", count=10):
+    """
+    Rank primitives by one of their counters, to find the field responsible for a throughput drop.
+
+    :type  primitives: Iterable
+    :param primitives: Primitives to rank, ie: every primitive of a request
+    :type  counter:    String
+    :param counter:    (Optional, def=render_seconds) Name of the counter to rank on, one of COUNTER_NAMES
+    :type  count:      Integer
+    :param count:      (Optional, def=10) Number of primitives to return
+
+    :rtype:  List
+    :returns: (primitive, stats) tuples, highest counter first
+    """
+
+    ranked = [(primitive, primitive.stats()) for primitive in primitives]
+    ranked.sort(key=lambda item: item[1][counter], reverse=True)
+
+    return ranked[:count]
@@ -0,0 +1,470 @@
+import array
+
+
+def library_length (sequence):
+    """
+    Length of a fuzz library. Virtual libraries expose a 'length' attribute since, under Python 2, len() can not
+    report more than sys.maxsize entries, which a 64-bit full range easily exceeds.
+
+    :type  sequence: Sequence
+    :param sequence: Fuzz library
+
+    :rtype:  Integer
+    :returns: Number of entries in the library
+    """
+
+    length = getattr(sequence, "length", None)
+
+    if length is None:
+        return len(sequence)
+
+    return length
+
+
+def entry_lengths (sequence):
+    """
+    Generate the length of every entry of a fuzz library, without building the entries where the library supports
+    that.
+
+    :type  sequence: Sequence
+    :param sequence: Fuzz library
+    """
+
+    if hasattr(sequence, "lengths"):
+        for length in sequence.lengths():
+            yield length
+    else:
+        for entry in sequence:
+            yield len(entry)
+
+
+def entry_prefix (sequence, index, length):
+    """
+    The first length characters of a fuzz library entry, without building the rest of the entry where the library
+    supports that.
+
+    :type  sequence: Sequence
+    :param sequence: Fuzz library
+    :type  index:    Integer
+    :param index:    Library index
+    :type  length:   Integer
+    :param length:   Number of characters to return
+
+    :rtype:  String
+    :returns: Prefix of the entry
+    """
+
+    if hasattr(sequence, "entry_prefix"):
+        return sequence.entry_prefix(index, length)
+
+    return sequence[index][:length]
+
+
+class lazy_library (object):
+    """
+    A read-only fuzz library that stores each entry as a recipe and only builds the string when that entry is fetched.
+
+    A recipe is either a literal string or a tuple of (sequence, count) segments, the entry being the concatenation of
+    every sequence repeated count times. Long repetitive entries therefore cost a couple of references instead of up to
+    a megabyte each, and the library can be built (or inherited by a forked worker) for next to nothing.
+    """
+
+    def __init__ (self, recipes=None):
+        """
+        :type  recipes: List
+        :param recipes: (Optional, def=None) Initial recipes, literal strings or tuples of (sequence, count) segments.
+        """
+
+        self.recipes = list(recipes or [])
+
+
+    def append (self, value):
+        """
+        Add a literal entry to the library.
+
+        :type  value: String
+        :param value: Literal fuzz value
+        """
+
+        self.recipes.append(value)
+
+
+    def append_repeated (self, *segments):
+        """
+        Add an entry built from one or more (sequence, count) segments, ie: append_repeated(("A", 5000)) stands for
+        "A" * 5000 and append_repeated(("B", 64), ("\\x00", 1), ("B", 64)) for a null byte between two runs of "B".
+
+        :type  segments: Tuples
+        :param segments: (sequence, count) pairs making up the entry
+        """
+
+        self.recipes.append(tuple(segments))
+
+
+    def entry_length (self, index):
+        """
+        Calculate the length of an entry without building it.
+
+        :type  index: Integer
+        :param index: Library index
+
+        :rtype:  Integer
+        :returns: Length of the entry at the given index
+        """
+
+        recipe = self.recipes[index]
+
+        if type(recipe) is not tuple:
+            return len(recipe)
+
+        return sum([len(sequence) * count for sequence, count in recipe])
+
+
+    def entry_prefix (self, index, length):
+        """
+        Build only the first length characters of an entry.
+
+        :type  index:  Integer
+        :param index:  Library index
+        :type  length: Integer
+        :param length: Number of characters to build
+
+        :rtype:  String
+        :returns: Prefix of the entry at the given index
+        """
+
+        recipe = self.recipes[index]
+
+        if type(recipe) is not tuple:
+            return recipe[:length]
+
+        prefix = []
+
+        for sequence, count in recipe:
+            if length <= 0:
+                break
+
+            if not sequence:
+                continue
+
+            # only repeat the sequence as many times as needed to cover what is left of the prefix.
+            segment = (sequence * min(count, -(-length // len(sequence))))[:length]
+            length -= len(segment)
+
+            prefix.append(segment)
+
+        return "".join(prefix)
+
+
+    def lengths (self):
+        """
+        Generate the length of every entry, in library order, without building any of them.
+        """
+
+        for index in range(len(self.recipes)):
+            yield self.entry_length(index)
+
+
+    def __len__ (self):
+        return len(self.recipes)
+
+
+    def __getitem__ (self, index):
+        if isinstance(index, slice):
+            return lazy_library(self.recipes[index])
+
+        recipe = self.recipes[index]
+
+        if type(recipe) is not tuple:
+            return recipe
+
+        if len(recipe) == 1:
+            sequence, count = recipe[0]
+            return sequence * count
+
+        return "".join([sequence * count for sequence, count in recipe])
+
+
+    def __iter__ (self):
+        for index in range(len(self.recipes)):
+            yield self[index]
+
+
+    def __add__ (self, other):
+        if isinstance(other, lazy_library):
+            return lazy_library(self.recipes + other.recipes)
+
+        return lazy_library(self.recipes + list(other))
+
+
+class chained_library (object):
+    """
+    A read-only view over several fuzz libraries, indexed as if they had been concatenated.
+
+    Unlike list concatenation nothing is copied, the view only keeps references to the underlying sequences and
+    resolves each index against their current lengths, so it stays valid as they grow.
+    """
+
+    def __init__ (self, *sequences):
+        """
+        :type  sequences: Sequences
+        :param sequences: Libraries to chain, in order
+        """
+
+        self.sequences = sequences
+
+
+    @property
+    def length (self):
+        return sum([library_length(sequence) for sequence in self.sequences])
+
+
+    def __len__ (self):
+        return self.length
+
+
+    def __getitem__ (self, index):
+        if index < 0:
+            index += self.length
+
+        if index >= 0:
+            for sequence in self.sequences:
+                length = library_length(sequence)
+
+                if index < length:
+                    return sequence[index]
+
+                index -= length
+
+        raise IndexError("chained_library index out of range")
+
+
+    def entry_length (self, index):
+        """
+        Calculate the length of an entry, without building it where the underlying library supports that.
+
+        :type  index: Integer
+        :param index: Library index
+
+        :rtype:  Integer
+        :returns: Length of the entry at the given index
+        """
+
+        if index < 0:
+            index += self.length
+
+        if index >= 0:
+            for sequence in self.sequences:
+                length = library_length(sequence)
+
+                if index < length:
+                    if hasattr(sequence, "entry_length"):
+                        return sequence.entry_length(index)
+
+                    return len(sequence[index])
+
+                index -= length
+
+        raise IndexError("chained_library index out of range")
+
+
+    def entry_prefix (self, index, length):
+        """
+        The first length characters of an entry, without building the rest of it where the underlying library supports
+        that.
+
+        :type  index:  Integer
+        :param index:  Library index
+        :type  length: Integer
+        :param length: Number of characters to return
+
+        :rtype:  String
+        :returns: Prefix of the entry at the given index
+        """
+
+        if index < 0:
+            index += self.length
+
+        if index >= 0:
+            for sequence in self.sequences:
+                sequence_length = library_length(sequence)
+
+                if index < sequence_length:
+                    return entry_prefix(sequence, index, length)
+
+                index -= sequence_length
+
+        raise IndexError("chained_library index out of range")
+
+
+    def lengths (self):
+        """
+        Generate the length of every entry, in library order.
+        """
+
+        for sequence in self.sequences:
+            for length in entry_lengths(sequence):
+                yield length
+
+
+    def __iter__ (self):
+        for sequence in self.sequences:
+            for entry in sequence:
+                yield entry
+
+
+class indexed_library (object):
+    """
+    A read-only view exposing a selection of the entries of another fuzz library, given as a sequence of indexes into
+    it, without copying the entries themselves.
+    """
+
+    def __init__ (self, sequence, indexes):
+        """
+        :type  sequence: Sequence
+        :param sequence: Underlying fuzz library
+        :type  indexes:  Sequence
+        :param indexes:  Indexes of the selected entries, in the order to expose them
+        """
+
+        self.sequence = sequence
+        self.indexes  = indexes
+
+
+    def entry_length (self, index):
+        """
+        Calculate the length of an entry, without building it where the underlying library supports that.
+
+        :type  index: Integer
+        :param index: Index into the selection
+
+        :rtype:  Integer
+        :returns: Length of the entry at the given index
+        """
+
+        if hasattr(self.sequence, "entry_length"):
+            return self.sequence.entry_length(self.indexes[index])
+
+        return len(self.sequence[self.indexes[index]])
+
+
+    def lengths (self):
+        """
+        Generate the length of every selected entry.
+        """
+
+        for index in range(len(self.indexes)):
+            yield self.entry_length(index)
+
+
+    def __len__ (self):
+        return len(self.indexes)
+
+
+    def __getitem__ (self, index):
+        return self.sequence[self.indexes[index]]
+
+
+    def __iter__ (self):
+        for index in self.indexes:
+            yield self.sequence[index]
+
+
+class integer_range (object):
+    """
+    A virtual, read-only library holding every integer from start up to but excluding stop, in constant memory.
+    """
+
+    def __init__ (self, start, stop):
+        """
+        :type  start: Integer
+        :param start: First integer of the range
+        :type  stop:  Integer
+        :param stop:  Integer the range stops short of
+        """
+
+        self.start  = start
+        self.stop   = stop
+        self.length = max(stop - start, 0)
+
+
+    def __len__ (self):
+        return self.length
+
+
+    def __getitem__ (self, index):
+        if index < 0:
+            index += self.length
+
+        if not 0 <= index < self.length:
+            raise IndexError("integer_range index out of range")
+
+        return self.start + index
+
+
+    def __contains__ (self, value):
+        return self.start <= value < self.stop
+
+
+    def __iter__ (self):
+        value = self.start
+
+        while value < self.stop:
+            yield value
+            value += 1
+
+
+class integer_array (object):
+    """
+    A growable integer library stored in an array of the narrowest unsigned type able to hold max_num, rather than as
+    a list of int objects. Should a value not fit (ie: negative), the storage falls back to a plain list.
+    """
+
+    def __init__ (self, max_num, values=()):
+        """
+        :type  max_num: Integer
+        :param max_num: Largest value the library is expected to hold
+        :type  values:  Iterable
+        :param values:  (Optional, def=()) Initial values
+        """
+
+        self.values = []
+
+        for typecode in "BHIL":
+            if 0 <= max_num < 1 << (8 * array.array(typecode).itemsize):
+                self.values = array.array(typecode)
+                break
+
+        for value in values:
+            self.append(value)
+
+
+    def append (self, value):
+        """
+        Add a value to the library.
+
+        :type  value: Integer
+        :param value: Value to add
+        """
+
+        try:
+            self.values.append(value)
+        except (OverflowError, TypeError):
+            self.values = list(self.values)
+            self.values.append(value)
+
+
+    def __len__ (self):
+        return len(self.values)
+
+
+    def __getitem__ (self, index):
+        return self.values[index]
+
+
+    def __contains__ (self, value):
+        return value in self.values
+
+
+    def __iter__ (self):
+        return iter(self.values)
@@ -1,8 +1,50 @@
+import hashlib
+import os
 import random
-from base import base
+from binascii import unhexlify
+from .base import base
+
+def random_bytes (length, source=None, out=None):
+    """
+    Generate length random bytes in one go rather than a byte at a time.
+
+    :type  length: Integer
+    :param length: Number of bytes to generate
+    :type  source: Object
+    :param source: (Optional, def=None) Where to draw the bytes from: None for the (seedable) random module, a
+                   random.Random instance, "urandom" for os.urandom() or a NumPy generator / RandomState
+    :type  out:    Buffer
+    :param out:    (Optional, def=None) Preallocated bytearray or writable memoryview to write the bytes to the start of
+
+    :rtype:  Raw
+    :returns: The random bytes, or out when given
+    """
+
+    if length <= 0:
+        data = ""
+    elif source is None or isinstance(source, random.Random):
+        # a single getrandbits() call, converted through its hexadecimal representation.
+        data = unhexlify("%0*x" % (length * 2, (source or random).getrandbits(length * 8)))
+    elif source == "urandom":
+        data = os.urandom(length)
+    elif hasattr(source, "bytes"):
+        data = source.bytes(length)
+    else:
+        raise ValueError("unsupported random source: %r" % (source,))
+
+    if out is None:
+        return data
+
+    if len(out) < length:
+        raise ValueError("output buffer holds %d bytes, %d needed" % (len(out), length))
+
+    out[:length] = data
+    return out
 
 class random_data (base):
-    def __init__ (self, value, min_length, max_length, max_mutations=25, fuzzable=True, step=None, name=None):
+    __slots__ = ("min_length", "max_length", "max_mutations", "step", "source", "seed")
+
+    def __init__ (self, value, min_length, max_length, max_mutations=25, fuzzable=True, step=None, name=None, source=None, seed=None):
         """
         Generate a random chunk of data while maintaining a copy of the original. A random length range can be specified.
         For a static length, set min/max length to be the same.
@@ -21,9 +63,19 @@ class random_data (base):
         @param step:          (Optional, def=None) If not null, step count between min and max reps, otherwise random
         @type  name:          String
         @param name:          (Optional, def=None) Specifying a name gives you direct access to a primitive
+        @type  source:        Object
+        @param source:        (Optional, def=None) Random source, see random_bytes(). Lengths are drawn from it too when
+                              it is a random.Random instance, from the random module otherwise
+        @type  seed:          Raw
+        @param seed:          (Optional, def=None) Campaign seed. If set, the length and content of each mutation are a
+                              pure function of (seed, name, mutation number) and source is ignored. Requires a name, which
+                              tells the streams of the seeded primitives of a request apart
         """
         super(random_data, self).__init__()
 
+        if seed is not None and name is None:
+            raise ValueError("a seeded random_data primitive needs a name, unnamed ones would all share one stream")
+
         self.value         = self.original_value = str(value)
         self.min_length    = min_length
         self.max_length    = max_length
@@ -31,11 +83,10 @@ class random_data (base):
         self.fuzzable      = fuzzable
         self.step          = step
         self.name          = name
+        self.source        = source
+        self.seed          = seed
 
         self.s_type        = "random_data"  # for ease of object identification
-        self.rendered      = ""             # rendered value
-        self.fuzz_complete = False          # flag if this primitive has been completely fuzzed
-        self.mutant_index  = 0              # current mutation number
 
         if self.step:
             self.max_mutations = (self.max_length - self.min_length) / self.step + 1
@@ -56,19 +107,12 @@ class random_data (base):
         # if fuzzing was disabled or complete, and mutate() is called, ensure the original value is restored.
         if not self.fuzzable or self.fuzz_complete:
             self.value = self.original_value
+            self.dirty = True
             return False
 
-        # select a random length for this string.
-        if not self.step:
-            length = random.randint(self.min_length, self.max_length)
-        # select a length function of the mutant index and the step.
-        else:
-            length = self.min_length + self.mutant_index * self.step
-
-        # reset the value and generate a random string of the determined length.
-        self.value = ""
-        for i in xrange(length):
-            self.value += chr(random.randint(0, 255))
+        # generate a random string for this mutation.
+        self.value = self.value_at(self.mutant_index)
+        self.dirty = True
 
         # increment the mutation count.
         self.mutant_index += 1
@@ -76,6 +120,153 @@ class random_data (base):
         return True
 
 
+    def checkpoint (self):
+        """
+        Capture the mutation state, see base.checkpoint(). Unseeded mutations can not be regenerated, their current
+        value is kept along with the state of the generator drawing them, when it is one of the random module's.
+
+        :rtype:  Tuple
+        :returns: (mutant_index, fuzz_complete, value[, generator state])
+        """
+
+        if self.seed is not None:
+            return super(random_data, self).checkpoint()
+
+        value = () if self.value is self.original_value else (self.value,)
+        state = (self.mutant_index, self.fuzz_complete, value)
+
+        if self.source is None or isinstance(self.source, random.Random):
+            state += ((self.source or random).getstate(),)
+
+        return state
+
+
+    def restore (self, state):
+        """
+        Go back to a mutation state captured by checkpoint(), restoring the generator state it holds if any.
+
+        :type  state: Tuple
+        :param state: Snapshot returned by checkpoint()
+        """
+
+        if len(state) > 3:
+            (self.source or random).setstate(state[3])
+
+        super(random_data, self).restore(state)
+
+
+    def value_at (self, index):
+        """
+        Generate a random string for mutation number index. Its length is a function of index when a step is set, the
+        content is freshly drawn from the random source on every call.
+
+        :type  index: Integer
+        :param index: Mutation number
+
+        :rtype:  Raw
+        :returns: Random data
+        """
+
+        length, source = self.mutation_plan(index)
+
+        return random_bytes(length, source)
+
+
+    def mutation_plan (self, index):
+        """
+        Select the length of mutation number index and the random source to draw its content from.
+
+        :type  index: Integer
+        :param index: Mutation number
+
+        :rtype:  Tuple
+        :returns: (length, source)
+        """
+
+        # seeded mode, every mutation gets its own generator so any one of them can be regenerated on its own.
+        if self.seed is not None:
+            generator = self.mutation_random(index)
+            return self.length_at(index, generator), generator
+
+        if isinstance(self.source, random.Random):
+            return self.length_at(index, self.source), self.source
+
+        return self.length_at(index), self.source
+
+
+    def render_into (self, index, out, position):
+        """
+        Generate mutation number index straight into out at the given position.
+
+        :type  index:    Integer
+        :param index:    Mutation number
+        :type  out:      Buffer
+        :param out:      Preallocated bytearray or writable memoryview
+        :type  position: Integer
+        :param position: Offset in out to render at
+
+        :rtype:  Integer
+        :returns: Offset just past the rendered mutation
+        """
+
+        if not 0 <= index < self.num_mutations():
+            raise IndexError("mutation index %d out of range" % index)
+
+        length, source = self.mutation_plan(index)
+        end            = self.check_room(out, position, length)
+
+        try:
+            target = memoryview(out)[position:end]
+        except NameError:
+            # Python 2.6 has no memoryview to write through, copy the bytes in.
+            out[position:end] = random_bytes(length, source)
+        else:
+            random_bytes(length, source, target)
+
+        return end
+
+
+    def mutation_random (self, index):
+        """
+        Derive the generator for mutation number index in seeded mode, counter style: the generator is seeded with a
+        hash of (seed, name, index), so it does not depend on any other mutation having been generated before.
+
+        :type  index: Integer
+        :param index: Mutation number
+
+        :rtype:  random.Random
+        :returns: Generator for this mutation
+        """
+
+        key = "%s\x00%s\x00%d" % (self.seed, self.name, index)
+
+        if not isinstance(key, bytes):
+            key = key.encode("utf-8")
+
+        return random.Random(int(hashlib.sha1(key).hexdigest(), 16))
+
+
+    def length_at (self, index, generator=random):
+        """
+        Select the length of mutation number index, random unless a step is set.
+
+        :type  index:     Integer
+        :param index:     Mutation number
+        :type  generator: Object
+        :param generator: (Optional, def=random) Generator to draw random lengths from
+
+        :rtype:  Integer
+        :returns: Length of the random string
+        """
+
+        # select a random length for this string.
+        if not self.step:
+            return generator.randint(self.min_length, self.max_length)
+
+        # select a length function of the mutant index and the step.
+        return self.min_length + index * self.step
+
+
     def num_mutations (self):
         """
         Calculate and return the total number of mutations for this individual primitive.
@@ -0,0 +1,129 @@
+# marks a (value, encoding) pair which could not be encoded, so that the exception is only paid for once.
+ENCODE_FAILED = object()
+
+
+class render_cache (object):
+    """
+    Cache of encoded strings, keyed on (value, encoding) and bounded by the number of bytes it holds. Values the
+    encoding can not handle are remembered as failures and rendered raw, like an uncached encode would.
+
+    Mutation passes walk the fuzz library in order and its encoded form outgrows any reasonable budget, so a least
+    recently used policy would evict every entry before its next use. Once full the cache rather stops admitting new
+    entries, and the values it holds hit on every following pass.
+
+    Encoding short values is cheaper than a cache lookup, those shorter than min_length bypass the cache. Caching is
+    disabled unless a byte budget is given.
+    """
+
+    def __init__ (self, max_bytes=0, min_length=1024):
+        """
+        :type  max_bytes:  Integer
+        :param max_bytes:  (Optional, def=0) Byte budget, counting both the values and their encoded form. 0 disables
+                           caching
+        :type  min_length: Integer
+        :param min_length: (Optional, def=1024) Length under which values are encoded without going through the cache
+        """
+
+        self.max_bytes  = max_bytes
+        self.min_length = min_length
+        self.entries    = {}
+        self.size       = 0
+        self.hits       = 0
+        self.misses     = 0
+        self.failures   = 0
+        self.rejections = 0
+
+
+    def encode (self, value, encoding):
+        """
+        Encode value, falling back to the raw value if it can not be encoded.
+
+        :type  value:    String
+        :param value:    Value to encode
+        :type  encoding: String
+        :param encoding: Encoding name, ie: utf_16_le
+
+        :rtype:  Raw
+        :returns: Encoded value
+        """
+
+        if len(value) < self.min_length or not self.max_bytes:
+            try:
+                return str(value).encode(encoding)
+            except:
+                return value
+
+        key = (value, encoding)
+
+        try:
+            rendered = self.entries[key]
+        except KeyError:
+            self.misses += 1
+
+            try:
+                rendered = str(value).encode(encoding)
+            except:
+                self.failures += 1
+                rendered       = ENCODE_FAILED
+
+            self.store(key, rendered)
+        else:
+            self.hits += 1
+
+        if rendered is ENCODE_FAILED:
+            return value
+
+        return rendered
+
+
+    def store (self, key, rendered):
+        """
+        Add an entry, unless it does not fit in what is left of the byte budget.
+        """
+
+        cost = self.cost(key, rendered)
+
+        if self.size + cost > self.max_bytes:
+            self.rejections += 1
+            return
+
+        self.entries[key] = rendered
+        self.size        += cost
+
+
+    def cost (self, key, rendered):
+        """
+        Bytes held by an entry, the cached key keeps the original value alive too.
+        """
+
+        if rendered is ENCODE_FAILED:
+            return len(key[0])
+
+        return len(key[0]) + len(rendered)
+
+
+    def clear (self):
+        """
+        Drop every entry, the counters are left alone.
+        """
+
+        self.entries.clear()
+        self.size = 0
+
+
+    def stats (self):
+        """
+        Snapshot of the cache counters.
+
+        :rtype:  Dictionary
+        :returns: hits, misses, failures, rejections, entries and bytes held
+        """
+
+        return {
+            "hits":       self.hits,
+            "misses":     self.misses,
+            "failures":   self.failures,
+            "rejections": self.rejections,
+            "entries":    len(self.entries),
+            "bytes":      self.size,
+        }
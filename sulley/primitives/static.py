@@ -1,6 +1,8 @@
-from base import base
+from .base import base
 
 class static (base):
+    __slots__ = ()
+
     def __init__ (self, value, name=None):
         """
         Primitive that contains static content.
@@ -14,9 +16,7 @@ class static (base):
         self.value         = self.original_value = value
         self.name          = name
         self.fuzzable      = False       # every primitive needs this attribute.
-        self.mutant_index  = 0
         self.s_type        = "static"    # for ease of object identification
-        self.rendered      = ""
         self.fuzz_complete = True
 
 
@@ -1,15 +1,57 @@
-from base import base
+from . import dictionaries
+from .base import base
+from .corpus import entry_types
+from .render_cache import render_cache
+from .library import chained_library, entry_lengths, entry_prefix, indexed_library, integer_array, lazy_library, \
+                    library_length
+
+class string_type (type):
+    """
+    Type of the string primitive, keeping string.fuzz_library, the name of the global library at class level before it
+    became global_library, as an alias of it. Instances still go through base's fuzz_library.
+    """
+
+    @property
+    def fuzz_library (cls):
+        # the global library is built on first use, like any instance's.
+        if not string.global_library:
+            cls("").build_library()
+
+        return string.global_library
+
+    @fuzz_library.setter
+    def fuzz_library (cls, library):
+        string.global_library = library
+
 
 class string (base):
-    # store fuzz_library as a class variable to avoid copying the ~70MB structure across each instantiated primitive.
-    fuzz_library = []
+    __metaclass__ = string_type
+    __slots__     = ("size", "padding", "encoding", "max_len", "this_library", "mutation_view")
+
+    # store the global fuzz library as a class variable to avoid copying it across each instantiated primitive, whose
+    # fuzz_library points at it. the long strings are kept as recipes in a lazy_library and only built when indexed,
+    # rather than as a ~70MB list of strings.
+    global_library = []
+
+    # global_library truncated to a given max_len, built once per distinct max_len and shared by all instances using it.
+    # each entry holds (source library, truncated library), so that a rebuilt global_library is noticed.
+    truncated_libraries = {}
+
+    # indexes of the entries of a (possibly truncated) fuzz library which fit a given static size, built once and shared
+    # by all instances using the same library and size. keyed on (id(library), size), each holding (library, indexes).
+    size_indexes = {}
+
+    # encoded renders of long values, shared by all instances. disabled by default, replace it with one given a byte
+    # budget to cache renders across mutation passes.
+    render_cache = render_cache()
 
     def __init__ (self, value, size=-1, padding="\x00", encoding="ascii", fuzzable=True, max_len=0, name=None):
         """
-        Primitive that cycles through a library of "bad" strings. The class variable 'fuzz_library' contains a list of
-        smart fuzz values global across all instances. The 'this_library' variable contains fuzz values specific to
-        the instantiated primitive. This allows us to avoid copying the near ~70MB fuzz_library data structure across
-        each instantiated primitive.
+        Primitive that cycles through a library of "bad" strings. The class variable 'global_library' contains a list
+        of smart fuzz values global across all instances, referenced by each instance's 'fuzz_library'. The
+        'this_library' variable contains fuzz values specific to the instantiated primitive. This allows us to avoid
+        copying the global library data structure across each instantiated primitive, whose long entries are only
+        materialized when mutated to.
 
         @type  value:    String
         @param value:    Default string value
@@ -35,9 +77,6 @@ class string (base):
         self.name          = name
 
         self.s_type        = "string"  # for ease of object identification
-        self.rendered      = ""        # rendered value
-        self.fuzz_complete = False     # flag if this primitive has been completely fuzzed
-        self.mutant_index  = 0         # current mutation number
 
         # add this specific primitives repitition values to the unique fuzz library.
         self.this_library =\
@@ -52,9 +91,29 @@ class string (base):
             self.value * 100 + "\xfe",
             ]
 
+        # delete strings which length is greater than max_len.
+        if max_len > 0 and any(len(s) > max_len for s in self.this_library):
+            self.this_library = self.unique([s[:max_len] for s in self.this_library])
+
+        self.max_len       = max_len
+        self.mutation_view = None
+
+        # the fuzz library and the view mutations go through are built on first use, see build_library() and
+        # mutation_library.
+
+
+    def build_library (self):
+        """
+        Build the global fuzz library if it does not exist yet and return the one this instance uses: the global library
+        itself, or its copy truncated to max_len.
+
+        :rtype:  Sequence
+        :returns: Fuzz library
+        """
+
         # if the fuzz library has not yet been initialized, do so with all the global values.
-        if not self.fuzz_library:
-            string.fuzz_library  =\
+        if not string.global_library:
+            string.global_library = lazy_library(
             [
                 # omission.
                 "",
@@ -112,7 +171,7 @@ class string (base):
                 # miscellaneous.
                 "\r\n" * 100,
                 "<>" * 500,         # sendmail crackaddr (http://lsd-pl.net/other/sendmail.txt)
-            ]
+            ])
 
             # add some long strings.
             self.add_long_strings("A")
@@ -148,91 +207,131 @@ class string (base):
 
             # add some long strings with null bytes thrown in the middle of it.
             for length in [128, 256, 1024, 2048, 4096, 32767, 0xFFFF]:
-                s = "B" * length
-                s = s[:len(s)/2] + "\x00" + s[len(s)/2:]
-                string.fuzz_library.append(s)
+                string.global_library.append_repeated(("B", length / 2), ("\x00", 1), ("B", length - length / 2))
 
-            # if the optional file '.fuzz_strings' is found, parse each line as a new entry for the fuzz library.
-            try:
-                fh = open(".fuzz_strings", "r")
+            # if the optional file '.fuzz_strings' is found, chain its entries onto the fuzz library. packed corpora are
+            # memory mapped, their entries are not copied in.
+            custom_library = dictionaries.fuzz_strings()
 
-                for fuzz_string in fh.readlines():
-                    fuzz_string = fuzz_string.rstrip("\r\n")
+            if custom_library:
+                string.global_library = chained_library(string.global_library, custom_library)
 
-                    if fuzz_string != "":
-                        string.fuzz_library.append(fuzz_string)
+        # instances with a max_len share a copy of the library cut down to it.
+        if self.max_len > 0:
+            return self.truncated_library(self.max_len)
 
-                fh.close()
-            except:
-                pass
+        return string.global_library
 
-        # delete strings which length is greater than max_len.
-        if max_len > 0:
-            if any(len(s) > max_len for s in self.this_library):
-                self.this_library = list(set([s[:max_len] for s in self.this_library]))
 
-            if any(len(s) > max_len for s in self.fuzz_library):
-                self.fuzz_library = list(set([s[:max_len] for s in self.fuzz_library]))
+    @property
+    def mutation_library (self):
+        """
+        View over the shared and instance specific libraries, indexed by mutant_index without copying either one. With
+        a static size, only the library items which fit in it are mutated through. Built on first use.
+        """
 
+        if self.mutation_view is None:
+            if self.size == -1:
+                self.mutation_view = chained_library(self.fuzz_library, self.this_library)
+            else:
+                self.mutation_view = chained_library(indexed_library(self.fuzz_library, self.size_index(self.size)),
+                                                     [s for s in self.this_library if len(s) <= self.size])
 
-    def add_long_strings (self, sequence):
+        return self.mutation_view
+
+
+    def truncated_library (self, max_len):
         """
-        Given a sequence, generate a number of selectively chosen strings lengths of the given sequence and add to the
-        string heuristic library.
+        Return the global fuzz library with every entry cut down to max_len characters and duplicates removed, keeping
+        the order of first appearance. The result is cached at class level and shared by every instance with the same
+        max_len, long entries are never built past max_len characters.
 
-        @type  sequence: String
-        @param sequence: Sequence to repeat for creation of fuzz strings.
+        @type  max_len: Integer
+        @param max_len: Maximum string length
+
+        :rtype:  List
+        :returns: Truncated library, or the global library itself if none of its entries exceed max_len
         """
 
-        for length in [128, 255, 256, 257, 511, 512, 513, 1023, 1024, 2048, 2049, 4095, 4096, 4097, 5000, 10000, 20000,
-                       32762, 32763, 32764, 32765, 32766, 32767, 32768, 32769, 0xFFFF-2, 0xFFFF-1, 0xFFFF, 0xFFFF+1,
-                       0xFFFF+2, 99999, 100000, 500000, 1000000]:
+        source, library = string.truncated_libraries.get(max_len, (None, None))
+
+        if source is not string.global_library:
+            source = string.global_library
+
+            if any(length > max_len for length in source.lengths()):
+                library = self.unique([entry_prefix(source, i, max_len) for i in xrange(library_length(source))])
+            else:
+                library = source
 
-            long_string = sequence * length
-            string.fuzz_library.append(long_string)
+            string.truncated_libraries[max_len] = (source, library)
 
+        return library
 
-    def mutate (self):
+
+    def size_index (self, size):
         """
-        Mutate the primitive by stepping through the fuzz library extended with the "this" library, return False on
-        completion.
+        Return the indexes of the fuzz library items no longer than size, in library order. The index is cached at
+        class level and shared by every instance with the same library and size.
+
+        @type  size: Integer
+        @param size: Static size of the field
 
-        :rtype:  Boolean
-        :returns: True on success, False otherwise.
+        :rtype:  Sequence
+        :returns: Indexes of the library items which fit
         """
 
-        # loop through the fuzz library until a suitable match is found.
-        while 1:
-            # if we've ran out of mutations, raise the completion flag.
-            if self.mutant_index == self.num_mutations():
-                self.fuzz_complete = True
+        key              = (id(self.fuzz_library), size)
+        library, indexes = string.size_indexes.get(key, (None, None))
 
-            # if fuzzing was disabled or complete, and mutate() is called, ensure the original value is restored.
-            if not self.fuzzable or self.fuzz_complete:
-                self.value = self.original_value
-                return False
+        if library is not self.fuzz_library:
+            library = self.fuzz_library
+            indexes = integer_array(library_length(library))
 
-            # update the current value from the fuzz library.
-            self.value = (self.fuzz_library + self.this_library)[self.mutant_index]
+            for index, length in enumerate(entry_lengths(library)):
+                if length <= size:
+                    indexes.append(index)
 
-            # increment the mutation count.
-            self.mutant_index += 1
+            string.size_indexes[key] = (library, indexes)
 
-            # if the size parameter is disabled, break out of the loop right now.
-            if self.size == -1:
-                break
+        return indexes
+
+
+    def unique (self, values):
+        """
+        Remove duplicate values, keeping the order of first appearance.
+
+        @type  values: List
+        @param values: Values to filter
+
+        :rtype:  List
+        :returns: Unique values
+        """
 
-            # ignore library items greather then user-supplied length.
-            # XXX - might want to make this smarter.
-            if len(self.value) > self.size:
-                continue
+        seen   = set()
+        unique = []
 
-            # pad undersized library items.
-            if len(self.value) < self.size:
-                self.value += self.padding * (self.size - len(self.value))
-                break
+        for value in values:
+            if value not in seen:
+                seen.add(value)
+                unique.append(value)
 
-        return True
+        return unique
+
+
+    def add_long_strings (self, sequence):
+        """
+        Given a sequence, generate a number of selectively chosen strings lengths of the given sequence and add to the
+        string heuristic library.
+
+        @type  sequence: String
+        @param sequence: Sequence to repeat for creation of fuzz strings.
+        """
+
+        for length in [128, 255, 256, 257, 511, 512, 513, 1023, 1024, 2048, 2049, 4095, 4096, 4097, 5000, 10000, 20000,
+                       32762, 32763, 32764, 32765, 32766, 32767, 32768, 32769, 0xFFFF-2, 0xFFFF-1, 0xFFFF, 0xFFFF+1,
+                       0xFFFF+2, 99999, 100000, 500000, 1000000]:
+
+            string.global_library.append_repeated((sequence, length))
 
 
     def num_mutations (self):
@@ -243,18 +342,44 @@ class string (base):
         :returns: Number of mutated forms this primitive can take
         """
 
-        return len(self.fuzz_library) + len(self.this_library)
+        return len(self.mutation_library)
+
+
+    def value_at (self, index):
+        """
+        Return the library item for mutation number index, padded to the static size if one was specified.
 
+        :type  index: Integer
+        :param index: Mutation number
 
-    def render (self):
+        :rtype:  String
+        :returns: Mutated value
         """
-        Render the primitive, encode the string according to the specified encoding.
+
+        value = self.mutation_library[index]
+
+        # pad undersized library items, mutation_library only holds the ones which fit.
+        if self.size != -1 and len(value) < self.size:
+            value += self.padding * (self.size - len(value))
+
+        return value
+
+
+    def render_value (self, value):
+        """
+        Render the given value, encode the string according to the specified encoding.
+
+        :type  value: String
+        :param value: Value to render
+
+        :rtype:  Raw
+        :returns: Rendered value
         """
 
-        # try to encode the string properly and fall back to the default value on failure.
-        try:
-            self.rendered = str(self.value).encode(self.encoding)
-        except:
-            self.rendered = self.value
+        # packed corpus entries are slices of a memory map, get at their bytes.
+        if isinstance(value, entry_types):
+            value = bytes(bytearray(value))
 
-        return self.rendered
+        # try to encode the string properly and fall back to the default value on failure. long values go through the
+        # shared cache, which also remembers the ones that fail to encode.
+        return string.render_cache.encode(value, self.encoding)
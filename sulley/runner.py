@@ -0,0 +1,227 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from .primitives.corpus import corpus, entry_types, write_corpus
+from .primitives.library import chained_library
+from .primitives.string import string
+
+PARTITIONS = ("stride", "range")
+
+# request built by the worker process, from the factory given to its runner.
+model = None
+
+
+def pack_library (library, directory):
+    """
+    Pack a fuzz library into a corpus file.
+
+    :rtype:  String
+    :returns: Path of the corpus file
+    """
+
+    fd, path = tempfile.mkstemp(prefix="sulley-", suffix=".corpus", dir=directory)
+    os.close(fd)
+
+    write_corpus(path, (bytes(bytearray(entry)) if isinstance(entry, entry_types) else entry for entry in library))
+
+    return path
+
+
+def share_libraries (factory, directory=None):
+    """
+    Build the model once and pack the string fuzz libraries worker processes would otherwise each build and keep a
+    private copy of into corpus files, which they map instead: the libraries truncated to a max_len and the entries of
+    a custom '.fuzz_strings' dictionary. The global library itself is built from recipes, workers inherit it when they
+    are forked.
+
+    :type  factory:   Function
+    :param factory:   Builds the request
+    :type  directory: String
+    :param directory: (Optional, def=system temporary directory) Where to write the corpus files
+
+    :rtype:  Tuple
+    :returns: (number of test cases of the model, path of the custom dictionary corpus or None if there is none to
+              pack, {max_len: path} of the truncated libraries)
+    """
+
+    total = factory().num_mutations()
+
+    if not string.global_library:
+        return total, None, {}
+
+    custom = None
+
+    # a packed dictionary is memory mapped already, only a line based one is held in memory.
+    if isinstance(string.global_library, chained_library):
+        dictionary = string.global_library.sequences[-1]
+
+        if not isinstance(dictionary, corpus):
+            custom = pack_library(dictionary, directory)
+
+    truncated = {}
+
+    for max_len, (source, library) in string.truncated_libraries.items():
+        if source is string.global_library and library is not source:
+            truncated[max_len] = pack_library(library, directory)
+
+    return total, custom, truncated
+
+
+def start_worker (factory, total, custom_path, truncated_paths):
+    """
+    Initialize a worker process: map the shared libraries in place of the string class libraries, then build the model.
+    """
+
+    global model
+
+    if custom_path is not None or truncated_paths:
+        # inherited from the parent when forked, built here otherwise.
+        if not string.global_library:
+            string("").fuzz_library
+
+        if custom_path is not None:
+            string.global_library = chained_library(string.global_library.sequences[0], corpus(custom_path))
+
+        string.truncated_libraries = dict((max_len, (string.global_library, corpus(path)))
+                                          for max_len, path in truncated_paths.items())
+
+    model = factory()
+
+    if model.num_mutations() != total:
+        raise RuntimeError("the worker model has %d test cases, the parent model %d" % (model.num_mutations(), total))
+
+
+def partition_indexes (total, worker, workers, partition):
+    """
+    Test case numbers handled by one worker.
+
+    :type  total:     Integer
+    :param total:     Number of test cases
+    :type  worker:    Integer
+    :param worker:    Worker number, 0 <= worker < workers
+    :type  workers:   Integer
+    :param workers:   Number of workers
+    :type  partition: String
+    :param partition: stride, each worker taking every workers-th test case, or range, each worker taking a contiguous
+                      slice of them
+
+    :rtype:  Sequence
+    :returns: Test case numbers
+    """
+
+    if partition == "stride":
+        return xrange(worker, total, workers)
+
+    return xrange(total * worker // workers, total * (worker + 1) // workers)
+
+
+def run_worker (task):
+    """
+    Run a worker's share of the test cases, rendering each one and handing it to the work function.
+
+    :rtype:  Tuple
+    :returns: (test cases run, seconds spent, (index, result) pairs of the test cases work returned something for)
+    """
+
+    worker, workers, partition, total, work = task
+
+    results = []
+    count   = 0
+    start   = time.time()
+
+    for index in partition_indexes(total, worker, workers, partition):
+        model.assign(model.mutation_values(index))
+
+        result = work(model, index, model.render())
+        count += 1
+
+        if result is not None:
+            results.append((index, result))
+
+    model.assign([])
+
+    return count, time.time() - start, results
+
+
+class runner (object):
+    """
+    Run the test cases of a request over a pool of worker processes. Each worker builds its own request from a factory,
+    but the string fuzz libraries are built once by the parent: the global library is inherited by the forked workers,
+    the truncated libraries and custom dictionary entries are packed into corpus files every worker memory maps, so
+    their pages are shared between all the workers and memory stays flat as workers are added. Test case numbers
+    are partitioned between the workers, which step through them with the incremental render of the request.
+
+    The factory and the work function are sent to the workers and so must be picklable, ie: module level functions.
+
+        def send (req, index, rendered):
+            ...
+            return crash_details or None
+
+        results = runner(build_request, workers=8).run(send)
+    """
+
+    def __init__ (self, factory, workers=None, partition="stride", directory=None):
+        """
+        :type  factory:   Function
+        :param factory:   Builds the request, called once by the parent and once by every worker
+        :type  workers:   Integer
+        :param workers:   (Optional, def=number of CPUs) Number of worker processes
+        :type  partition: String
+        :param partition: (Optional, def=stride) How test cases are split, see partition_indexes()
+        :type  directory: String
+        :param directory: (Optional, def=system temporary directory) Where the shared library files are written
+        """
+
+        if partition not in PARTITIONS:
+            raise ValueError("unknown partition %s, expected one of %s" % (partition, ", ".join(PARTITIONS)))
+
+        self.factory   = factory
+        self.workers   = workers or multiprocessing.cpu_count()
+        self.partition = partition
+        self.directory = directory
+
+
+    def run (self, work):
+        """
+        Run every test case of the request through the work function, in the worker processes.
+
+        :type  work: Function
+        :param work: Called as work(request, index, rendered test case) for each test case, returning a result or None
+
+        :rtype:  Dictionary
+        :returns: test_cases: number of test cases run, seconds: time spent by the workers, wall_seconds: time the run
+                  took, results: (index, result) pairs of the test cases a result was returned for, by index
+        """
+
+        start                = time.time()
+        total, custom, paths = share_libraries(self.factory, self.directory)
+        tasks                = [(worker, self.workers, self.partition, total, work) for worker in range(self.workers)]
+
+        try:
+            pool = multiprocessing.Pool(self.workers, start_worker, (self.factory, total, custom, paths))
+
+            try:
+                done = pool.map(run_worker, tasks, 1)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            for path in [custom] + list(paths.values()):
+                if path is not None:
+                    os.remove(path)
+
+        results = []
+
+        for count, seconds, worker_results in done:
+            results.extend(worker_results)
+
+        results.sort()
+
+        return {
+            "test_cases":   sum([count for count, seconds, worker_results in done]),
+            "seconds":      sum([seconds for count, seconds, worker_results in done]),
+            "wall_seconds": time.time() - start,
+            "results":      results,
+        }
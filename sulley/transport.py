@@ -0,0 +1,559 @@
+try:
+    import asyncio
+except ImportError:
+    try:
+        import trollius as asyncio
+    except ImportError:
+        asyncio = None
+
+if asyncio is not None:
+    Protocol = asyncio.Protocol
+
+    # 'async' became a keyword, older event loop modules only offer the function under that name.
+    ensure_future = getattr(asyncio, "ensure_future", None) or getattr(asyncio, "async")
+else:
+    Protocol = object
+
+PROTOCOLS = ("tcp", "udp")
+
+
+def require_asyncio ():
+    if asyncio is None:
+        raise ImportError("the transport needs asyncio, or trollius on Python 2")
+
+
+def raw (data):
+    """
+    Rendered bytes as the event loop wants them, text renders being sent byte for byte.
+    """
+
+    if isinstance(data, bytes):
+        return data
+
+    return data.encode("latin_1")
+
+
+class test_case (object):
+    """
+    One rendered mutation on its way to the target, and what came of it.
+    """
+
+    def __init__ (self, index, data):
+        self.index     = index    # position of the test case in the mutation stream.
+        self.data      = data     # rendered bytes sent to the target.
+        self.response  = None     # bytes the target answered with, if any, see sender.
+        self.error     = None     # exception the connection failed with, if any.
+        self.timed_out = False    # whether the target neither answered nor closed the connection in time.
+        self.timer     = None
+        self.chunks    = []       # answer received so far, while waiting for a kept alive connection to go quiet.
+        self.settle    = None     # timer finishing the test case once the connection went quiet.
+
+
+class connection (Protocol):
+    """
+    A connection to the target, carrying one test case at a time. Used as the protocol of TCP connections and UDP
+    endpoints alike.
+    """
+
+    def __init__ (self, pipeline):
+        self.pipeline  = pipeline
+        self.transport = None
+        self.case      = None     # test case in flight on the connection.
+        self.closed    = False
+        self.paused    = False    # whether the transport asked to stop writing until its buffer drains.
+
+
+    def connection_made (self, transport):
+        self.transport = transport
+
+
+    def data_received (self, data):
+        # bytes arriving while the connection sits in the pool belong to no test case and are dropped.
+        if self.case is not None and self.pipeline.response:
+            self.pipeline.received(self, data)
+
+
+    def datagram_received (self, data, address):
+        self.data_received(data)
+
+
+    def error_received (self, exc):
+        if self.case is not None:
+            self.pipeline.complete(self, None, exc)
+
+
+    def connection_lost (self, exc):
+        self.closed = True
+
+        if self.case is not None:
+            self.pipeline.complete(self, None, exc)
+
+
+    def pause_writing (self):
+        self.paused = True
+
+
+    def resume_writing (self):
+        self.paused = False
+        self.pipeline.written(self)
+
+
+    def send (self, data):
+        if self.pipeline.proto == "udp":
+            self.transport.sendto(data)
+        else:
+            self.transport.write(data)
+
+
+class sender (object):
+    """
+    Deliver a mutation stream to a target over TCP or UDP, keeping up to concurrency test cases in flight. Anything with
+    the mutate()/render() interface can be sent: a primitive, a request or a dedup filter.
+
+    A test case is over once the target answers, closes the connection or lets timeout seconds go by, or as soon as it
+    is written when no response is expected. Each test case goes out on a connection of its own, closed afterwards,
+    unless keep_alive pools the connections and reuses them for the following test cases.
+
+    The response of a test case is the first read or datagram the target answers with, the rest of the answer going
+    away with the connection. A kept alive TCP connection however can only be reused once the whole answer is in,
+    or what is left of it would be taken for the answer to the next test case: the test case then lasts until the
+    connection has been quiet for quiet seconds, or until the answer ends with terminator when the target's answers
+    have one, and its response holds everything received until then.
+
+    Mutations are only rendered once a slot is free, so rendering never gets ahead of the network by more than the
+    number of connections, and every connection only has a single test case to write at a time.
+
+    Written in callback style so that it runs on both asyncio and trollius:
+
+        target = sender("10.0.0.1", 80, concurrency=32, keep_alive=True)
+        target.run(req)
+        print target.sent, target.responses, target.timeouts, target.errors
+    """
+
+    def __init__ (self, host, port, proto="tcp", concurrency=16, keep_alive=False, timeout=5.0, response=True,
+                  callback=None, loop=None, quiet=0.001, terminator=None):
+        """
+        :type  host:        String
+        :param host:        Host name or address of the target
+        :type  port:        Integer
+        :param port:        Port of the target
+        :type  proto:       String
+        :param proto:       (Optional, def=tcp) tcp or udp
+        :type  concurrency: Integer
+        :param concurrency: (Optional, def=16) Number of test cases in flight at once
+        :type  keep_alive:  Boolean
+        :param keep_alive:  (Optional, def=False) Reuse connections across test cases
+        :type  timeout:     Float
+        :param timeout:     (Optional, def=5.0) Seconds a test case waits for the target to answer
+        :type  response:    Boolean
+        :param response:    (Optional, def=True) Wait for the target to answer every test case
+        :type  callback:    Function
+        :param callback:    (Optional, def=None) Called with every finished test_case, in completion order
+        :type  loop:        Event loop
+        :param loop:        (Optional, def=asyncio.get_event_loop()) Event loop to run on
+        :type  quiet:       Float
+        :param quiet:       (Optional, def=0.001) Seconds without data after which the answer on a kept alive TCP
+                            connection is taken as complete. Raise it for targets pausing in the middle of an answer
+        :type  terminator:  Raw
+        :param terminator:  (Optional, def=None) Bytes every answer of the target ends with, ie: "\r\n". The answer on a
+                            kept alive TCP connection is complete as soon as they are received, without waiting for
+                            the connection to go quiet
+        """
+
+        require_asyncio()
+
+        if proto not in PROTOCOLS:
+            raise ValueError("unknown protocol %s, expected one of %s" % (proto, ", ".join(PROTOCOLS)))
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.host        = host
+        self.port        = port
+        self.proto       = proto
+        self.concurrency = concurrency
+        self.keep_alive  = keep_alive
+        self.timeout     = timeout
+        self.response    = response
+        self.callback    = callback
+        self.loop        = loop if loop is not None else asyncio.get_event_loop()
+        self.quiet       = quiet
+        self.terminator  = raw(terminator) if terminator else None
+
+        self.mutable     = None
+        self.remaining   = None     # test cases left to send, None for the whole stream.
+        self.done        = None     # future resolved once the stream is exhausted and delivered.
+        self.idle        = []       # pooled connections waiting for a test case.
+        self.in_flight   = 0        # test cases rendered and not finished yet.
+        self.index       = 0        # number of test cases taken from the stream.
+
+        self.sent        = 0        # test cases written to the target.
+        self.responses   = 0        # test cases the target answered.
+        self.timeouts    = 0        # test cases the target let time out.
+        self.errors      = 0        # test cases which failed on a connection error.
+        self.connections = 0        # connections opened.
+
+
+    def start (self, mutable, count=None):
+        """
+        Start sending the mutations of mutable, from its current position on.
+
+        :type  mutable: primitive or request
+        :param mutable: Mutation stream
+        :type  count:   Integer
+        :param count:   (Optional, def=None) Stop after this many test cases rather than at the end of the stream
+
+        :rtype:  Future
+        :returns: Resolved with this sender once every test case finished
+        """
+
+        if self.done is not None and not self.done.done():
+            raise RuntimeError("the sender is already running")
+
+        self.mutable   = mutable
+        self.remaining = count
+        self.done      = asyncio.Future(loop=self.loop)
+
+        self.fill()
+
+        return self.done
+
+
+    def run (self, mutable, count=None):
+        """
+        Send the mutations of mutable and return once they all finished, see start().
+
+        :rtype:  sender
+        :returns: This sender, with its counters updated
+        """
+
+        return self.loop.run_until_complete(self.start(mutable, count))
+
+
+    def close (self):
+        """
+        Close the pooled connections.
+        """
+
+        while self.idle:
+            self.idle.pop().transport.close()
+
+
+    def fill (self):
+        """
+        Render test cases until every slot is taken or the stream is exhausted.
+        """
+
+        while self.in_flight < self.concurrency and self.mutable is not None:
+            if self.remaining is not None:
+                if not self.remaining:
+                    self.mutable = None
+                    break
+
+                self.remaining -= 1
+
+            if not self.mutable.mutate():
+                self.mutable = None
+                break
+
+            case = test_case(self.index, raw(self.mutable.render()))
+
+            self.index     += 1
+            self.in_flight += 1
+
+            self.dispatch(case)
+
+        if self.mutable is None and not self.in_flight and not self.done.done():
+            self.done.set_result(self)
+
+
+    def dispatch (self, case):
+        """
+        Send a test case on a pooled connection, or on a new one.
+        """
+
+        while self.idle:
+            protocol = self.idle.pop()
+
+            if not protocol.closed:
+                self.send(protocol, case)
+                return
+
+        if self.proto == "udp":
+            opening = self.loop.create_datagram_endpoint(lambda: connection(self), remote_addr=(self.host, self.port))
+        else:
+            opening = self.loop.create_connection(lambda: connection(self), self.host, self.port)
+
+        ensure_future(opening, loop=self.loop).add_done_callback(lambda future: self.connected(future, case))
+
+
+    def connected (self, future, case):
+        if future.exception() is not None:
+            case.error = future.exception()
+            self.finish(case)
+            return
+
+        transport, protocol = future.result()
+        self.connections   += 1
+
+        self.send(protocol, case)
+
+
+    def send (self, protocol, case):
+        protocol.case = case
+        protocol.send(case.data)
+
+        self.sent  += 1
+        case.timer  = self.loop.call_later(self.timeout, self.expire, protocol, case)
+
+        # finishing on the next loop iteration rather than right away lets the loop run between test cases.
+        if not self.response:
+            self.loop.call_soon(self.written, protocol)
+
+
+    def written (self, protocol):
+        """
+        Finish the test case in flight on a connection once it is written, when no response is expected. A connection
+        whose write buffer is full waits for the transport to drain it.
+        """
+
+        if protocol.case is not None and not self.response and not protocol.paused:
+            self.complete(protocol, None)
+
+
+    def received (self, protocol, data):
+        """
+        Handle bytes the target answered the test case in flight on a connection with.
+        """
+
+        # the rest of the answer is discarded along with the connection, or arrives on a connection nobody else uses.
+        if not self.keep_alive or self.proto == "udp":
+            self.complete(protocol, data)
+            return
+
+        case = protocol.case
+        case.chunks.append(data)
+
+        if self.terminator is not None:
+            length = len(self.terminator)
+            tail   = data[-length:]
+
+            # the terminator may straddle two reads.
+            if len(tail) < length and len(case.chunks) > 1:
+                tail = case.chunks[-2][len(tail) - length:] + tail
+
+            if tail == self.terminator:
+                self.complete(protocol, None)
+                return
+
+        if case.settle is not None:
+            case.settle.cancel()
+
+        case.settle = self.loop.call_later(self.quiet, self.settled, protocol, case)
+
+
+    def settled (self, protocol, case):
+        """
+        Finish a test case whose kept alive connection has been quiet long enough for the answer to be complete.
+        """
+
+        if protocol.case is case:
+            self.complete(protocol, None)
+
+
+    def complete (self, protocol, response, error=None):
+        """
+        Finish the test case in flight on a connection, which answered, failed or closed. The answer gathered on a
+        kept alive connection is used when no response is given.
+        """
+
+        case          = protocol.case
+        protocol.case = None
+
+        for timer in (case.timer, case.settle):
+            if timer is not None:
+                timer.cancel()
+
+        if response is None and case.chunks:
+            response = b"".join(case.chunks)
+
+        case.response = response
+        case.error    = error
+
+        if self.keep_alive and error is None and not protocol.closed:
+            self.idle.append(protocol)
+        elif not protocol.closed:
+            protocol.transport.close()
+
+        self.finish(case)
+
+
+    def expire (self, protocol, case):
+        protocol.case  = None
+        case.timed_out = True
+
+        if case.settle is not None:
+            case.settle.cancel()
+
+        if case.chunks:
+            case.response = b"".join(case.chunks)
+
+        protocol.transport.close()
+        self.finish(case)
+
+
+    def finish (self, case):
+        self.in_flight -= 1
+
+        if case.timed_out:
+            self.timeouts += 1
+        elif case.error is not None:
+            self.errors += 1
+        elif case.response is not None:
+            self.responses += 1
+
+        if self.callback is not None:
+            self.callback(case)
+
+        self.fill()
+
+
+class echo_protocol (Protocol):
+    """
+    Server side of an echo_server connection or endpoint.
+    """
+
+    def __init__ (self, server):
+        self.server    = server
+        self.transport = None
+        self.closed    = False
+
+
+    def connection_made (self, transport):
+        self.transport           = transport
+        self.server.connections += 1
+        self.server.protocols.add(self)
+
+
+    def connection_lost (self, exc):
+        self.closed = True
+        self.server.protocols.discard(self)
+
+
+    def data_received (self, data):
+        self.received(data, None)
+
+
+    def datagram_received (self, data, address):
+        self.received(data, address)
+
+
+    def received (self, data, address):
+        self.server.messages += 1
+        self.server.bytes    += len(data)
+
+        if self.server.sink:
+            return
+
+        if address is None:
+            reply = lambda: self.closed or self.transport.write(data)
+        else:
+            reply = lambda: self.transport.sendto(data, address)
+
+        if self.server.delay:
+            self.server.loop.call_later(self.server.delay, reply)
+        else:
+            reply()
+
+
+class echo_server (object):
+    """
+    Local target for tests and benchmarks, answering whatever it receives with the same bytes, after delay seconds to
+    play a slow target, or swallowing it without an answer as a sink.
+
+        server = echo_server(loop=loop)
+        loop.run_until_complete(server.start())
+        sender("127.0.0.1", server.port, loop=loop).run(req)
+        server.close()
+    """
+
+    def __init__ (self, proto="tcp", host="127.0.0.1", port=0, sink=False, delay=0, loop=None):
+        """
+        :type  proto: String
+        :param proto: (Optional, def=tcp) tcp or udp
+        :type  host:  String
+        :param host:  (Optional, def=127.0.0.1) Address to listen on
+        :type  port:  Integer
+        :param port:  (Optional, def=0) Port to listen on, 0 picks a free one
+        :type  sink:  Boolean
+        :param sink:  (Optional, def=False) Never answer
+        :type  delay: Float
+        :param delay: (Optional, def=0) Seconds to wait before answering
+        :type  loop:  Event loop
+        :param loop:  (Optional, def=asyncio.get_event_loop()) Event loop to run on
+        """
+
+        require_asyncio()
+
+        if proto not in PROTOCOLS:
+            raise ValueError("unknown protocol %s, expected one of %s" % (proto, ", ".join(PROTOCOLS)))
+
+        self.proto       = proto
+        self.host        = host
+        self.port        = port
+        self.sink        = sink
+        self.delay       = delay
+        self.loop        = loop if loop is not None else asyncio.get_event_loop()
+        self.server      = None
+        self.protocols   = set()  # connections currently open.
+        self.connections = 0      # connections accepted, or endpoints opened for udp.
+        self.messages    = 0      # reads or datagrams received.
+        self.bytes       = 0      # bytes received.
+
+
+    def start (self):
+        """
+        Start listening, self.port is the port listened on once the returned future is resolved.
+
+        :rtype:  Future
+        :returns: Resolved with this server once it listens
+        """
+
+        if self.proto == "udp":
+            opening = self.loop.create_datagram_endpoint(lambda: echo_protocol(self), local_addr=(self.host, self.port))
+        else:
+            opening = self.loop.create_server(lambda: echo_protocol(self), self.host, self.port)
+
+        listening = ensure_future(opening, loop=self.loop)
+        started   = asyncio.Future(loop=self.loop)
+
+        def listen (future):
+            if future.exception() is not None:
+                started.set_exception(future.exception())
+                return
+
+            if self.proto == "udp":
+                self.server = future.result()[0]
+                self.port   = self.server.get_extra_info("sockname")[1]
+            else:
+                self.server = future.result()
+                self.port   = self.server.sockets[0].getsockname()[1]
+
+            started.set_result(self)
+
+        listening.add_done_callback(listen)
+
+        return started
+
+
+    def close (self):
+        """
+        Stop listening and close the open connections.
+        """
+
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+        for protocol in list(self.protocols):
+            protocol.transport.close()
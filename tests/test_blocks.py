@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_blocks
+----------------------------------
+
+Tests for the `sulley.blocks` request and block containers.
+"""
+
+import hashlib
+import os
+import struct
+import unittest
+import zlib
+
+from sulley import blocks
+from sulley.blocks import adler32_combine, block, checksum, crc32_combine, request, size
+from sulley.primitives import instrumentation
+from sulley.primitives.byte import byte
+from sulley.primitives.delim import delim
+from sulley.primitives.group import group
+from sulley.primitives.static import static
+from sulley.primitives.string import string
+
+
+def walk (req):
+    """
+    Render every test case of a request by stepping through them with mutate().
+    """
+
+    rendered = []
+    req.reset()
+
+    while req.mutate():
+        rendered.append(req.render())
+
+    return rendered
+
+
+def walk_from (req):
+    """
+    Render the test cases following the current one.
+    """
+
+    rendered = []
+
+    while req.mutate():
+        rendered.append(req.render())
+
+    return rendered
+
+
+class TestRequest(unittest.TestCase):
+
+    def setUp(self):
+        self.req = request("command")
+
+        self.req.push(group("verb", ["GET", "PUT"]))
+        self.req.push(static(" "))
+        self.req.push(block("body", self.req, group="verb"))
+        self.req.push(string("path", max_len=8, name="path"))
+        self.req.push(delim("/"))
+        self.req.pop()
+        self.req.push(byte(0x0A, fuzzable=False))
+
+    def test_render(self):
+        self.assertEqual(self.req.render(), "GET path/\n")
+
+    def test_num_mutations(self):
+        verb, space, body, newline = self.req.stack
+        path, slash                = body.stack
+
+        inner = path.num_mutations() + slash.num_mutations()
+
+        self.assertEqual(body.num_mutations(), inner * 2)
+        self.assertEqual(self.req.num_mutations(), 2 + inner * 2)
+
+    def test_locate(self):
+        verb, space, body, newline = self.req.stack
+        path, slash                = body.stack
+
+        pins = []
+        self.assertEqual(self.req.locate(1), (verb, 1))
+        self.assertEqual(self.req.locate(2, pins), (path, 0))
+        self.assertEqual(pins, [(verb, "GET")])
+
+        pins  = []
+        index = 2 + body.num_mutations() - 1
+        self.assertEqual(self.req.locate(index, pins), (slash, slash.num_mutations() - 1))
+        self.assertEqual(pins, [(verb, "PUT")])
+
+        self.assertRaises(IndexError, self.req.locate, self.req.num_mutations())
+
+    def test_mutation_at_matches_mutate(self):
+        rendered = walk(self.req)
+
+        self.assertEqual(len(rendered), self.req.num_mutations())
+        self.assertEqual(rendered, [self.req.mutation_at(i) for i in range(len(rendered))])
+
+        # exhausting the test cases puts every primitive back to its original value.
+        self.assertEqual(self.req.render(), "GET path/\n")
+
+    def test_group_repetition(self):
+        verb, space, body, newline = self.req.stack
+
+        first  = self.req.mutation_at(2)
+        second = self.req.mutation_at(2 + body.num_mutations() / 2)
+
+        self.assertTrue(first.startswith("GET "))
+        self.assertTrue(second.startswith("PUT "))
+        self.assertEqual(first[4:], second[4:])
+
+    def test_nested_blocks(self):
+        req = request("nested")
+
+        req.push(static("<"))
+        req.push(block("outer", req))
+        req.push(byte(1))
+        req.push(block("inner", req))
+        req.push(byte(2))
+        req.pop()
+        req.pop()
+        req.push(static(">"))
+
+        self.assertEqual(req.render(), "<\x01\x02>")
+        self.assertEqual(req.num_mutations(), byte(0).num_mutations() * 2)
+        self.assertEqual(walk(req), [req.mutation_at(i) for i in range(req.num_mutations())])
+
+    def test_push_after_counting(self):
+        req = request("growing")
+        req.push(byte(0))
+
+        count = req.num_mutations()
+        req.push(byte(0))
+
+        self.assertEqual(req.num_mutations(), count * 2)
+
+    def test_names(self):
+        self.assertTrue(self.req.names["path"] is self.req.stack[2].stack[0])
+        self.assertRaises(ValueError, self.req.push, static("x", name="path"))
+        self.assertRaises(IndexError, request("empty").pop)
+
+    def test_skip_to(self):
+        rendered = walk(self.req)
+
+        for index in (0, 1, 2, len(rendered) // 2, len(rendered) - 1):
+            self.req.skip_to(index)
+            self.assertEqual(self.req.render(), rendered[index])
+
+            state = self.req.checkpoint()
+            self.req.reset()
+            self.req.restore(state)
+
+            self.assertEqual(self.req.render(), rendered[index])
+            self.assertEqual(walk_from(self.req), rendered[index + 1:])
+
+        self.req.restore(0)
+        self.assertEqual(self.req.render(), "GET path/\n")
+        self.assertRaises(IndexError, self.req.skip_to, len(rendered))
+
+    def test_unknown_group(self):
+        req = request("broken")
+        req.push(block("body", req, group="missing"))
+        req.push(byte(0))
+
+        self.assertRaises(KeyError, req.num_mutations)
+
+
+class TestIncrementalRender(unittest.TestCase):
+
+    def setUp(self):
+        self.req    = request("wide")
+        self.fields = [byte(i, name="field %d" % i) for i in range(50)]
+
+        self.req.push(static("header"))
+        self.req.push(block("fields", self.req))
+
+        for field in self.fields:
+            self.req.push(field)
+
+        self.req.pop()
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_only_changed_fields_are_rendered(self):
+        self.req.render()
+        instrumentation.enable()
+
+        cases = 0
+        while self.req.mutate() and cases < 500:
+            self.assertEqual(self.req.render(), self.req.mutation_at(cases))
+            cases += 1
+
+        renders = sum([field.stats()["renders"] for field in self.fields])
+
+        # one render per test case, plus one for the field put back to its original value at each field change.
+        self.assertTrue(renders <= cases + cases / self.fields[0].num_mutations() + 1, renders)
+
+    def test_dirty_flag(self):
+        field = self.fields[10]
+
+        rendered = self.req.render()
+
+        self.assertFalse(field.dirty)
+        self.assertTrue(self.req.render() is rendered)
+
+        field.mutate()
+        self.assertTrue(field.dirty)
+        self.assertEqual(self.req.render()[6 + 10], field.render())
+        self.assertFalse(field.dirty)
+
+        # a value assigned by hand is picked up once the flag is raised.
+        field.value = 0x41
+        field.dirty = True
+        self.assertEqual(self.req.render()[6 + 10], "A")
+
+        field.reset()
+        self.assertEqual(self.req.render(), "header" + "".join([chr(i) for i in range(50)]))
+
+
+class TestCalculatedFields(unittest.TestCase):
+
+    def build(self, *fields):
+        req = request("framed")
+
+        for field in fields:
+            req.push(field(req))
+
+        req.push(block("payload", req))
+        req.push(static("head"))
+        req.push(string("body", max_len=2000))
+        req.push(static("tail"))
+        req.pop()
+
+        return req
+
+    def test_size(self):
+        req = self.build(lambda req: size("payload", req, length=2, endian=">"),
+                         lambda req: size("payload", req, length=1, inclusive=True, math=lambda x: x * 2))
+
+        self.assertEqual(req.render(), "\x00\x0c" + chr(26) + "headbodytail")
+
+        req.mutate()
+        self.assertEqual(req.render()[:2], "\x00\x08")
+
+    def test_checksums(self):
+        algorithms = ["crc32", "adler32", "md5", "sha1"]
+        req        = self.build(*[lambda req, algorithm=algorithm: checksum("payload", req, algorithm=algorithm)
+                                  for algorithm in algorithms])
+
+        def expected (payload):
+            return struct_pack(zlib.crc32(payload)) + struct_pack(zlib.adler32(payload)) + \
+                   hashlib.md5(payload).digest() + hashlib.sha1(payload).digest() + payload
+
+        self.assertEqual(req.render(), expected("headbodytail"))
+
+        cases = 0
+        while req.mutate() and cases < 200:
+            payload = req.stack[-1].render()
+
+            self.assertEqual(req.render(), expected(payload))
+            self.assertEqual(req.render(), req.mutation_at(cases))
+            cases += 1
+
+    def test_large_suffix_is_combined(self):
+        req = request("large")
+        req.push(checksum("payload", req))
+        req.push(block("payload", req))
+        req.push(byte(0))
+        req.push(static(os.urandom(blocks.COMBINE_THRESHOLD * 2)))
+        req.pop()
+
+        for _ in range(5):
+            req.mutate()
+            payload = req.stack[-1].render()
+
+            self.assertEqual(req.render()[:4], struct_pack(zlib.crc32(payload)))
+
+    def test_unchanged_block_is_not_recalculated(self):
+        req   = self.build(lambda req: checksum("payload", req))
+        field = req.stack[0]
+        calls = []
+
+        def calculate (target, data):
+            calls.append(data)
+            return checksum.calculate(field, target, data)
+
+        field.calculate = calculate
+
+        req.render()
+        req.render()
+        self.assertEqual(len(calls), 1)
+
+        req.mutate()
+        req.render()
+        req.render()
+        self.assertEqual(len(calls), 2)
+
+    def test_fuzzable(self):
+        req    = self.build(lambda req: size("payload", req, length=1, fuzzable=True))
+        length = req.stack[0]
+
+        self.assertEqual(req.num_mutations(), length.num_mutations() + req.stack[-1].num_mutations())
+
+        req.mutate()
+        self.assertEqual(req.render()[0], chr(length.value_at(0)))
+        self.assertEqual(req.mutation_at(0), req.render())
+
+    def test_self_reference(self):
+        req = request("loop")
+        req.push(block("payload", req))
+        req.push(size("payload", req))
+        req.pop()
+
+        self.assertRaises(ValueError, req.render)
+        self.assertRaises(ValueError, checksum, "payload", req, algorithm="crc16")
+
+    def test_combine(self):
+        for first, second in (("abc", "defgh"), (os.urandom(1000), os.urandom(70000)), ("", "x"), ("x", "")):
+            for function, combine in ((zlib.crc32, crc32_combine), (zlib.adler32, adler32_combine)):
+                combined = combine(function(first) & 0xFFFFFFFF, function(second) & 0xFFFFFFFF, len(second))
+                self.assertEqual(combined, function(first + second) & 0xFFFFFFFF)
+
+
+def struct_pack (value):
+    return struct.pack("<L", value & 0xFFFFFFFF)
+
+
+if __name__ == '__main__':
+    unittest.main()
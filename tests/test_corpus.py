@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_corpus
+----------------------------------
+
+Tests for the `sulley.primitives.corpus` packed corpus format.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from sulley.primitives import dictionaries
+from sulley.primitives.corpus import corpus, main, write_corpus
+from sulley.primitives.string import string
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path      = os.path.join(self.directory, "corpus")
+        self.entries   = ["first", "", "line\nbreak", "\x00\xff" * 1000]
+
+        write_corpus(self.path, self.entries)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        packed = corpus(self.path)
+
+        self.assertEqual(len(packed), len(self.entries))
+        self.assertEqual([str(entry) for entry in packed], self.entries)
+        self.assertEqual(list(packed.lengths()), [len(entry) for entry in self.entries])
+        self.assertEqual(str(packed[-1]), self.entries[-1])
+        self.assertRaises(IndexError, lambda: packed[4])
+
+        packed.close()
+
+    def test_not_a_corpus(self):
+        fh = open(self.path, "wb")
+        fh.write("plain text\n" * 4)
+        fh.close()
+
+        self.assertRaises(ValueError, corpus, self.path)
+
+    def test_command_line(self):
+        payload = os.path.join(self.directory, "payload")
+        lines   = os.path.join(self.directory, "lines")
+
+        for path, contents in ((payload, "\x01\n\x02"), (lines, "a\r\n\nb\n")):
+            fh = open(path, "wb")
+            fh.write(contents)
+            fh.close()
+
+        out = StringIO()
+
+        self.assertEqual(main(["--files", self.path, payload], out), 0)
+        self.assertEqual([str(entry) for entry in corpus(self.path)], ["\x01\n\x02"])
+
+        self.assertEqual(main([self.path, lines, payload], out), 0)
+        self.assertEqual([str(entry) for entry in corpus(self.path)], ["a", "b", "\x01", "\x02"])
+        self.assertTrue(out.getvalue().startswith("packed 1 entries"))
+
+    def test_string_dictionary(self):
+        packed = dictionaries.fuzz_strings(self.path)
+
+        self.assertTrue(isinstance(packed, corpus))
+        self.assertTrue(dictionaries.fuzz_strings(self.path) is packed)
+
+    def test_string_library(self):
+        string("x").fuzz_library
+        library = string.global_library
+
+        try:
+            dictionaries.FUZZ_STRINGS = self.path
+            string.global_library     = []
+
+            primitive = string("x")
+            values    = list(primitive.iter_mutations())
+
+            self.assertEqual(values[len(library):len(library) + len(self.entries)], self.entries)
+        finally:
+            dictionaries.FUZZ_STRINGS = ".fuzz_strings"
+            string.global_library     = library
+
+    def test_string_render(self):
+        primitive = string("x", size=8)
+        packed    = corpus(self.path)
+
+        self.assertEqual(primitive.render_value(packed[0]), "first")
+        self.assertEqual(primitive.render_value(packed[2]), "line\nbreak")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dedup
+----------------------------------
+
+Tests for the `sulley.dedup` mutation stream filter.
+"""
+
+import unittest
+
+from sulley.blocks import request
+from sulley.dedup import bloom_filter, dedup, fingerprint_set
+from sulley.primitives.byte import byte
+from sulley.primitives.delim import delim
+from sulley.primitives.group import group
+from sulley.primitives.string import string
+
+
+def renders (mutable):
+    rendered = []
+
+    while mutable.mutate():
+        rendered.append(mutable.render())
+
+    return rendered
+
+
+class TestDedup(unittest.TestCase):
+
+    def test_delim(self):
+        raw    = renders(delim(" "))
+        unique = dedup(delim(" "))
+
+        rendered = renders(unique)
+
+        self.assertEqual(len(rendered), len(set(rendered)))
+        self.assertEqual(set(rendered), set(raw) - set([" "]))
+        self.assertEqual(unique.unique + unique.duplicates, len(raw))
+        self.assertTrue(unique.duplicates > 0)
+
+    def test_original(self):
+        unique = dedup(group("verb", ["GET", "PUT", "GET"]), original=False)
+
+        self.assertEqual(renders(unique), ["GET", "PUT"])
+        self.assertEqual(unique.duplicates, 1)
+
+    def test_reset(self):
+        unique = dedup(byte(0))
+
+        first = renders(unique)
+        unique.reset()
+
+        self.assertEqual(renders(unique), first)
+        self.assertEqual(unique.num_mutations(), byte(0).num_mutations())
+
+    def test_request(self):
+        req = request("pair")
+        req.push(byte(0, name="first"))
+        req.push(byte(0, name="second"))
+
+        unique   = dedup(req)
+        rendered = renders(unique)
+
+        # both fields mutate through the same values, the second field only adds what the first could not produce.
+        self.assertEqual(len(rendered), len(set(rendered)))
+        self.assertEqual(len(rendered) + unique.duplicates, req.num_mutations())
+
+    def test_shared_store(self):
+        seen   = fingerprint_set()
+        first  = dedup(string("a", max_len=16), seen)
+        second = dedup(string("b", max_len=16), seen)
+
+        rendered = renders(first)
+        self.assertEqual(len(rendered), len(seen) - 1)
+
+        # the second string only gets through the mutations built from its own value.
+        self.assertEqual(set(rendered) & set(renders(second)), set())
+        self.assertTrue(second.duplicates > second.unique)
+
+    def test_bloom_filter(self):
+        seen = bloom_filter(capacity=1000, error_rate=0.001)
+
+        added = [seen.add(str(i)) for i in range(1000)]
+
+        self.assertTrue(all([str(i) in seen for i in range(1000)]))
+        self.assertFalse(seen.add("0"))
+        self.assertTrue(sum(added) > 990)
+        self.assertEqual(len(seen), sum(added))
+
+        seen.clear()
+        self.assertFalse("0" in seen)
+        self.assertRaises(ValueError, bloom_filter, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dictionaries
+----------------------------------
+
+Tests for the `sulley.primitives.dictionaries` custom dictionary loader.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from sulley.primitives import dictionaries
+from sulley.primitives.byte import byte
+
+
+class TestDictionaries(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.ints      = os.path.join(self.directory, "ints")
+        self.strings   = os.path.join(self.directory, "strings")
+
+        self.write(self.ints, "1000\nff\nnot a number\n7f\n100\n")
+        self.write(self.strings, "first\r\n\nsecond\n")
+
+    def tearDown(self):
+        dictionaries.FUZZ_INTS = ".fuzz_ints"
+        shutil.rmtree(self.directory)
+
+    def write(self, path, contents):
+        fh = open(path, "w")
+        fh.write(contents)
+        fh.close()
+
+    def test_fuzz_ints(self):
+        self.assertEqual(dictionaries.fuzz_ints(0xFF, self.ints), (0xFF, 0x7F))
+        self.assertEqual(dictionaries.fuzz_ints(0xFFFF, self.ints), (0x1000, 0xFF, 0x7F, 0x100))
+        self.assertEqual(dictionaries.fuzz_ints(0, self.ints), ())
+
+    def test_fuzz_strings(self):
+        self.assertEqual(dictionaries.fuzz_strings(self.strings), ("first", "second"))
+
+    def test_missing_file(self):
+        missing = os.path.join(self.directory, "missing")
+
+        self.assertEqual(dictionaries.fuzz_ints(0xFF, missing), ())
+        self.assertEqual(dictionaries.fuzz_strings(missing), ())
+
+    def test_parsed_once(self):
+        first = dictionaries.load(dictionaries.int_dictionary, self.ints)
+
+        self.assertTrue(dictionaries.load(dictionaries.int_dictionary, self.ints) is first)
+        self.assertTrue(dictionaries.fuzz_ints(0xFF, self.ints) is dictionaries.fuzz_ints(0xFF, self.ints))
+
+    def test_modification_invalidates(self):
+        self.assertEqual(dictionaries.fuzz_ints(0xFF, self.ints), (0xFF, 0x7F))
+
+        self.write(self.ints, "01\n")
+        os.utime(self.ints, (0, 0))
+
+        self.assertEqual(dictionaries.fuzz_ints(0xFF, self.ints), (0x01,))
+
+    def test_bit_field_default_path(self):
+        dictionaries.FUZZ_INTS = self.ints
+        primitive = byte(0)
+
+        self.assertEqual(list(primitive.fuzz_library)[-2:], [0xFF, 0x7F])
+
+
+if __name__ == '__main__':
+    unittest.main()
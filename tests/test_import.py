@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_import
+----------------------------------
+
+Tests for the lazy loading of `sulley.primitives`, and its import time budget. Each check runs in a fresh interpreter,
+this one has already imported everything.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# milliseconds allowed for importing the package, and for the first use of a primitive through it. generous enough for
+# a loaded CI machine compiling the modules without cached bytecode, a regression to eager loading blows well past them.
+IMPORT_BUDGET       = 50
+CONSTRUCTION_BUDGET = 250
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run (code):
+    """
+    Run code in a fresh interpreter and return the JSON it prints.
+    """
+
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT)
+    return json.loads(output.decode("ascii"))
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_no_submodule_is_imported(self):
+        loaded = run(
+            "import json, sys\n"
+            "import sulley.primitives\n"
+            "print(json.dumps([name for name, module in sys.modules.items()\n"
+            "                  if name.startswith('sulley.primitives.') and module is not None]))\n"
+        )
+
+        self.assertEqual(loaded, [])
+
+    def test_primitives_are_attributes(self):
+        names = run(
+            "import json, sulley.primitives\n"
+            "import sulley.primitives.string\n"
+            "from sulley.primitives import byte, string\n"
+            "from sulley.primitives.word import word\n"
+            "print(json.dumps([byte.__name__, string.__name__, sulley.primitives.string.__name__,\n"
+            "                  sulley.primitives.word.__name__, 'word' in dir(sulley.primitives)]))\n"
+        )
+
+        self.assertEqual(names, ["byte", "string", "string", "word", True])
+
+    def test_libraries_are_built_on_first_use(self):
+        sizes = run(
+            "import json\n"
+            "from sulley.primitives import delim, string, word\n"
+            "from sulley.primitives.bit_field import boundary_libraries\n"
+            "primitives = [string('x', max_len=16), delim(':'), word(0)]\n"
+            "before = [len(string.global_library), len(string.truncated_libraries), len(boundary_libraries)]\n"
+            "after  = [primitive.num_mutations() > 0 for primitive in primitives]\n"
+            "print(json.dumps(before + after + [len(string.global_library) > 0, len(boundary_libraries)]))\n"
+        )
+
+        self.assertEqual(sizes, [0, 0, 0, True, True, True, True, 1])
+
+    def test_import_time_budget(self):
+        elapsed = run(
+            "import json, time\n"
+            "start = time.time()\n"
+            "import sulley.primitives\n"
+            "imported = time.time()\n"
+            "sulley.primitives.string('x')\n"
+            "print(json.dumps([(imported - start) * 1000, (time.time() - imported) * 1000]))\n"
+        )
+
+        self.assertTrue(elapsed[0] < IMPORT_BUDGET, "import took %.1fms" % elapsed[0])
+        self.assertTrue(elapsed[1] < CONSTRUCTION_BUDGET, "first string() took %.1fms" % elapsed[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_instrumentation
+----------------------------------
+
+Tests for the `sulley.primitives.instrumentation` counters and profiling hook.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from sulley.blocks import block, request
+from sulley.primitives import instrumentation
+from sulley.primitives.base import base
+from sulley.primitives.byte import byte
+from sulley.primitives.group import group
+from sulley.primitives.static import static
+from sulley.primitives.string import string
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_disabled_by_default(self):
+        primitive = byte(0)
+
+        primitive.mutate()
+        primitive.render()
+
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertEqual(primitive.stats()["mutations"], 0)
+        self.assertFalse("render" in byte.__dict__)
+
+    def test_counters(self):
+        primitive = string("sulley")
+        instrumentation.enable()
+
+        for _ in range(3):
+            primitive.mutate()
+            primitive.render()
+
+        rendered = [primitive.render_value(primitive.value_at(i)) for i in range(3)]
+        stats    = primitive.stats()
+
+        self.assertEqual((stats["mutations"], stats["renders"]), (3, 3))
+        self.assertEqual(stats["rendered_bytes"], sum(len(value) for value in rendered))
+        self.assertEqual(stats["largest_render"], max(len(value) for value in rendered))
+        self.assertTrue(stats["render_seconds"] >= 0)
+
+    def test_overrides_and_exhaustion(self):
+        instrumentation.enable()
+
+        primitive = group("opcodes", ["\x01", "\x02"])
+
+        while primitive.mutate():
+            pass
+
+        self.assertFalse(static("\x00").mutate())
+        self.assertEqual(primitive.stats()["mutations"], 2)
+
+    def test_super_calls_are_counted_once(self):
+        class custom (byte):
+            def render (self):
+                return super(custom, self).render()
+
+        instrumentation.enable()
+
+        primitive = custom(0)
+        primitive.render()
+
+        self.assertEqual(primitive.stats()["renders"], 1)
+
+    def test_hook_and_disable(self):
+        samples   = []
+        primitive = byte(0x41)
+
+        instrumentation.enable(lambda primitive, method, seconds, length: samples.append((method, length)))
+        primitive.render()
+        primitive.mutate()
+        instrumentation.disable()
+
+        primitive.render()
+
+        self.assertEqual(samples, [("render", 1), ("mutate", None)])
+        self.assertEqual(primitive.stats()["renders"], 1)
+        self.assertFalse("render" in byte.__dict__)
+        self.assertEqual(base.__dict__["render"].__name__, "render")
+
+    def test_hottest(self):
+        small, large = string("a"), string("b", encoding="utf_16_le")
+        instrumentation.enable()
+
+        for primitive in (small, large):
+            primitive.value = "A" * 1000
+            primitive.render()
+
+        self.assertTrue(instrumentation.hottest([small, large], "rendered_bytes")[0][0] is large)
+
+        instrumentation.clear([small, large])
+        self.assertEqual(large.stats()["renders"], 0)
+
+    def test_request_driven(self):
+        req = request("login")
+        req.push(group("verb", ["USER", "PASS"]))
+        req.push(block("body", req, group="verb"))
+        req.push(string("sulley"))
+        req.pop()
+        req.push(byte(0))
+
+        verb, text, terminator = req.names["verb"], req.stack[1].stack[0], req.stack[2]
+        calls                  = []
+
+        instrumentation.enable(lambda primitive, method, seconds, length: calls.append((primitive, method)))
+
+        while req.mutate():
+            req.render()
+
+        instrumentation.disable()
+
+        # every test case is counted once, on the primitive it mutates, not on the groups it pins.
+        self.assertEqual(verb.stats()["mutations"], verb.num_mutations())
+        self.assertEqual(text.stats()["mutations"], text.num_mutations() * verb.num_mutations())
+        self.assertEqual(terminator.stats()["mutations"], terminator.num_mutations())
+        self.assertEqual(len([call for call in calls if call[1] == "mutate"]), req.num_mutations())
+        self.assertTrue(text.stats()["renders"] > 0)
+        self.assertEqual(request.__dict__["mutate"].__name__, "mutate")
+
+    def test_lazily_loaded_primitives(self):
+        # in a fresh interpreter, where delim is only loaded once instrumentation is already enabled.
+        output = subprocess.check_output([sys.executable, "-c",
+            "import json\n"
+            "from sulley.primitives import instrumentation\n"
+            "instrumentation.enable()\n"
+            "from sulley.primitives import delim\n"
+            "primitive = delim(':')\n"
+            "primitive.mutate()\n"
+            "primitive.render()\n"
+            "print(json.dumps(primitive.stats()))\n"
+        ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        stats = json.loads(output.decode("ascii"))
+
+        self.assertEqual(stats["mutations"], 1)
+        self.assertEqual(stats["renders"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
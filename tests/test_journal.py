@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_journal
+----------------------------------
+
+Tests for the `sulley.journal` test case journal.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from sulley.blocks import block, request
+from sulley.dedup import dedup
+from sulley.journal import RECORD, journal, journal_writer, primitive_paths, replay
+from sulley.primitives.byte import byte
+from sulley.primitives.delim import delim
+from sulley.primitives.group import group
+from sulley.primitives.random_data import random_data
+from sulley.primitives.string import string
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build (seed="campaign"):
+    req = request("command")
+
+    req.push(group("verb", ["GET", "PUT"]))
+    req.push(block("body", req, group="verb"))
+    req.push(string("path", max_len=64))
+    req.push(delim("/"))
+    req.push(random_data("x", 1, 8, max_mutations=5, seed=seed, name="noise"))
+    req.pop()
+    req.push(byte(0x0A))
+
+    return req
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path      = os.path.join(self.directory, "campaign.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, req, mutable=None):
+        writer = journal_writer(self.path, req)
+        mutable = mutable or req
+
+        while mutable.mutate():
+            writer.record(req.mutant_index - 1, mutable.render())
+
+        writer.close()
+
+    def test_paths(self):
+        paths = [path for path, primitive in primitive_paths(build())]
+
+        self.assertEqual(paths, ["command/verb", "command/body/string[0]", "command/body/delim[1]",
+                                 "command/body/noise", "command/byte[2]"])
+
+    def test_record_and_replay(self):
+        req = build()
+        self.record(req)
+
+        recorded = journal(self.path)
+        other    = build()
+
+        self.assertEqual(len(recorded), req.num_mutations())
+        self.assertEqual(recorded.name, "command")
+        self.assertEqual(os.path.getsize(self.path), recorded.records + len(recorded) * RECORD.size)
+
+        for number in (0, 1, 2, 200, req.num_mutations() - 1):
+            record = recorded.lookup(number)
+
+            self.assertEqual(record.number, number)
+            self.assertEqual(replay(other, record), req.mutation_at(number))
+
+        self.assertEqual(recorded.lookup(1).path, "command/verb")
+        self.assertEqual(recorded[-1].path, "command/byte[2]")
+
+        for record in recorded:
+            if record.path == "command/body/noise":
+                self.assertEqual(record.seed, "campaign")
+                self.assertNotEqual(record.seed_fingerprint, 0)
+            else:
+                self.assertEqual((record.seed, record.seed_fingerprint), (None, 0))
+
+        self.assertRaises(KeyError, recorded.lookup, req.num_mutations())
+
+        recorded.close()
+
+    def test_sparse_lookup(self):
+        req = build()
+        self.record(req, dedup(req))
+
+        recorded = journal(self.path)
+        numbers  = [record.number for record in recorded]
+
+        self.assertTrue(len(numbers) < req.num_mutations())
+
+        for number in numbers[::50]:
+            self.assertEqual(replay(build(), recorded.lookup(number)), req.mutation_at(number))
+
+        missing = sorted(set(range(req.num_mutations())) - set(numbers))[0]
+        self.assertRaises(KeyError, recorded.lookup, missing)
+
+        recorded.close()
+
+    def test_append(self):
+        req    = build()
+        writer = journal_writer(self.path, req)
+
+        for number in range(10):
+            writer.record(number, req.mutation_at(number))
+
+        writer.close()
+
+        # a half written record, as left by a crash, is dropped on reopening.
+        fh = open(self.path, "ab")
+        fh.write("\x00" * 10)
+        fh.close()
+
+        writer = journal_writer(self.path, req)
+        writer.record(10, req.mutation_at(10))
+        writer.close()
+
+        recorded = journal(self.path)
+        self.assertEqual([record.number for record in recorded], list(range(11)))
+        recorded.close()
+
+        changed = build()
+        changed.push(byte(0))
+        self.assertRaises(ValueError, journal_writer, self.path, changed)
+
+    def test_appended_runs(self):
+        req = build()
+
+        for numbers in (range(40), range(20, 60)):
+            writer = journal_writer(self.path, req)
+
+            for number in numbers:
+                writer.record(number, req.mutation_at(number))
+
+            writer.close()
+
+        recorded = journal(self.path)
+
+        self.assertEqual(recorded.runs(), [(0, 40), (40, 80)])
+
+        # test cases recorded by both runs are found in the latest one.
+        self.assertEqual([recorded.lookup(number).position for number in (0, 19, 20, 25, 39, 59)],
+                         [0, 19, 40, 45, 59, 79])
+        self.assertRaises(KeyError, recorded.lookup, 60)
+
+        recorded.close()
+
+    def test_stored_seed(self):
+        req = build()
+        self.record(req)
+
+        recorded = journal(self.path)
+        noise    = [record for record in recorded if record.path == "command/body/noise"]
+
+        self.assertEqual(recorded.seeds, [None, None, None, "campaign", None])
+
+        # the request is rebuilt with another seed, or none, the journaled one regenerates the test cases.
+        for seed in ("another campaign", None):
+            other = build(seed)
+
+            for record in noise:
+                self.assertEqual(replay(other, record), req.mutation_at(record.number))
+
+            self.assertEqual(other.names["noise"].seed, seed)
+
+        recorded.close()
+
+    def test_empty(self):
+        journal_writer(self.path, build()).close()
+
+        recorded = journal(self.path)
+
+        self.assertEqual(len(recorded), 0)
+        self.assertRaises(KeyError, recorded.lookup, 0)
+
+        recorded.close()
+
+        # the command line reports the missing test case rather than crashing.
+        process = subprocess.Popen([sys.executable, "-m", "sulley.journal", "show", self.path, "0"], cwd=ROOT,
+                                   stderr=subprocess.PIPE)
+        error   = process.communicate()[1]
+
+        self.assertEqual(process.returncode, 1)
+        self.assertTrue("test case 0 is not in" in error.decode("ascii"))
+
+    def test_mismatch(self):
+        req    = build()
+        writer = journal_writer(self.path, req)
+        writer.record(3, "not what test case 3 renders")
+        writer.close()
+
+        recorded = journal(self.path)
+        self.assertRaises(ValueError, replay, req, recorded.lookup(3))
+        recorded.close()
+
+    def test_command_line(self):
+        req    = build()
+        writer = journal_writer(self.path, req)
+        writer.record(7, req.mutation_at(7))
+        writer.close()
+
+        output = subprocess.check_output([sys.executable, "-m", "sulley.journal", "replay", self.path,
+                                          "tests.test_journal:build", "7"], cwd=ROOT)
+        self.assertEqual(output, req.mutation_at(7))
+
+        output = subprocess.check_output([sys.executable, "-m", "sulley.journal", "show", self.path], cwd=ROOT)
+        self.assertTrue("command/body/string[0]" in output)
+
+
+if __name__ == '__main__':
+    unittest.main()
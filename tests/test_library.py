@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_library
+----------------------------------
+
+Tests for the `sulley.primitives.library` fuzz library containers.
+"""
+
+import unittest
+
+from sulley.primitives.bit_field import bit_field
+from sulley.primitives.byte import byte
+from sulley.primitives.library import chained_library, integer_array, integer_range, lazy_library, library_length
+from sulley.primitives.qword import qword
+from sulley.primitives.string import string
+from sulley.primitives.word import word
+
+
+class TestLazyLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.library = lazy_library(["", "literal"])
+        self.library.append_repeated(("A", 5000))
+        self.library.append_repeated(("B", 64), ("\x00", 1), ("B", 65))
+
+    def test_length(self):
+        self.assertEqual(len(self.library), 4)
+
+    def test_indexing(self):
+        self.assertEqual(self.library[1], "literal")
+        self.assertEqual(self.library[2], "A" * 5000)
+        self.assertEqual(self.library[3], "B" * 64 + "\x00" + "B" * 65)
+        self.assertEqual(self.library[-1], self.library[3])
+        self.assertRaises(IndexError, lambda: self.library[4])
+
+    def test_entry_length(self):
+        self.assertEqual([self.library.entry_length(i) for i in range(4)], [0, 7, 5000, 130])
+        self.assertEqual(list(self.library.lengths()), [len(entry) for entry in self.library])
+
+    def test_entry_prefix(self):
+        for index in range(4):
+            for length in [0, 1, 63, 64, 65, 66, 200, 6000]:
+                self.assertEqual(self.library.entry_prefix(index, length), self.library[index][:length])
+
+        view = chained_library(self.library, ["tail"])
+        self.assertEqual(view.entry_prefix(3, 65), "B" * 64 + "\x00")
+        self.assertEqual(view.entry_prefix(4, 2), "ta")
+
+    def test_slice_and_add(self):
+        self.assertEqual(list(self.library[1:3]), ["literal", "A" * 5000])
+        self.assertEqual(list(self.library[:1] + ["x", "y"]), ["", "x", "y"])
+
+
+class TestChainedLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.first  = lazy_library(["a", "b"])
+        self.second = ["c"]
+        self.view   = chained_library(self.first, [], self.second)
+
+    def test_indexing(self):
+        self.assertEqual(len(self.view), 3)
+        self.assertEqual([self.view[i] for i in range(3)], ["a", "b", "c"])
+        self.assertEqual(self.view[-1], "c")
+        self.assertRaises(IndexError, lambda: self.view[3])
+        self.assertRaises(IndexError, lambda: self.view[-4])
+
+    def test_follows_underlying_sequences(self):
+        self.second.append("d")
+        self.assertEqual(list(self.view), ["a", "b", "c", "d"])
+
+
+class TestStringLibrary(unittest.TestCase):
+
+    def test_shared_lazy_library(self):
+        first  = string("first")
+        second = string("second")
+
+        self.assertTrue(first.fuzz_library is second.fuzz_library is string.global_library)
+        self.assertTrue(isinstance(string.global_library, lazy_library))
+
+    def test_long_strings(self):
+        string("x").fuzz_library
+        entries = list(string.global_library)
+
+        self.assertTrue("A" * 1000000 in entries)
+        self.assertTrue("\xFF" * 0xFFFF in entries)
+        self.assertTrue("B" * 16383 + "\x00" + "B" * 16384 in entries)
+
+    def test_mutations_cover_library(self):
+        s = string("x")
+        self.assertEqual(s.num_mutations(), len(string.global_library) + len(s.this_library))
+
+        values = []
+        while s.mutate():
+            values.append(s.value)
+
+        self.assertEqual(values, list(string.global_library) + s.this_library)
+
+    def test_truncated_library_is_shared(self):
+        first  = string("first", max_len=8)
+        second = string("second", max_len=8)
+        other  = string("other", max_len=9)
+
+        self.assertTrue(first.fuzz_library is second.fuzz_library)
+        self.assertFalse(first.fuzz_library is other.fuzz_library)
+
+    def test_truncated_library_contents(self):
+        primitive = string("sulley", max_len=4)
+        library   = primitive.fuzz_library
+        expected  = []
+
+        for entry in string.global_library:
+            if entry[:4] not in expected:
+                expected.append(entry[:4])
+
+        self.assertEqual(library, expected)
+        self.assertEqual(primitive.this_library, ["sull"])
+
+    def test_truncation_not_needed(self):
+        string("x").fuzz_library
+        self.assertTrue(string("x", max_len=2000000).fuzz_library is string.global_library)
+
+
+class TestIntegerLibraries(unittest.TestCase):
+
+    def test_integer_range(self):
+        values = integer_range(3, 7)
+
+        self.assertEqual(len(values), 4)
+        self.assertEqual(list(values), [3, 4, 5, 6])
+        self.assertEqual(values[0], 3)
+        self.assertEqual(values[-1], 6)
+        self.assertTrue(5 in values)
+        self.assertFalse(7 in values)
+        self.assertRaises(IndexError, lambda: values[4])
+
+    def test_huge_integer_range(self):
+        values = integer_range(0, 2 ** 64 - 1)
+
+        self.assertEqual(library_length(values), 2 ** 64 - 1)
+        self.assertEqual(values[2 ** 64 - 2], 2 ** 64 - 2)
+
+    def test_integer_array(self):
+        values = integer_array(255, [1, 2, 255])
+
+        self.assertEqual(values.values.itemsize, 1)
+        self.assertEqual(list(values), [1, 2, 255])
+
+        # values which do not fit fall back to a list.
+        values.append(-1)
+        self.assertEqual(list(values), [1, 2, 255, -1])
+        self.assertEqual(values[3], -1)
+
+    def test_word_full_range(self):
+        primitive = word(0, full_range=True)
+
+        self.assertEqual(primitive.num_mutations(), 0xFFFF)
+        self.assertEqual(list(primitive.fuzz_library), list(range(0xFFFF)))
+
+    def test_wide_full_range(self):
+        primitive = qword(0, full_range=True)
+
+        self.assertEqual(primitive.num_mutations(), 2 ** 64 - 1)
+        self.assertEqual(primitive.mutation_at(2 ** 64 - 2), "\xfe" + "\xff" * 7)
+
+        primitive = bit_field(0, 32, full_range=True)
+
+        primitive.mutate()
+        primitive.mutate()
+        self.assertEqual(primitive.render(), "\x01\x00\x00\x00")
+
+    def test_boundaries_are_packed(self):
+        primitive = qword(0)
+
+        self.assertTrue(isinstance(primitive.fuzz_library, integer_array))
+        self.assertEqual(primitive.fuzz_library.values.itemsize, 8)
+        self.assertTrue(2 ** 64 - 1 in primitive.fuzz_library)
+
+    def test_boundaries_are_shared(self):
+        first, second = byte(0), byte(1)
+
+        self.assertTrue(first.fuzz_library is second.fuzz_library)
+
+        # growing one field's library must not leak into the other.
+        first.add_integer_boundaries(200)
+
+        self.assertFalse(first.fuzz_library is second.fuzz_library)
+        self.assertEqual(first.num_mutations(), second.num_mutations() + 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_primitives
+----------------------------------
+
+Tests for the mutation protocol shared by the `sulley.primitives` classes.
+"""
+
+import pickle
+import random
+import unittest
+
+from sulley.primitives.bit_field import bit_field
+from sulley.primitives.byte import byte
+from sulley.primitives.delim import delim
+from sulley.primitives.group import group
+from sulley.primitives.qword import qword
+from sulley.primitives.random_data import random_bytes, random_data
+from sulley.primitives.static import static
+from sulley.primitives.string import string
+from sulley.primitives.word import word
+
+
+def mutate_and_render(primitive):
+    """
+    Step through every mutation the stateful way.
+    """
+
+    rendered = []
+    while primitive.mutate():
+        rendered.append(primitive.render())
+
+    primitive.reset()
+    return rendered
+
+
+class TestMutationProtocol(unittest.TestCase):
+
+    def setUp(self):
+        self.primitives = [
+            bit_field(5, 12, endian=">"),
+            byte(0x41, format="ascii", signed=True),
+            word(0x1234),
+            delim(" "),
+            group("opcodes", ["\x01", "\x02", "\x03"]),
+            static("\xde\xad"),
+            string("sulley", size=300),
+            string("sulley", encoding="utf_16_le"),
+        ]
+
+    def test_len(self):
+        for primitive in self.primitives:
+            self.assertEqual(len(primitive), primitive.num_mutations())
+            self.assertTrue(primitive)
+
+    def test_iter_mutations_matches_mutate(self):
+        for primitive in self.primitives:
+            self.assertEqual(list(primitive.iter_mutations()), mutate_and_render(primitive))
+
+    def test_mutation_at_matches_mutate(self):
+        primitive = word(0x1234, endian=">")
+        expected  = mutate_and_render(primitive)
+
+        for index in reversed(range(len(primitive))):
+            self.assertEqual(primitive.mutation_at(index), expected[index])
+
+    def test_mutation_at_leaves_state_alone(self):
+        primitive = delim(":")
+        primitive.mutate()
+        primitive.render()
+
+        primitive.mutation_at(len(primitive) - 1)
+
+        self.assertEqual(primitive.mutant_index, 1)
+        self.assertEqual(primitive.value, "::")
+        self.assertEqual(primitive.rendered, "::")
+
+    def test_mutation_at_out_of_range(self):
+        self.assertRaises(IndexError, static("x").mutation_at, 0)
+        self.assertRaises(IndexError, byte(0).mutation_at, len(byte(0)))
+        self.assertRaises(IndexError, byte(0).mutation_at, -1)
+
+    def test_render_batch(self):
+        primitives = self.primitives + [random_data("x", 0, 300, name="blob", seed=5), qword(7, endian=">")]
+
+        for primitive in primitives:
+            count    = len(primitive)
+            expected = [primitive.mutation_at(index) for index in range(count)]
+            out      = bytearray(sum([len(rendered) for rendered in expected]) + 10)
+            offsets  = primitive.render_batch(0, count, memoryview(out))
+
+            self.assertEqual(len(offsets), count + 1)
+
+            for index in range(count):
+                self.assertEqual(str(out[offsets[index]:offsets[index + 1]]), expected[index])
+
+    def test_render_batch_window(self):
+        primitive = word(0x1234)
+        out       = bytearray(6)
+        offsets   = primitive.render_batch(4, 3, out)
+
+        self.assertEqual(list(offsets), [0, 2, 4, 6])
+        self.assertEqual(str(out), "".join([primitive.mutation_at(index) for index in range(4, 7)]))
+
+    def test_render_batch_errors(self):
+        self.assertRaises(ValueError, word(0).render_batch, 0, 3, bytearray(5))
+        self.assertRaises(ValueError, string("x").render_batch, 0, 3, bytearray(1))
+        self.assertRaises(IndexError, byte(0).render_batch, len(byte(0)) - 1, 2, bytearray(10))
+
+    def test_slotted(self):
+        for primitive in self.primitives + [random_data("x", 1, 2), qword(0)]:
+            self.assertFalse(hasattr(primitive, "__dict__"), type(primitive).__name__)
+
+    def test_pickle(self):
+        for protocol in [0, 2]:
+            for primitive in self.primitives:
+                primitive.mutate()
+                copy = pickle.loads(pickle.dumps(primitive, protocol))
+
+                self.assertEqual(copy.mutant_index, primitive.mutant_index)
+                self.assertEqual(copy.render(), primitive.render())
+                self.assertEqual(list(copy.iter_mutations()), list(primitive.iter_mutations()))
+
+    def test_skip_to(self):
+        for primitive in self.primitives:
+            count = len(primitive)
+
+            for index in [0, count // 2, count - 1]:
+                if count == 0:
+                    continue
+
+                primitive.skip_to(index)
+                self.assertEqual(primitive.render(), primitive.mutation_at(index))
+                self.assertEqual(primitive.mutant_index, index + 1)
+
+                if index + 1 < count:
+                    self.assertTrue(primitive.mutate())
+                    self.assertEqual(primitive.render(), primitive.mutation_at(index + 1))
+
+            primitive.reset()
+
+        self.assertRaises(IndexError, static("x").skip_to, 0)
+        self.assertRaises(IndexError, byte(0).skip_to, len(byte(0)))
+
+    def test_checkpoint(self):
+        primitives = self.primitives + [random_data("x", 0, 300, name="blob", seed=5)]
+
+        for primitive in primitives:
+            for steps in range(3):
+                primitive.reset()
+
+                for _ in range(steps):
+                    primitive.mutate()
+
+                state    = pickle.loads(pickle.dumps(primitive.checkpoint()))
+                expected = mutate_and_render(primitive)
+
+                primitive.restore(state)
+
+                self.assertEqual(primitive.mutant_index, state[0])
+                self.assertEqual(mutate_and_render(primitive), expected)
+
+    def test_checkpoint_is_compact(self):
+        primitive = string("sulley")
+
+        # mutate through to a long library entry, which the snapshot leaves out.
+        while len(primitive.value) < 100000:
+            primitive.mutate()
+
+        value = primitive.value
+        state = primitive.checkpoint()
+
+        self.assertEqual(state[2], None)
+        self.assertTrue(len(pickle.dumps(state, 2)) < 32)
+
+        primitive.reset()
+        primitive.restore(state)
+        self.assertEqual(primitive.value, value)
+
+        # a value assigned by hand can not be regenerated and is kept.
+        primitive.value = "by hand"
+        self.assertEqual(primitive.checkpoint()[2], ("by hand",))
+
+        primitive.value = primitive.original_value
+        primitive.restore(primitive.checkpoint())
+        self.assertTrue(primitive.value is primitive.original_value)
+
+    def test_checkpoint_generator_state(self):
+        random.seed(1)
+        primitive = random_data("x", 1, 50, max_mutations=10)
+        primitive.mutate()
+
+        state    = primitive.checkpoint()
+        expected = mutate_and_render(primitive)
+
+        primitive.restore(state)
+        self.assertEqual(primitive.render(), state[2][0])
+        self.assertEqual(mutate_and_render(primitive), expected)
+
+    def test_random_data_lengths(self):
+        random.seed(0)
+        primitive = random_data("x", 2, 10, step=4)
+
+        self.assertEqual(len(primitive), 3)
+        self.assertEqual([len(data) for data in primitive.iter_mutations()], [2, 6, 10])
+
+
+class TestRandomData(unittest.TestCase):
+
+    def test_random_bytes_sources(self):
+        for source in [None, random.Random(1), "urandom"]:
+            self.assertEqual(len(random_bytes(65536, source)), 65536)
+            self.assertEqual(random_bytes(0, source), "")
+
+        self.assertRaises(ValueError, random_bytes, 4, object())
+
+    def test_random_bytes_seeded(self):
+        self.assertEqual(random_bytes(100, random.Random(7)), random_bytes(100, random.Random(7)))
+
+        random.seed(7)
+        first = random_bytes(100)
+        random.seed(7)
+        self.assertEqual(random_bytes(100), first)
+
+    def test_random_bytes_out(self):
+        out = bytearray(8)
+
+        self.assertTrue(random_bytes(4, random.Random(1), out) is out)
+        self.assertEqual(out[:4], bytearray(random_bytes(4, random.Random(1))))
+        self.assertEqual(out[4:], bytearray(4))
+        self.assertRaises(ValueError, random_bytes, 9, None, out)
+
+    def test_lengths(self):
+        primitive = random_data("x", 5, 9, max_mutations=50, source=random.Random(3))
+        lengths   = [len(value) for value in mutate_and_render(primitive)]
+
+        self.assertEqual(len(lengths), 50)
+        self.assertTrue(all([5 <= length <= 9 for length in lengths]))
+
+    def test_seeded_source(self):
+        first  = random_data("x", 0, 64, source=random.Random(11))
+        second = random_data("x", 0, 64, source=random.Random(11))
+
+        self.assertEqual(mutate_and_render(first), mutate_and_render(second))
+
+    def test_seeded_mode_is_index_addressable(self):
+        primitive = random_data("x", 0, 256, name="payload", seed=1234)
+        expected  = mutate_and_render(primitive)
+
+        # any mutation can be regenerated on its own, by any instance, whatever the global random state.
+        random.seed(99)
+        other = random_data("x", 0, 256, name="payload", seed=1234)
+
+        self.assertEqual(other.mutation_at(17), expected[17])
+        self.assertEqual(list(reversed(list(other.iter_mutations()))), list(reversed(expected)))
+
+    def test_seeded_mode_streams_differ(self):
+        first  = random_data("x", 64, 64, name="first", seed=1)
+        second = random_data("x", 64, 64, name="second", seed=1)
+        third  = random_data("x", 64, 64, name="first", seed=2)
+
+        self.assertNotEqual(first.mutation_at(0), second.mutation_at(0))
+        self.assertNotEqual(first.mutation_at(0), third.mutation_at(0))
+        self.assertNotEqual(first.mutation_at(0), first.mutation_at(1))
+
+    def test_seeded_mode_needs_a_name(self):
+        # unnamed primitives would all derive the same stream from the seed.
+        self.assertRaises(ValueError, random_data, "x", 64, 64, seed=1)
+
+
+class TestStringSize(unittest.TestCase):
+
+    def test_exact_mutation_count(self):
+        primitive = string("sulley", size=128)
+        values    = mutate_and_render(primitive)
+
+        self.assertEqual(len(values), primitive.num_mutations())
+        self.assertTrue(all([len(value) == 128 for value in values]))
+
+    def test_eligible_entries(self):
+        primitive = string("sulley", size=128)
+        expected  = [entry for entry in list(primitive.fuzz_library) + primitive.this_library if len(entry) <= 128]
+
+        self.assertEqual([value.rstrip("\x00") for value in primitive.iter_mutations()],
+                         [entry.rstrip("\x00") for entry in expected])
+
+        # items exactly as long as the field are kept, not skipped.
+        self.assertTrue("A" * 128 in list(primitive.iter_mutations()))
+
+    def test_pinned_mutation_count(self):
+        # 29 library entries are exactly 5000 long, they are part of the count since items as long as the field are
+        # kept. a change to the library or to the size filter shows up here.
+        primitive = string("sulley", size=5000)
+
+        self.assertEqual(primitive.num_mutations(), 495)
+        self.assertEqual(len([entry for entry in primitive.fuzz_library if len(entry) == 5000]), 29)
+
+    def test_index_is_shared(self):
+        first  = string("first", size=64)
+        second = string("second", size=64)
+
+        self.assertTrue(first.size_index(64) is second.size_index(64))
+        self.assertFalse(first.size_index(64) is string("third", size=65).size_index(65))
+
+
+class TestStringLibrary(unittest.TestCase):
+
+    def test_class_level_alias(self):
+        library = string.fuzz_library
+
+        self.assertTrue(library is string.global_library)
+        self.assertTrue(string("sulley").fuzz_library is library)
+        self.assertTrue("A" * 128 in list(library))
+
+        try:
+            string.fuzz_library = ["replaced"]
+            self.assertEqual(string.global_library, ["replaced"])
+            self.assertEqual(string("sulley").fuzz_library, ["replaced"])
+        finally:
+            string.fuzz_library = library
+
+
+def reference_render(primitive, value):
+    """
+    The original bit string based bit_field rendering, kept as an oracle for the struct based one.
+    """
+
+    bits = primitive.to_binary(value)
+
+    if primitive.format == "binary":
+        bits     = "0" * (-primitive.width % 8) + bits
+        rendered = "".join([chr(int(bits[i:i + 8], 2)) for i in range(0, len(bits), 8)])
+
+        if primitive.endian == "<":
+            rendered = rendered[::-1]
+
+        return rendered
+
+    if primitive.signed and bits[0] == "1":
+        max_num = int("0" + "1" * (primitive.width - 1), 2)
+        return "%d" % ~(max_num - (value & max_num))
+
+    return "%d" % value
+
+
+class TestBitFieldRender(unittest.TestCase):
+
+    def test_matches_reference(self):
+        random.seed(0)
+
+        for width in [1, 3, 7, 8, 12, 16, 24, 32, 33, 48, 64, 65, 128]:
+            for endian in ["<", ">"]:
+                for format in ["binary", "ascii"]:
+                    for signed in [False, True]:
+                        primitive = bit_field(0, width, endian=endian, format=format, signed=signed)
+                        values    = [random.getrandbits(width) for _ in range(10)] + [0, -1]
+
+                        for value in list(primitive.fuzz_library) + values:
+                            self.assertEqual(primitive.render_value(value), reference_render(primitive, value))
+
+    def test_render_updates_rendered(self):
+        primitive = word(0x4142, endian=">")
+
+        self.assertEqual(primitive.render(), "AB")
+        self.assertEqual(primitive.rendered, "AB")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_render_cache
+----------------------------------
+
+Tests for the `sulley.primitives.render_cache` encoded render cache.
+"""
+
+import unittest
+
+from sulley.primitives.render_cache import render_cache
+from sulley.primitives.string import string
+
+
+class TestRenderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = render_cache(max_bytes=1000, min_length=10)
+
+    def test_hits_and_misses(self):
+        value = "A" * 100
+
+        self.assertEqual(self.cache.encode(value, "utf_16_le"), "A\x00" * 100)
+        self.assertEqual(self.cache.encode(value, "utf_16_le"), "A\x00" * 100)
+        self.assertEqual(self.cache.encode(value, "ascii"), value)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 2))
+        self.assertEqual(stats["bytes"], 300 + 200)
+
+    def test_failures_are_remembered(self):
+        value = "\xfe" * 100
+
+        self.assertTrue(self.cache.encode(value, "ascii") is value)
+        self.assertTrue(self.cache.encode(value, "ascii") is value)
+        self.assertEqual((self.cache.failures, self.cache.hits), (1, 1))
+
+    def test_short_values_bypass(self):
+        self.assertEqual(self.cache.encode("short", "utf_16_le"), "s\x00h\x00o\x00r\x00t\x00")
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_full_cache_keeps_its_entries(self):
+        first, second, third = "A" * 200, "B" * 200, "C" * 200
+
+        self.cache.encode(first, "ascii")
+        self.cache.encode(second, "ascii")
+        self.cache.encode(third, "ascii")
+
+        self.assertEqual(self.cache.rejections, 1)
+        self.assertTrue((first, "ascii") in self.cache.entries)
+        self.assertTrue((second, "ascii") in self.cache.entries)
+        self.assertFalse((third, "ascii") in self.cache.entries)
+        self.assertTrue(self.cache.size <= self.cache.max_bytes)
+
+    def test_disabled_by_default(self):
+        cache = render_cache()
+
+        self.assertEqual(cache.encode("A" * 5000, "utf_16_le"), "A\x00" * 5000)
+        self.assertEqual((cache.stats()["entries"], cache.misses), (0, 0))
+
+    def test_mutation_passes(self):
+        # the encoded library outgrows the budget, the second pass still hits on what the first one cached.
+        cache     = render_cache(max_bytes=4 * 1024 * 1024)
+        primitive = string("sulley", encoding="utf_16_le")
+        previous  = string.render_cache
+        passes    = []
+
+        string.render_cache = cache
+
+        try:
+            for _ in range(2):
+                hits = cache.hits
+                primitive.reset()
+
+                while primitive.mutate():
+                    primitive.render()
+
+                passes.append(cache.hits - hits)
+        finally:
+            string.render_cache = previous
+
+        self.assertEqual(passes[0], 0)
+        self.assertTrue(passes[1] > 0)
+        self.assertTrue(cache.rejections > 0)
+        self.assertTrue(cache.size <= cache.max_bytes)
+
+    def test_oversized_values_are_not_cached(self):
+        self.cache.encode("A" * 1000, "ascii")
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_string_render(self):
+        primitive = string("sulley", encoding="utf_16_le")
+
+        for value in ["A" * 5000, "\xfe" * 5000, "sulley"]:
+            primitive.value = value
+
+            try:
+                expected = value.encode("utf_16_le")
+            except UnicodeDecodeError:
+                expected = value
+
+            self.assertEqual(primitive.render(), expected)
+            self.assertEqual(primitive.render(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_runner
+----------------------------------
+
+Tests for the `sulley.runner` multiprocess runner. The factory and work functions are module level so that they can be
+sent to the worker processes.
+"""
+
+import os
+import unittest
+import zlib
+
+from sulley.blocks import block, request
+from sulley.primitives.byte import byte
+from sulley.primitives.corpus import corpus
+from sulley.primitives.delim import delim
+from sulley.primitives.library import chained_library
+from sulley.primitives.string import string
+from sulley.runner import partition_indexes, runner, share_libraries
+
+
+def build ():
+    req = request("login")
+
+    req.push(string("user", max_len=32))
+    req.push(delim(":"))
+    req.push(block("secret", req))
+    req.push(string("password"))
+    req.push(byte(0))
+    req.pop()
+
+    return req
+
+
+def checksum (req, index, rendered):
+    return zlib.crc32(rendered), type(string.truncated_libraries[32][1]) is corpus
+
+
+def crashes (req, index, rendered):
+    if index % 100 == 0:
+        return len(rendered)
+
+
+class TestRunner(unittest.TestCase):
+
+    def test_partitions(self):
+        for partition in ("stride", "range"):
+            indexes = []
+
+            for worker in range(3):
+                indexes.extend(partition_indexes(10, worker, 3, partition))
+
+            self.assertEqual(sorted(indexes), list(range(10)))
+
+        self.assertEqual(list(partition_indexes(10, 1, 3, "range")), [3, 4, 5])
+        self.assertRaises(ValueError, runner, build, partition="random")
+
+    def test_results_match_serial_run(self):
+        req      = build()
+        expected = [(index, (zlib.crc32(req.mutation_at(index)), True)) for index in range(req.num_mutations())]
+
+        for partition in ("stride", "range"):
+            ran = runner(build, workers=2, partition=partition).run(checksum)
+
+            self.assertEqual(ran["test_cases"], req.num_mutations())
+            self.assertEqual(ran["results"], expected)
+
+    def test_shared_libraries(self):
+        build().num_mutations()
+
+        library   = string.global_library
+        truncated = string.truncated_libraries
+
+        # a line based custom dictionary chained onto the global library.
+        string.global_library      = chained_library(library, ("custom one", "custom two"))
+        string.truncated_libraries = {}
+
+        try:
+            total, custom, paths = share_libraries(build)
+
+            try:
+                self.assertEqual(total, build().num_mutations())
+                self.assertEqual(list(paths.keys()), [32])
+                self.assertEqual([bytes(bytearray(entry)) for entry in corpus(custom)], ["custom one", "custom two"])
+                self.assertEqual(len(corpus(paths[32])), len(string.truncated_libraries[32][1]))
+            finally:
+                for path in [custom] + list(paths.values()):
+                    os.remove(path)
+        finally:
+            string.global_library      = library
+            string.truncated_libraries = truncated
+
+        # the recipe built global library is left to the workers to inherit.
+        total, custom, paths = share_libraries(build)
+
+        for path in paths.values():
+            os.remove(path)
+
+        self.assertTrue(custom is None)
+
+    def test_sparse_results(self):
+        total = build().num_mutations()
+        ran   = runner(build, workers=3).run(crashes)
+
+        self.assertEqual([index for index, result in ran["results"]], list(range(0, total, 100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,8 +10,6 @@ Tests for `sulley` module.
 
 import unittest
 
-from sulley import sulley
-
 
 class TestSulley(unittest.TestCase):
 
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_transport
+----------------------------------
+
+Tests for the `sulley.transport` sender, against the bundled echo server. Under Python 2 they need trollius, a test
+dependency there, and are skipped when neither asyncio nor trollius is available.
+"""
+
+import unittest
+
+from sulley import transport
+from sulley.primitives.group import group
+
+VALUES = ["value %d" % i for i in range(40)]
+
+
+def stream ():
+    return group("values", VALUES)
+
+
+class counting (object):
+    """
+    Mutation stream counting how many mutations were taken from it.
+    """
+
+    def __init__ (self, mutable):
+        self.mutable = mutable
+        self.count   = 0
+
+    def mutate (self):
+        self.count += 1
+        return self.mutable.mutate()
+
+    def render (self):
+        return self.mutable.render()
+
+
+@unittest.skipIf(transport.asyncio is None, "asyncio is not available")
+class TestSender(unittest.TestCase):
+
+    def setUp(self):
+        self.loop    = transport.asyncio.new_event_loop()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.close()
+
+        # let the closed transports finish closing.
+        self.pause(0.01)
+        self.loop.close()
+
+    def pause(self, seconds):
+        # run the test loop for a while. asyncio.sleep() would run on the default loop under trollius, which takes
+        # its loop as an argument, while asyncio no longer accepts one.
+        self.loop.call_later(seconds, self.loop.stop)
+        self.loop.run_forever()
+
+    def serve(self, **kwargs):
+        server = transport.echo_server(loop=self.loop, **kwargs)
+        self.loop.run_until_complete(server.start())
+        self.servers.append(server)
+
+        return server
+
+    def send(self, server, **kwargs):
+        cases  = []
+        target = transport.sender("127.0.0.1", server.port, proto=server.proto, callback=cases.append,
+                                  loop=self.loop, **kwargs)
+
+        target.run(stream())
+        target.close()
+
+        return target, cases
+
+    def assert_echoed(self, target, cases):
+        self.assertEqual(target.sent, len(VALUES))
+        self.assertEqual(target.responses, len(VALUES))
+        self.assertEqual(sorted([case.index for case in cases]), list(range(len(VALUES))))
+
+        for case in cases:
+            self.assertEqual(case.response, case.data)
+            self.assertEqual(case.data, VALUES[case.index].encode("latin_1"))
+
+    def test_tcp(self):
+        target, cases = self.send(self.serve(), concurrency=8)
+
+        self.assert_echoed(target, cases)
+        self.assertEqual(target.connections, len(VALUES))
+
+    def test_keep_alive(self):
+        server        = self.serve()
+        target, cases = self.send(server, concurrency=4, keep_alive=True)
+
+        self.assert_echoed(target, cases)
+        self.assertTrue(target.connections <= 4)
+        self.assertEqual(server.connections, target.connections)
+
+    def test_keep_alive_multi_chunk(self):
+        # answers far larger than a single read, the end of one must not be taken for the answer to the next. the
+        # quiet window is wide enough for a loaded machine (or trollius) to pause between writes of the echo server.
+        values = [letter * (2 * 1024 * 1024) for letter in "ABCDEF"]
+        server = self.serve()
+        cases  = []
+        target = transport.sender("127.0.0.1", server.port, concurrency=1, keep_alive=True, callback=cases.append,
+                                  loop=self.loop, quiet=0.2)
+
+        target.run(group("large", values))
+        target.close()
+
+        self.assertEqual(target.responses, len(values))
+        self.assertEqual(target.connections, 1)
+
+        for case in cases:
+            self.assertEqual(case.response, values[case.index].encode("latin_1"))
+
+    def test_terminator(self):
+        # answers ending with the terminator finish right away, well before the connection goes quiet.
+        values = [letter * (256 * 1024) + "\r\n" for letter in "ABCD"]
+        server = self.serve()
+        cases  = []
+        target = transport.sender("127.0.0.1", server.port, concurrency=1, keep_alive=True, callback=cases.append,
+                                  loop=self.loop, quiet=5.0, terminator="\r\n")
+
+        start = self.loop.time()
+        target.run(group("terminated", values))
+        target.close()
+
+        self.assertTrue(self.loop.time() - start < 5.0)
+        self.assertEqual([case.response for case in cases], [value.encode("latin_1") for value in values])
+
+    def test_udp(self):
+        target, cases = self.send(self.serve(proto="udp"), concurrency=4, keep_alive=True)
+
+        self.assert_echoed(target, cases)
+
+    def test_concurrency(self):
+        # with a slow target, test cases in flight at once overlap their waits.
+        target, cases = self.send(self.serve(delay=0.05), concurrency=len(VALUES))
+
+        self.assert_echoed(target, cases)
+
+        start = self.loop.time()
+        self.send(self.servers[0], concurrency=len(VALUES))
+        self.assertTrue(self.loop.time() - start < 0.05 * len(VALUES) / 4)
+
+    def test_timeout(self):
+        target, cases = self.send(self.serve(sink=True), concurrency=len(VALUES), timeout=0.05)
+
+        self.assertEqual(target.timeouts, len(VALUES))
+        self.assertTrue(all([case.timed_out for case in cases]))
+
+    def test_sink(self):
+        server        = self.serve(sink=True)
+        target, cases = self.send(server, concurrency=4, keep_alive=True, response=False)
+
+        self.assertEqual(target.sent, len(VALUES))
+        self.assertEqual(target.timeouts, 0)
+
+        # let the server read what is still in flight.
+        while server.bytes < sum([len(value) for value in VALUES]):
+            self.pause(0.01)
+
+    def test_backpressure(self):
+        values = counting(stream())
+        server = self.serve(delay=0.01)
+        target = transport.sender("127.0.0.1", server.port, concurrency=2, loop=self.loop)
+        done   = target.start(values)
+
+        # nothing is rendered past the slots until test cases finish.
+        self.assertEqual(values.count, 2)
+        self.loop.run_until_complete(done)
+        self.assertEqual(target.responses, len(VALUES))
+
+    def test_errors(self):
+        server = self.serve()
+        port   = server.port
+        server.close()
+
+        target = transport.sender("127.0.0.1", port, loop=self.loop)
+        target.run(stream(), count=5)
+
+        self.assertEqual(target.errors, 5)
+        self.assertRaises(ValueError, transport.sender, "127.0.0.1", port, proto="sctp", loop=self.loop)
+
+
+if __name__ == '__main__':
+    unittest.main()